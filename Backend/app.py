@@ -1,12 +1,24 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 import os
-import subprocess
 import json
-from datetime import datetime
-from utils import init_db, save_prediction, get_predictions
-from models import predict_with_model, get_model_features
-from notebook_parser import parse_notebook_output, parse_timeout_error
+import time
+from collections import Counter
+from utils import ensure_db, get_predictions_page, get_prediction_stats, get_cell_profile_history
+from prediction_logger import log_prediction, prediction_logger
+from models import (predict_cached, get_model_features, warm_up, MODEL_FEATURES,
+                    predict_batch_with_model, predict_batch_with_pipeline)
+from model_registry import ALGORITHMS, registry
+from prediction_cache import prediction_cache
+from batch_io import read_batch_request, iter_row_chunks, CSV_TYPES, NDJSON_TYPES
+from config import Config
+import run_cache
+from jobs import submit_job, get_job, list_jobs, wait_for_job
+from run_all import RUN_ALL_JOB, check_budget, discover_notebooks, run_all
+from artifact_index import list_artifacts
+from dataset_store import SOURCES
+import model_store
+import metrics
 
 app = Flask(__name__)
 
@@ -36,8 +48,110 @@ else:
         }
     })
 
-# تهيئة قاعدة البيانات عند البدء
-init_db()
+# Startup state reported by /api/ready, filled in by create_app()
+startup = {"ready": False, "pid": None, "seconds": None, "models": {}, "warm_up_ms": {}}
+
+# `gunicorn app:app` and `import app` never call create_app(); the tables must exist anyway
+ensure_db()
+
+
+def warm_kernel_pool():
+    """Start the notebook kernels at boot when KERNEL_POOL_PREWARM is set"""
+    if Config.NOTEBOOK_ENGINE == 'kernel' and Config.KERNEL_POOL_PREWARM:
+        from kernel_pool import kernel_pool
+        kernel_pool.warm()
+
+
+def create_app(warm_kernels=True):
+    """
+    App factory: initialise the database and load the read-only serving state
+
+    gunicorn.conf.py calls it once in the master before forking. The trained
+    pipelines with their training columns and medians, and the MODEL_FEATURES
+    tables imported with this module, are then shared copy-on-write by every
+    worker, and each pipeline has already scored once (see models.warm_up).
+    Kernels hold threads and sockets that do not survive a fork, so
+    gunicorn passes warm_kernels=False and starts them in each worker.
+    """
+    if startup["ready"]:
+        return app
+    started = time.perf_counter()
+
+    # تهيئة قاعدة البيانات عند البدء
+    ensure_db()
+    if Config.PRELOAD_MODELS:
+        startup["models"] = registry.preload(SOURCES)
+        startup["warm_up_ms"] = warm_up([key for key, error in startup["models"].items() if error is None])
+    if warm_kernels:
+        warm_kernel_pool()
+
+    startup.update(ready=True, pid=os.getpid(), seconds=round(time.perf_counter() - started, 3))
+    print(f"✅ Ready in {startup['seconds']}s with {len(registry.loaded())} pipeline(s) preloaded")
+    return app
+
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    """Request latency per route; prediction routes name their model in g.model"""
+    started = g.get('started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        # A metrics failure (e.g. an unwritable METRICS_DIR) must not fail the response
+        try:
+            metrics.REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                (request.method, route, str(response.status_code), g.get('model', ''))
+            )
+        except Exception as e:
+            print(f"⚠️ Metrics: could not record {request.method} {route}: {e}")
+    return response
+
+
+def invalid_pipeline_request(dataset, algorithm):
+    """
+    Error response for a pipeline request whose dataset or algorithm is unknown, else None
+
+    Checked before the names reach the registry, whose file paths and cache
+    keys are built from them.
+    """
+    if algorithm not in ALGORITHMS:
+        return jsonify({
+            "error": f"Unknown algorithm: {algorithm}",
+            "message": f"Use one of {', '.join(ALGORITHMS)}",
+            "success": False
+        }), 400
+    if not isinstance(dataset, str) or dataset not in SOURCES:
+        return jsonify({
+            "error": f"Unknown dataset: {dataset}",
+            "message": f"Use one of {', '.join(SOURCES)}",
+            "success": False
+        }), 404
+    return None
+
+
+def model_label(model, dataset, algorithm):
+    """
+    Metrics label of a prediction request; unknown heuristic names share one label
+
+    Pipeline requests must have passed invalid_pipeline_request(), so the
+    labels stay bounded.
+    """
+    if algorithm:
+        return registry.make_key(dataset, algorithm)
+    return model if model in MODEL_FEATURES else 'other'
+
+
+def count_predictions(model, labels):
+    try:
+        for label, count in Counter(labels).items():
+            metrics.PREDICTIONS.inc((model, label), count)
+    except Exception as e:
+        print(f"⚠️ Metrics: could not count {model} predictions: {e}")
 
 @app.route('/')
 def home():
@@ -47,11 +161,23 @@ def home():
         "version": "1.0.0",
         "endpoints": {
             "health": "/api/health",
+            "ready": "/api/ready",
             "model_features": "/api/model-features/<model_name>",
             "list_notebooks": "/api/list-notebooks",
             "run_notebook": "/api/run-notebook",
+            "run_all": "/api/run-all",
+            "jobs": "/api/jobs/<job_id>",
+            "notebook_profiles": "/api/notebook-profiles/<notebook_name>",
+            "artifacts": "/api/artifacts",
+            "model_versions": "/api/models/<dataset>/versions",
+            "model_promote": "/api/models/<dataset>/promote",
+            "model_rollback": "/api/models/<dataset>/rollback",
             "predict": "/api/predict",
-            "predictions": "/api/predictions"
+            "predict_batch": "/api/predict/batch",
+            "predict_stream": "/api/predict/stream",
+            "predictions": "/api/predictions",
+            "prediction_stats": "/api/predictions/stats",
+            "metrics": "/metrics"
         }
     })
 
@@ -64,11 +190,23 @@ def api_home():
         "version": "1.0.0",
         "endpoints": {
             "health": "/api/health",
+            "ready": "/api/ready",
             "model_features": "/api/model-features/<model_name>",
             "list_notebooks": "/api/list-notebooks",
             "run_notebook": "/api/run-notebook",
+            "run_all": "/api/run-all",
+            "jobs": "/api/jobs/<job_id>",
+            "notebook_profiles": "/api/notebook-profiles/<notebook_name>",
+            "artifacts": "/api/artifacts",
+            "model_versions": "/api/models/<dataset>/versions",
+            "model_promote": "/api/models/<dataset>/promote",
+            "model_rollback": "/api/models/<dataset>/rollback",
             "predict": "/api/predict",
-            "predictions": "/api/predictions"
+            "predict_batch": "/api/predict/batch",
+            "predict_stream": "/api/predict/stream",
+            "predictions": "/api/predictions",
+            "prediction_stats": "/api/predictions/stats",
+            "metrics": "/metrics"
         }
     })
 
@@ -79,7 +217,7 @@ def health_check():
         # Test database connection
         from utils import get_connection
         conn = get_connection()
-        conn.close()
+        conn.execute("SELECT 1").fetchone()
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -87,9 +225,30 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "database": db_status,
+        "models_loaded": registry.loaded(),
+        "prediction_log": prediction_logger.stats(),
+        "prediction_cache": prediction_cache.stats(),
         "environment": os.environ.get('FLASK_ENV', 'development')
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics of every worker (see metrics.py)"""
+    metrics.PREDICTION_QUEUE_DEPTH.set(prediction_logger.stats()["queued"])
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 503 until create_app() has initialised the database and preloaded the models"""
+    return jsonify({
+        "ready": startup["ready"],
+        "pid": os.getpid(),
+        "preloaded_by": startup["pid"],
+        "startup_seconds": startup["seconds"],
+        "models": startup["models"],
+        "warm_up_ms": startup["warm_up_ms"]
+    }), 200 if startup["ready"] else 503
+
 @app.route('/api/model-features/<model_name>', methods=['GET'])
 def model_features(model_name):
     """Get the top 3 features for a specific model"""
@@ -129,7 +288,13 @@ def list_notebooks():
 
 @app.route('/api/run-notebook', methods=['POST'])
 def run_notebook():
-    """Execute a notebook and return user-friendly results"""
+    """
+    Queue a notebook run and return its job id
+
+    Returns the cached result immediately when nothing changed since the last
+    successful run (pass "force": true to retrain); its artifacts are restored
+    and published by a job. Blocks for the result when "wait": true.
+    """
     try:
         data = request.get_json()
         notebook_name = data.get('notebook')
@@ -151,27 +316,37 @@ def run_notebook():
                 "success": False
             }), 404
 
-        # Track execution time
-        execution_start = datetime.now()
-        
-        # Execute notebook using nbconvert
-        timeout_seconds = 300
-        result = subprocess.run([
-            'jupyter', 'nbconvert', '--to', 'notebook', '--execute',
-            '--inplace', notebook_path
-        ], capture_output=True, text=True, timeout=timeout_seconds)
-
-        # Parse result and return user-friendly output
-        parsed_output = parse_notebook_output(notebook_name, result, execution_start)
-        
-        status_code = 200 if parsed_output["success"] else 500
-        return jsonify(parsed_output), status_code
-
-    except subprocess.TimeoutExpired:
-        execution_time = (datetime.now() - execution_start).total_seconds()
-        timeout_output = parse_timeout_error(notebook_name, execution_time, timeout_seconds)
-        return jsonify(timeout_output), 500
-        
+        # Unchanged code, data and libraries: serve the previous run's artifacts
+        if not data.get('force'):
+            cached = run_cache.lookup(notebook_path)
+            if cached is not None:
+                # Copying the artifacts back and publishing them runs on the job pool
+                job, _ = submit_job(notebook_name, notebook_path, runner=lambda name, path: run_cache.restore(cached))
+                if data.get('wait'):
+                    job = wait_for_job(job["job_id"], Config.NOTEBOOK_TIMEOUT + 30)
+                    if job["result"] is not None:
+                        return jsonify(job["result"]), 200 if job["result"]["success"] else 500
+                return jsonify({**cached, "job_id": job["job_id"], "status_url": f"/api/jobs/{job['job_id']}"}), 200
+
+        job, attached = submit_job(notebook_name, notebook_path)
+
+        if data.get('wait'):
+            # Legacy synchronous mode: hold the request until the run finishes
+            job = wait_for_job(job["job_id"], Config.NOTEBOOK_TIMEOUT + 30)
+            if job["result"] is not None:
+                status_code = 200 if job["result"]["success"] else 500
+                return jsonify(job["result"]), status_code
+
+        return jsonify({
+            "success": True,
+            "message": "Notebook run already in progress" if attached else "Notebook run queued",
+            "notebook": notebook_name,
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "attached": attached,
+            "status_url": f"/api/jobs/{job['job_id']}"
+        }), 202
+
     except Exception as e:
         return jsonify({
             "success": False,
@@ -185,6 +360,132 @@ def run_notebook():
             ]
         }), 500
 
+@app.route('/api/run-all', methods=['POST'])
+def run_all_notebooks():
+    """
+    Queue one job that trains every *_FlaskReady.ipynb notebook in parallel
+
+    Body (all optional): force, wait, max_parallel, memory_mb. The job result
+    is a consolidated report with one entry per dataset.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        notebooks = discover_notebooks()
+        if not notebooks:
+            return jsonify({"error": "No notebooks found", "success": False}), 404
+
+        force = bool(data.get('force'))
+        max_parallel = data.get('max_parallel')
+        memory_mb = data.get('memory_mb')
+        try:
+            check_budget(max_parallel, memory_mb)
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+        job, attached = submit_job(
+            RUN_ALL_JOB,
+            Config.NOTEBOOKS_DIR,
+            runner=lambda name, path: run_all(force, max_parallel, memory_mb)
+        )
+
+        if data.get('wait'):
+            job = wait_for_job(job["job_id"], Config.NOTEBOOK_TIMEOUT * len(notebooks) + 30)
+            if job["result"] is not None:
+                return jsonify(job["result"]), 200 if job["result"]["success"] else 500
+
+        return jsonify({
+            "success": True,
+            "message": "Run-all already in progress" if attached else "Run-all queued",
+            "notebooks": [name for name, _ in notebooks],
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "attached": attached,
+            "status_url": f"/api/jobs/{job['job_id']}"
+        }), 202
+
+    except Exception as e:
+        return jsonify({"success": False, "error": "Unexpected error", "message": str(e)}), 500
+
+@app.route('/api/jobs', methods=['GET'])
+def jobs_list():
+    """List recent notebook jobs"""
+    try:
+        limit = int(request.args.get('limit', 20))
+        jobs = list_jobs(limit)
+        return jsonify({"jobs": jobs, "count": len(jobs)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Progress and, once finished, the parsed result of a notebook job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "job_id": job_id, "success": False}), 404
+    return jsonify(job)
+
+@app.route('/api/notebook-profiles/<notebook_name>', methods=['GET'])
+def notebook_profiles(notebook_name):
+    """Per-cell timings, peak RSS and output size across recent runs of a notebook"""
+    try:
+        runs = int(request.args.get('runs', 20))
+        cells = get_cell_profile_history(notebook_name, runs)
+        return jsonify({"notebook": notebook_name, "cells": cells, "count": len(cells)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/artifacts', methods=['GET'])
+def artifacts():
+    """Models, plots and result files of training runs, answered from the artifact index"""
+    try:
+        found = list_artifacts(
+            dataset=request.args.get('dataset'),
+            kind=request.args.get('kind')
+        )
+        return jsonify({"artifacts": found, "count": len(found)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/models/<dataset>/versions', methods=['GET'])
+def model_versions(dataset):
+    """Stored model versions of a dataset and which one is being served"""
+    if dataset not in SOURCES:
+        return jsonify({"error": f"Unknown dataset: {dataset}", "success": False}), 404
+    try:
+        versions = model_store.list_versions(dataset)
+        return jsonify({
+            "dataset": dataset,
+            "current": model_store.read_pointer(dataset),
+            "versions": versions,
+            "count": len(versions)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/models/<dataset>/promote', methods=['POST'])
+@app.route('/api/models/<dataset>/rollback', methods=['POST'])
+def model_promote(dataset):
+    """
+    Switch the served model version
+
+    /promote needs {"version": ...}. /rollback re-promotes the previous
+    version, or the one given. Workers pick the change up on their next request.
+    """
+    if dataset not in SOURCES:
+        return jsonify({"error": f"Unknown dataset: {dataset}", "success": False}), 404
+    version = (request.get_json(silent=True) or {}).get('version')
+    try:
+        if request.path.endswith('/rollback'):
+            pointer = model_store.rollback(dataset, version)
+        elif version:
+            pointer = model_store.promote(dataset, version)
+        else:
+            return jsonify({"error": "No version specified", "success": False}), 400
+        return jsonify({"success": True, "dataset": dataset, "current": pointer})
+    except LookupError as e:
+        return jsonify({"error": str(e), "success": False}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/predict', methods=['POST'])
 def predict():
     """إجراء تنبؤ باستخدام النموذج مع الميزات الأساسية الثلاثة"""
@@ -193,6 +494,7 @@ def predict():
         model = data.get('model', 'Kepler')
         features = data.get('features', {})
         dataset = data.get('dataset', 'Kepler')
+        algorithm = data.get('algorithm')
 
         # Validate that features are provided
         if not features or len(features) == 0:
@@ -204,20 +506,45 @@ def predict():
         # Use the model name from dataset if not explicitly provided
         if model == 'default' or not model:
             model = dataset
+        if algorithm:
+            error = invalid_pipeline_request(dataset, algorithm)
+            if error is not None:
+                g.model = 'unknown'
+                return error
+        g.model = model_label(model, dataset, algorithm)
 
-        # Get prediction using the model-specific features
-        probability, label, raw_output = predict_with_model(model, features)
+        # Trained notebook pipeline when an algorithm is given, otherwise the
+        # model-specific heuristic - repeated feature vectors come from the cache
+        try:
+            probability, label, raw_output, cache_hit = predict_cached(model, dataset, algorithm, features)
+        except FileNotFoundError as e:
+            g.model = 'unknown'
+            return jsonify({
+                "error": str(e),
+                "message": "Model not trained yet - run the dataset notebook first",
+                "success": False
+            }), 404
+        except ValueError as e:
+            g.model = 'unknown'
+            return jsonify({
+                "error": str(e),
+                "message": "Feature values must be numbers",
+                "success": False
+            }), 400
 
         # Save prediction to database
-        save_prediction(dataset, model, features, probability, label, raw_output)
+        log_prediction(dataset, model, features, probability, label, raw_output)
+        count_predictions(g.model, [label])
 
         return jsonify({
             "probability": probability,
             "label": label,
             "raw": raw_output,
             "model": model,
+            "algorithm": algorithm,
             "dataset": dataset,
             "features_used": features,
+            "cached": cache_hit,
             "success": True
         })
 
@@ -228,15 +555,167 @@ def predict():
             "success": False
         }), 500
 
+def score_rows(model, dataset, algorithm, rows):
+    """Score a DataFrame of rows with a trained pipeline or the heuristic model"""
+    if algorithm:
+        return predict_batch_with_pipeline(dataset, algorithm, rows, chunk_size=Config.BATCH_CHUNK_SIZE)
+    return predict_batch_with_model(model, rows)
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score many candidates in one request (JSON array, CSV or NDJSON body)"""
+    try:
+        try:
+            options, rows = read_batch_request(request)
+        except ValueError as e:
+            return jsonify({
+                "error": str(e),
+                "message": "Send a JSON array, CSV or NDJSON body of feature rows",
+                "success": False
+            }), 400
+
+        dataset = options.get('dataset', 'Kepler')
+        model = options.get('model') or dataset
+        algorithm = options.get('algorithm')
+        if model == 'default':
+            model = dataset
+        if algorithm:
+            error = invalid_pipeline_request(dataset, algorithm)
+            if error is not None:
+                g.model = 'unknown'
+                return error
+        g.model = model_label(model, dataset, algorithm)
+
+        try:
+            probabilities, labels = score_rows(model, dataset, algorithm, rows)
+        except FileNotFoundError as e:
+            g.model = 'unknown'
+            return jsonify({
+                "error": str(e),
+                "message": "Model not trained yet - run the dataset notebook first",
+                "success": False
+            }), 404
+
+        count_predictions(g.model, labels)
+        results = [
+            {"row": i, "probability": prob, "label": label}
+            for i, (prob, label) in enumerate(zip(probabilities.tolist(), labels))
+        ]
+
+        return jsonify({
+            "model": model,
+            "algorithm": algorithm,
+            "dataset": dataset,
+            "count": len(results),
+            "results": results,
+            "success": True
+        })
+
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Batch prediction failed",
+            "success": False
+        }), 500
+
+@app.route('/api/predict/stream', methods=['POST'])
+def predict_stream():
+    """
+    Score an arbitrarily large CSV or NDJSON upload as a stream
+
+    The body is read in fixed-size blocks, scored BATCH_CHUNK_SIZE rows at a
+    time and written back as NDJSON, so memory stays flat regardless of size.
+    Options (model, dataset, algorithm) come from the query string.
+    """
+    content_type = (request.mimetype or '').lower()
+    if content_type not in CSV_TYPES + NDJSON_TYPES:
+        return jsonify({
+            "error": f"Unsupported content type: {content_type or 'none'}",
+            "message": "Stream a CSV (text/csv) or NDJSON (application/x-ndjson) body",
+            "success": False
+        }), 415
+
+    dataset = request.args.get('dataset', 'Kepler')
+    model = request.args.get('model') or dataset
+    algorithm = request.args.get('algorithm')
+    if model == 'default':
+        model = dataset
+    if algorithm:
+        error = invalid_pipeline_request(dataset, algorithm)
+        if error is not None:
+            g.model = 'unknown'
+            return error
+    if algorithm and registry.resolve_path(dataset, algorithm) is None:
+        g.model = 'unknown'
+        return jsonify({
+            "error": f"No trained pipeline found for {registry.make_key(dataset, algorithm)}",
+            "message": "Model not trained yet - run the dataset notebook first",
+            "success": False
+        }), 404
+
+    # Timed until the response starts; the rows are scored while the body streams
+    g.model = model_name = model_label(model, dataset, algorithm)
+
+    def generate():
+        count = 0
+        try:
+            for rows in iter_row_chunks(request.stream, content_type, Config.BATCH_CHUNK_SIZE):
+                probabilities, labels = score_rows(model, dataset, algorithm, rows)
+                count_predictions(model_name, labels)
+                yield ''.join(
+                    json.dumps({"row": count + i, "probability": prob, "label": label}) + '\n'
+                    for i, (prob, label) in enumerate(zip(probabilities.tolist(), labels))
+                )
+                count += len(labels)
+            yield json.dumps({"done": True, "count": count, "success": True}) + '\n'
+        except Exception as e:
+            # Headers are already sent - report the failure as the final line
+            yield json.dumps({"done": False, "count": count, "error": str(e), "success": False}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/predictions', methods=['GET'])
 def predictions():
-    """إرجاع سجل التنبؤات"""
+    """
+    إرجاع سجل التنبؤات
+
+    Query params: limit, cursor (from next_cursor), model, dataset, label,
+    min_probability, max_probability, include_raw=false to skip raw_output.
+    """
     try:
-        preds = get_predictions()
+        args = request.args
+        limit = max(1, min(int(args.get('limit', 50)), Config.PREDICTIONS_MAX_PAGE_SIZE))
+        page = get_predictions_page(
+            limit=limit,
+            cursor=args.get('cursor'),
+            model=args.get('model'),
+            dataset=args.get('dataset'),
+            label=args.get('label'),
+            min_probability=args.get('min_probability', type=float),
+            max_probability=args.get('max_probability', type=float),
+            include_raw=args.get('include_raw', 'true').lower() != 'false'
+        )
         return jsonify({
-            "predictions": preds,
-            "count": len(preds)
+            "predictions": page["predictions"],
+            "count": len(page["predictions"]),
+            "next_cursor": page["next_cursor"]
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/predictions/stats', methods=['GET'])
+def prediction_stats():
+    """
+    إحصائيات التنبؤات
+
+    Label counts, probability histogram, mean confidence per model and the
+    last `hours` (default 24) of hourly volume, read from the rollup tables.
+    """
+    try:
+        hours = max(1, min(request.args.get('hours', 24, type=int), 24 * 90))
+        return jsonify(get_prediction_stats(hours))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -246,12 +725,25 @@ if __name__ == '__main__':
     print(f"📊 API available at: http://localhost:{port}")
     print("🔗 Endpoints:")
     print("   GET  /api/health")
+    print("   GET  /api/ready")
     print("   GET  /api/model-features/<model_name>")
     print("   GET  /api/list-notebooks")
     print("   POST /api/run-notebook")
+    print("   POST /api/run-all")
+    print("   GET  /api/jobs/<job_id>")
+    print("   GET  /api/notebook-profiles/<notebook_name>")
+    print("   GET  /api/artifacts")
+    print("   GET  /api/models/<dataset>/versions")
+    print("   POST /api/models/<dataset>/promote")
+    print("   POST /api/models/<dataset>/rollback")
     print("   POST /api/predict")
+    print("   POST /api/predict/batch")
+    print("   POST /api/predict/stream")
     print("   GET  /api/predictions")
+    print("   GET  /api/predictions/stats")
+    print("   GET  /metrics")
 
     # Use environment variable to determine if in production
     debug_mode = os.environ.get('FLASK_ENV') != 'production'
+    create_app()
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Artifact Index
+SQLite index of the models, plots and result files written by training runs
+
+    python artifact_index.py           # re-index files changed outside a run
+"""
+
+import os
+import sys
+import json
+from datetime import datetime
+
+from config import Config
+from dataset_store import SOURCES
+from model_registry import file_sha256
+from utils import get_connection, init_db
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+UPSERT_ARTIFACT_SQL = """
+    INSERT INTO artifacts (path, dataset, kind, category, size_bytes, sha256, mtime_ns, notebook, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (path) DO UPDATE SET
+        dataset = excluded.dataset,
+        kind = excluded.kind,
+        category = excluded.category,
+        size_bytes = excluded.size_bytes,
+        sha256 = excluded.sha256,
+        mtime_ns = excluded.mtime_ns,
+        notebook = COALESCE(excluded.notebook, artifacts.notebook),
+        updated_at = excluded.updated_at
+"""
+
+# Result files recognised by their suffix, as kind
+RESULT_KINDS = {
+    '_metrics.json': 'metrics',
+    '_training_columns.json': 'training_columns',
+    '_feature_medians.json': 'feature_medians',
+    '_top_features.json': 'top_features',
+    '_preprocessor.json': 'preprocessor'
+}
+
+
+def relative_path(path):
+    """Index key of a file: its path relative to the backend, with forward slashes"""
+    return os.path.relpath(os.path.abspath(path), BASE_DIR).replace('\\', '/')
+
+
+def classify(path):
+    """
+    Work out what an artifact is from its file name
+
+    Returns:
+        (dataset or None, kind, category or None)
+    """
+    filename = os.path.basename(path)
+    prefix = filename.split('_', 1)[0]
+    dataset = prefix if prefix in SOURCES else None
+    lower = filename.lower()
+
+    if lower.endswith('_pipeline.pkl'):
+        return dataset, 'model', None
+    if lower.endswith('.png'):
+        if 'confusion' in lower:
+            category = 'confusion_matrices'
+        elif 'roc' in lower:
+            category = 'roc_curves'
+        elif 'topk' in lower or 'feature' in lower:
+            category = 'feature_importance'
+        else:
+            category = 'other'
+        return dataset, 'plot', category
+    for suffix, kind in RESULT_KINDS.items():
+        if lower.endswith(suffix.lower()):
+            return dataset, kind, None
+    return dataset, 'other', None
+
+
+def _row(path, notebook):
+    stat = os.stat(path)
+    dataset, kind, category = classify(path)
+    return (
+        relative_path(path), dataset, kind, category, stat.st_size, file_sha256(path),
+        stat.st_mtime_ns, notebook, datetime.now().isoformat()
+    )
+
+
+def _is_artifact(path):
+    # Atomic writers leave *.tmp-<pid> files behind only if they crash
+    return '.tmp' not in os.path.basename(path)
+
+
+def record(paths, notebook=None):
+    """
+    Index (or re-index) specific files; paths that no longer exist are dropped
+
+    Args:
+        paths: Absolute or backend-relative paths of files just written
+        notebook: Notebook (or tool) that produced them
+    """
+    upserts, deletes = [], []
+    for path in paths:
+        path = path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+        # Files outside the backend (e.g. training.py --output-dir /tmp/x) are not served
+        if not _is_artifact(path) or relative_path(path).startswith('../'):
+            continue
+        if os.path.isfile(path):
+            upserts.append(_row(path, notebook))
+        else:
+            deletes.append((relative_path(path),))
+
+    if not upserts and not deletes:
+        return 0
+    conn = get_connection()
+    try:
+        conn.executemany(UPSERT_ARTIFACT_SQL, upserts)
+        conn.executemany("DELETE FROM artifacts WHERE path = ?", deletes)
+        conn.commit()
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        print(f"❌ Error indexing artifacts: {e}")
+    return len(upserts) + len(deletes)
+
+
+def record_changes(before, after, notebook=None):
+    """
+    Index what a run changed, given run_cache.snapshot_artifacts() before and after it
+
+    Only new, modified or deleted files are hashed and written.
+    """
+    changed = [path for path, stat in after.items() if before.get(path) != stat]
+    removed = [path for path in before if path not in after]
+    return record(changed + removed, notebook)
+
+
+def rebuild(roots=None):
+    """
+    Bring the index in line with the artifact directories
+
+    Walks the roots once. Files whose mtime and size match their row are
+    not re-hashed; rows of files that are gone are deleted.
+
+    Returns:
+        number of rows written or deleted
+    """
+    roots = roots or Config.ARTIFACT_ROOTS
+    conn = get_connection()
+    known = {
+        row["path"]: (row["mtime_ns"], row["size_bytes"])
+        for row in conn.execute("SELECT path, mtime_ns, size_bytes FROM artifacts")
+    }
+
+    seen = set()
+    changed = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if not _is_artifact(path):
+                    continue
+                key = relative_path(path)
+                seen.add(key)
+                stat = os.stat(path)
+                if known.get(key) != (stat.st_mtime_ns, stat.st_size):
+                    changed.append(path)
+
+    under_roots = tuple(relative_path(root) + '/' for root in roots)
+    removed = [path for path in known if path not in seen and path.startswith(under_roots)]
+    return record(changed + removed)
+
+
+def list_artifacts(dataset=None, kind=None, root=None):
+    """
+    Indexed artifacts, newest first
+
+    Args:
+        dataset: Only this dataset's files (TESS, Kepler, K2)
+        kind: model, plot, metrics, training_columns, feature_medians,
+            top_features, preprocessor or other
+        root: Only files under this backend-relative directory (e.g. "static")
+    """
+    query = "SELECT * FROM artifacts WHERE 1 = 1"
+    params = []
+    if dataset is not None:
+        query += " AND dataset = ?"
+        params.append(dataset)
+    if kind is not None:
+        query += " AND kind = ?"
+        params.append(kind)
+    if root is not None:
+        query += " AND path LIKE ?"
+        params.append(root.rstrip('/') + '/%')
+    query += " ORDER BY mtime_ns DESC, path"
+
+    conn = get_connection()
+    return [
+        {
+            "path": row["path"],
+            "dataset": row["dataset"],
+            "kind": row["kind"],
+            "category": row["category"],
+            "size_bytes": row["size_bytes"],
+            "sha256": row["sha256"],
+            "modified_at": datetime.fromtimestamp(row["mtime_ns"] / 1e9).isoformat(),
+            "notebook": row["notebook"],
+            "indexed_at": row["updated_at"]
+        }
+        for row in conn.execute(query, params)
+    ]
+
+
+def main():
+    init_db()
+    count = rebuild()
+    print(json.dumps({"updated": count, "artifacts": len(list_artifacts())}))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
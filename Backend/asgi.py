@@ -0,0 +1,188 @@
+"""
+ASGI Entry Point
+Serves every app.py route from an event loop, running the Flask views on a bounded thread pool
+
+    SERVER_MODE=asgi uvicorn asgi:app --host 0.0.0.0 --port 5000
+    SERVER_MODE=asgi gunicorn --config gunicorn.conf.py     # uvicorn workers, models preloaded
+    python asgi.py
+
+SERVER_MODE=asgi also turns on the write-behind prediction logger (see
+config.py); python asgi.py does the same unless PREDICTION_WRITE_BEHIND is set.
+"""
+
+import io
+import os
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from app import app as flask_app, create_app as create_flask_app
+
+
+class AsgiApp:
+    """
+    ASGI front end for the Flask app
+
+    The event loop owns the sockets. Request bodies are read and responses
+    written asynchronously, so a slow client holds a coroutine, not a thread.
+    Only a fully received request is handed to the Flask app, which runs on
+    a pool of `threads` threads where the CPU-bound scoring happens off the
+    loop. Responses with a Content-Length are sent from the loop after the
+    view returns; streamed responses (e.g. /api/predict/stream) are sent
+    chunk by chunk from the view's thread as they are produced.
+    """
+
+    def __init__(self, wsgi_app, threads=None):
+        self.wsgi_app = wsgi_app
+        self.threads = threads or Config.ASGI_THREADS
+        self._executor = None
+
+    @property
+    def executor(self):
+        # Created on first use so no threads are started before gunicorn forks
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi-view')
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1003})
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    # A no-op when the gunicorn master already ran it before forking
+                    await loop.run_in_executor(self.executor, create_flask_app)
+                    await send({"type": "lifespan.startup.complete"})
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+            elif message["type"] == "lifespan.shutdown":
+                from prediction_logger import prediction_logger
+                await loop.run_in_executor(self.executor, prediction_logger.stop)
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        # Chunked bodies arrive without a Content-Length; the buffered size is set as one in _environ
+        body = io.BytesIO()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.write(message.get("body", b""))
+            if body.tell() > Config.MAX_CONTENT_LENGTH:
+                await self._send_simple(send, 413, b"Request body too large")
+                return
+            if not message.get("more_body"):
+                break
+        body.seek(0)
+
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self.executor, self._call_wsgi, self._environ(scope, body), send, loop
+        )
+        if response is not None:
+            status, headers, content = response
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": content})
+
+    @staticmethod
+    async def _send_simple(send, status, content):
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"text/plain"), (b"content-length", str(len(content)).encode())]})
+        await send({"type": "http.response.body", "body": content})
+
+    @staticmethod
+    def _environ(scope, body):
+        """PEP 3333 environ for an ASGI HTTP scope, with the fully buffered body as wsgi.input"""
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode('utf-8').decode('latin-1'),
+            "PATH_INFO": scope["path"].encode('utf-8').decode('latin-1'),
+            "QUERY_STRING": scope["query_string"].decode('latin-1'),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+            "REMOTE_ADDR": client[0],
+            "REMOTE_PORT": str(client[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+            "wsgi.input_terminated": True,
+            # The body is already read, chunked or not, so its length is known
+            "CONTENT_LENGTH": str(len(body.getbuffer())),
+        }
+        for name, value in scope["headers"]:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == "CONTENT_LENGTH":
+                continue
+            if name == "CONTENT_TYPE":
+                environ[name] = value
+                continue
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _call_wsgi(self, environ, send, loop):
+        """
+        Run the Flask app on a pool thread
+
+        Returns:
+            (status, headers, body) to be sent by the loop, or None if the
+            response was streamed from this thread
+        """
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(' ', 1)[0])
+            started["headers"] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+        def push(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            if any(name == b"content-length" for name, _ in started["headers"]):
+                return started["status"], started["headers"], b"".join(result)
+
+            push({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+            for chunk in result:
+                if chunk:
+                    push({"type": "http.response.body", "body": chunk, "more_body": True})
+            push({"type": "http.response.body", "body": b""})
+            return None
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+def create_app(warm_kernels=True):
+    """ASGI counterpart of app.create_app(), used by gunicorn.conf.py with SERVER_MODE=asgi"""
+    return AsgiApp(create_flask_app(warm_kernels))
+
+
+app = AsgiApp(flask_app)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    if 'PREDICTION_WRITE_BEHIND' not in os.environ:
+        Config.PREDICTION_WRITE_BEHIND = True
+    uvicorn.run('asgi:app', host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,203 @@
+"""
+Batch Request Parsing
+Turns JSON / CSV / NDJSON request bodies into DataFrames of rows to score
+"""
+
+import io
+import csv
+import json
+import codecs
+
+import numpy as np
+import pandas as pd
+
+CSV_TYPES = ('text/csv', 'application/csv')
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+# Bytes pulled from the request stream per read when streaming
+STREAM_READ_SIZE = 64 * 1024
+
+
+def read_batch_request(req):
+    """
+    Parse the rows and scoring options of a batch prediction request
+
+    Accepted bodies:
+        - JSON array of feature dicts
+        - JSON object {"rows": [...], "model": ..., "dataset": ..., "algorithm": ...}
+        - CSV with a header row (Content-Type: text/csv)
+        - NDJSON, one feature dict per line (Content-Type: application/x-ndjson)
+
+    For CSV and NDJSON bodies the options come from the query string.
+
+    Returns:
+        options dict, rows DataFrame
+
+    Raises:
+        ValueError: if the body is empty or cannot be parsed
+    """
+    content_type = (req.mimetype or '').lower()
+    options = req.args.to_dict()
+    body = req.get_data(cache=False)
+
+    if not body or not body.strip():
+        raise ValueError("Empty request body")
+
+    if content_type in CSV_TYPES:
+        frame = pd.read_csv(io.BytesIO(body))
+    elif content_type in NDJSON_TYPES:
+        frame = pd.read_json(io.BytesIO(body), lines=True)
+    else:
+        payload = json.loads(body)
+        if isinstance(payload, dict):
+            rows = payload.get('rows')
+            options.update({k: v for k, v in payload.items() if k != 'rows'})
+        else:
+            rows = payload
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of feature objects or {\"rows\": [...]}")
+        frame = pd.DataFrame.from_records(rows)
+
+    if frame.empty:
+        raise ValueError("No rows to score")
+
+    frame.columns = [str(c).strip() for c in frame.columns]
+    return options, frame
+
+
+def iter_lines(stream, read_size=STREAM_READ_SIZE):
+    """
+    Yield non-empty lines from a binary stream, reading fixed-size blocks
+
+    Only one block plus one partial line is held in memory at a time.
+    """
+    remainder = b''
+    while True:
+        block = stream.read(read_size)
+        if not block:
+            break
+        lines = (remainder + block).split(b'\n')
+        remainder = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if remainder.strip():
+        yield remainder
+
+
+def iter_text_lines(stream, read_size=STREAM_READ_SIZE):
+    """
+    Yield decoded UTF-8 lines from a binary stream, keeping their line endings
+
+    csv.reader needs the endings to carry a quoted field over to the next
+    line. A byte-order mark at the start is dropped, as pd.read_csv does.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    remainder = ''
+    try:
+        while True:
+            block = stream.read(read_size)
+            if not block:
+                break
+            lines = (remainder + decoder.decode(block)).split('\n')
+            # The last piece continues in the next block
+            remainder = lines.pop()
+            for line in lines:
+                yield line + '\n'
+        remainder += decoder.decode(b'', final=True)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"CSV body is not valid UTF-8: {e}")
+    if remainder:
+        yield remainder
+
+
+def iter_row_chunks(stream, content_type, rows_per_chunk):
+    """
+    Incrementally parse a CSV or NDJSON body into DataFrames
+
+    Args:
+        stream: Binary request stream
+        content_type: Mimetype of the body (CSV or NDJSON)
+        rows_per_chunk: Maximum rows per yielded DataFrame
+
+    Yields:
+        DataFrame with at most rows_per_chunk rows
+
+    Raises:
+        ValueError: for unsupported content types or unparseable lines
+    """
+    content_type = (content_type or '').lower()
+    is_csv = content_type in CSV_TYPES
+    if not is_csv and content_type not in NDJSON_TYPES:
+        raise ValueError("Streaming scoring accepts CSV (text/csv) or NDJSON (application/x-ndjson) bodies")
+
+    if is_csv:
+        yield from _csv_chunks(stream, rows_per_chunk)
+        return
+
+    buffer = []
+    for line in iter_lines(stream):
+        buffer.append(line)
+        if len(buffer) >= rows_per_chunk:
+            yield _parse_lines(buffer)
+            buffer = []
+    if buffer:
+        yield _parse_lines(buffer)
+
+
+def _csv_chunks(stream, rows_per_chunk):
+    """
+    Parse a CSV body with csv.reader and yield its records in DataFrames
+
+    Records, not lines, are counted: a quoted field may contain newlines.
+    """
+    # Blank lines parse as empty records, which pd.read_csv skips too
+    records = (record for record in csv.reader(iter_text_lines(stream)) if record)
+    try:
+        header = next(records, None)
+        if header is None:
+            raise ValueError("Empty request body")
+        buffer = []
+        for record in records:
+            buffer.append(record)
+            if len(buffer) >= rows_per_chunk:
+                yield _csv_frame(header, buffer)
+                buffer = []
+        if buffer:
+            yield _csv_frame(header, buffer)
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV: {e}")
+
+
+def _csv_frame(header, records):
+    """
+    DataFrame of parsed CSV records with pd.read_csv's typing
+
+    Empty fields are missing values and a column whose values all parse as
+    numbers becomes numeric. Short records are padded with missing values.
+    """
+    width = len(header)
+    for record in records:
+        if len(record) > width:
+            raise ValueError(f"Invalid CSV: expected {width} fields, saw {len(record)}")
+    frame = pd.DataFrame(
+        [record + [''] * (width - len(record)) for record in records],
+        columns=[str(c).strip() for c in header], dtype=object
+    )
+    frame = frame.replace('', np.nan)
+    for column in frame.columns:
+        try:
+            frame[column] = pd.to_numeric(frame[column])
+        except (TypeError, ValueError):
+            pass
+    return frame
+
+
+def _parse_lines(lines):
+    """Parse a list of raw NDJSON lines into a DataFrame"""
+    try:
+        frame = pd.DataFrame.from_records([json.loads(line) for line in lines])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid NDJSON line: {e}")
+    frame.columns = [str(c).strip() for c in frame.columns]
+    return frame
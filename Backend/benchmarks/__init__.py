@@ -0,0 +1,4 @@
+"""
+ExoML Benchmarks
+Run from the Backend directory, e.g. `python -m benchmarks.sqlite_writes`
+"""
@@ -0,0 +1,196 @@
+"""
+ASGI vs Sync Serving
+Load-tests /api/predict on sync gunicorn workers and on uvicorn workers (asgi.py), with and without slow clients
+
+    python -m benchmarks.asgi_serving
+    python -m benchmarks.asgi_serving --connections 64 --duration 15 --slow-clients 4
+
+Each connection sends keep-alive requests back to back. Slow clients send
+their headers and then trickle the body one byte at a time, the way a
+client on a bad network does. Predictions are logged to a scratch
+database (DATABASE_PATH in a temporary directory), not to db.sqlite3.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from benchmarks.prefork import BASE_DIR, free_port, request, worker_pids
+
+
+async def read_response(reader):
+    """(status code, whether the server keeps the connection open) of one response, body discarded"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode('latin-1').lower().split("\r\n")
+    status = int(lines[0].split()[1])
+    length = next((int(line.split(':', 1)[1]) for line in lines[1:] if line.startswith('content-length:')), 0)
+    await reader.readexactly(length)
+    return status, 'connection: close' not in lines
+
+
+def predict_request(port, payload):
+    body = json.dumps(payload).encode('utf-8')
+    return (
+        f"POST /api/predict HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode('latin-1') + body
+
+
+async def client(port, payload, deadline, latencies, errors):
+    """One connection sending requests back to back until the deadline, reconnecting if the server closes it"""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            # Fresh feature values, so the prediction cache cannot answer
+            data = payload()
+            started = time.perf_counter()
+            writer.write(predict_request(port, data))
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(
+                read_response(reader), timeout=max(0.1, deadline - time.perf_counter())
+            )
+            if status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors.append(status)
+            if not keep_alive:
+                # Sync gunicorn workers close the connection after every response
+                writer.close()
+                writer = None
+        except asyncio.TimeoutError:
+            break
+        except (OSError, asyncio.IncompleteReadError) as e:
+            errors.append(type(e).__name__)
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def slow_client(port, payload, deadline):
+    """Sends one request's body a byte every half second until the deadline"""
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        message = predict_request(port, payload())
+        split = message.index(b"\r\n\r\n") + 4
+        writer.write(message[:split])
+        for byte in message[split:]:
+            if time.perf_counter() >= deadline:
+                break
+            writer.write(bytes([byte]))
+            await writer.drain()
+            await asyncio.sleep(0.5)
+        writer.close()
+    except OSError:
+        pass
+
+
+async def load(port, payload, connections, slow_clients, duration):
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], []
+    slow = [asyncio.create_task(slow_client(port, payload, deadline)) for _ in range(slow_clients)]
+    # Let the slow clients take their connections first
+    await asyncio.sleep(0.2 if slow_clients else 0)
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, payload, deadline, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    for task in slow:
+        task.cancel()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 1) if len(latencies) >= 100 else None,
+        "errors": len(errors)
+    }
+
+
+def start_server(mode, workers, startup_timeout, database_path=None):
+    """Start gunicorn in `mode`; database_path overrides the DATABASE_PATH it inherits"""
+    port = free_port()
+    env = {**os.environ, 'PORT': str(port), 'WEB_CONCURRENCY': str(workers), 'SERVER_MODE': mode}
+    if database_path:
+        env['DATABASE_PATH'] = database_path
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    started = time.perf_counter()
+    while time.perf_counter() - started < startup_timeout:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+        try:
+            status, ready, _ = request(f'http://127.0.0.1:{port}/api/ready')
+            if status == 200 and len(worker_pids(server.pid)) == workers:
+                return server, port, ready
+        except OSError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"not ready after {startup_timeout}s")
+
+
+def make_payload(ready, dataset):
+    """Random single-row request for a preloaded pipeline of the dataset, or the heuristic model"""
+    algorithm = next((
+        key.split('/')[1] for key, ms in sorted(ready["warm_up_ms"].items())
+        if key.startswith(f'{dataset}/') and not isinstance(ms, str)
+    ), None)
+
+    def payload():
+        return {
+            "dataset": dataset,
+            "model": dataset,
+            "algorithm": algorithm,
+            "features": {"orbital_period_days": random.uniform(0.5, 50), "transit_depth_ppm": random.uniform(10, 5000)}
+        }
+    return payload, algorithm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync gunicorn vs uvicorn (ASGI) load test")
+    parser.add_argument('--workers', type=int, default=2, help="server worker processes")
+    parser.add_argument('--connections', type=int, default=32, help="concurrent keep-alive connections")
+    parser.add_argument('--slow-clients', type=int, default=4, help="connections trickling their request body")
+    parser.add_argument('--duration', type=float, default=10, help="seconds per run")
+    parser.add_argument('--dataset', default='TESS', help="dataset whose pipeline is scored")
+    parser.add_argument('--startup-timeout', type=int, default=120, help="seconds to wait for /api/ready")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, 'asgi_serving.sqlite3')
+        for mode in ('wsgi', 'asgi'):
+            try:
+                server, port, ready = start_server(mode, args.workers, args.startup_timeout, database_path)
+            except Exception as e:
+                results.append({"mode": mode, "error": str(e)})
+                continue
+            try:
+                payload, algorithm = make_payload(ready, args.dataset)
+                result = {"mode": mode, "workers": args.workers, "algorithm": algorithm or "heuristic"}
+                result["fast_clients"] = asyncio.run(load(port, payload, args.connections, 0, args.duration))
+                if args.slow_clients:
+                    result["with_slow_clients"] = asyncio.run(
+                        load(port, payload, args.connections, args.slow_clients, args.duration)
+                    )
+                results.append(result)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Compact Model Loading
+Compares unpickling a trained pipeline with opening its compact export, and their scoring latency
+
+    python -m benchmarks.compact_models
+    python -m benchmarks.compact_models --models-dir static/models --rows 5000
+"""
+
+import os
+import glob
+import json
+import time
+import argparse
+import tempfile
+
+import joblib
+import numpy as np
+
+from config import Config
+from compact_model import export_pipeline, load, sample_frame
+
+
+def rss_mb():
+    """Resident set size of this process (Linux), or None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def benchmark(path, out_dir, rows, repeat):
+    pipeline = joblib.load(path)
+    export_pipeline(pipeline, out_dir)
+
+    before = rss_mb()
+    _, compact_load = timed(lambda: load(out_dir), repeat)
+    compact = load(out_dir)
+    compact_rss = rss_mb()
+
+    # Pickle last: its allocations would hide the compact model's
+    _, pickle_load = timed(lambda: joblib.load(path), repeat)
+    pickle_rss = rss_mb()
+
+    batch = sample_frame(compact, rows=rows)
+    row = batch.iloc[:1]
+    _, pickle_single = timed(lambda: pipeline.predict_proba(row), 50)
+    _, compact_single = timed(lambda: compact.predict_proba(row), 50)
+    expected, pickle_batch = timed(lambda: pipeline.predict_proba(batch))
+    actual, compact_batch = timed(lambda: compact.predict_proba(batch))
+
+    return {
+        "pipeline": os.path.basename(path),
+        "size_kb": {"pickle": os.path.getsize(path) // 1024, "compact": directory_size(out_dir) // 1024},
+        "load_ms": {"pickle": round(pickle_load * 1000, 2), "compact": round(compact_load * 1000, 3)},
+        "rss_growth_mb": {
+            "compact": round(compact_rss - before, 1) if before else None,
+            "pickle": round(pickle_rss - compact_rss, 1) if before else None
+        },
+        "single_row_ms": {"pickle": round(pickle_single * 1000, 3), "compact": round(compact_single * 1000, 3)},
+        f"batch_{rows}_rows_ms": {"pickle": round(pickle_batch * 1000, 1), "compact": round(compact_batch * 1000, 1)},
+        "max_abs_difference": float(np.max(np.abs(actual - expected)))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pickle vs compact model benchmark")
+    parser.add_argument('--models-dir', default=os.path.join(Config.TRAINING_OUTPUT_DIR, 'models'),
+                        help="directory with *_pipeline.pkl files")
+    parser.add_argument('--rows', type=int, default=5000, help="rows in the batch scoring test")
+    parser.add_argument('--repeat', type=int, default=5, help="loads averaged per format")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.models_dir, '*_pipeline.pkl')))
+    if not paths:
+        print(f"No *_pipeline.pkl files in {args.models_dir} - run `python training.py TESS` first")
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for path in paths:
+            try:
+                results.append(benchmark(path, os.path.join(directory, os.path.basename(path)), args.rows, args.repeat))
+            except Exception as e:
+                results.append({"pipeline": os.path.basename(path), "error": str(e)})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
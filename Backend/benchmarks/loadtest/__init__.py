@@ -0,0 +1,14 @@
+"""
+HTTP Load Test
+Latency percentiles, histograms and throughput of the API under a configurable request mix
+
+    python -m benchmarks.loadtest                                   # in-process test client
+    python -m benchmarks.loadtest --target gunicorn --workers 2 --concurrency 32
+    python -m benchmarks.loadtest --mix predict=3,predictions=1 --duration 20
+    python -m benchmarks.loadtest --output report.json
+    python -m benchmarks.loadtest --baseline report.json            # exit 1 on a regression
+
+    scenarios.py   request generators per endpoint and the named mixes
+    drivers.py     in-process (Flask test client) and real gunicorn drivers
+    report.py      percentiles, histograms and baseline comparison
+"""
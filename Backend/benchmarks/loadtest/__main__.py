@@ -0,0 +1,104 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import utils
+from benchmarks.prefork import BASE_DIR
+from benchmarks.loadtest import drivers, report
+from benchmarks.loadtest.scenarios import Scenario, parse_mix
+
+TARGETS = ('inprocess', 'gunicorn')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description="API load test")
+    parser.add_argument('--target', choices=TARGETS + ('both',), default='inprocess',
+                        help="Flask test client, a local gunicorn, or both")
+    parser.add_argument('--mix', default='mixed', help="mix name (predict, pipeline, read, mixed) or endpoint=weight,...")
+    parser.add_argument('--concurrency', type=int, default=8, help="client threads (in-process) or connections (gunicorn)")
+    parser.add_argument('--duration', type=float, default=10, help="seconds per target")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    parser.add_argument('--server-mode', choices=('wsgi', 'asgi'), default='wsgi', help="gunicorn SERVER_MODE")
+    parser.add_argument('--dataset', default='TESS', help="dataset of the predict_pipeline endpoint")
+    parser.add_argument('--algorithm', default='RandomForest', help="algorithm of the predict_pipeline endpoint")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the request generators")
+    parser.add_argument('--output', help="write the report to this file (e.g. to use as a baseline)")
+    parser.add_argument('--baseline', help="compare with a stored report and exit 1 on a regression")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative change before a regression")
+    args = parser.parse_args()
+
+    weights = parse_mix(args.mix)
+    options = {"dataset": args.dataset, "algorithm": args.algorithm}
+    targets = TARGETS if args.target == 'both' else (args.target,)
+
+    result = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "mix": weights,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "workers": args.workers,
+            "server_mode": args.server_mode,
+            "pipeline": f"{args.dataset}/{args.algorithm}"
+        },
+        "runs": {}
+    }
+
+    # The app logs every prediction to stdout; keep stdout for the report
+    with tempfile.TemporaryDirectory() as directory, redirect_stdout(sys.stderr):
+        # Predictions written by the load go to a scratch database, not db.sqlite3;
+        # the environment variable reaches the gunicorn workers
+        os.environ['DATABASE_PATH'] = utils.DB_PATH = os.path.join(directory, 'loadtest.sqlite3')
+        utils.init_db()
+
+        for target in targets:
+            scenario = Scenario(weights, options, seed=args.seed)
+            print(f"▶️ {target}: {args.concurrency} clients for {args.duration:.0f}s", file=sys.stderr)
+            if target == 'inprocess':
+                samples, elapsed = drivers.run_in_process(scenario, args.concurrency, args.duration)
+            else:
+                samples, elapsed, _ = drivers.run_gunicorn(
+                    scenario, args.concurrency, args.duration, args.server_mode, args.workers
+                )
+            result["runs"][target] = report.summarize(samples, elapsed)
+        utils.close_connection()
+
+    if args.baseline:
+        result["comparison"] = report.compare(result, report.load(args.baseline), args.tolerance)
+    if args.output:
+        _write_json(args.output, result)
+
+    print(json.dumps(result, indent=2))
+    if result.get("comparison", {}).get("regressions"):
+        print("❌ Regressions against the baseline:\n  " + "\n  ".join(result["comparison"]["regressions"]),
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
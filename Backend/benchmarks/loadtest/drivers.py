@@ -0,0 +1,116 @@
+"""
+Load Test Drivers
+Send a scenario's requests to the app in-process or to a local gunicorn, and time each one
+
+Every driver returns (samples, elapsed seconds), where a sample is
+(endpoint name, HTTP status or error name, latency in ms).
+"""
+
+import json
+import time
+import asyncio
+import threading
+
+from benchmarks.asgi_serving import read_response, start_server
+
+
+def run_in_process(scenario, concurrency, duration):
+    """
+    `concurrency` threads, each with its own Flask test client, sending requests until the deadline
+
+    Measures the app's own cost - routing, scoring, SQLite - without sockets
+    or a server. Threads share one GIL, so this shows per-request latency
+    more than parallel throughput.
+    """
+    from app import app, create_app
+    create_app(warm_kernels=False)
+
+    samples = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        client = app.test_client()
+        requests = scenario.spawn(index)
+        local = []
+        while time.perf_counter() < deadline:
+            name, method, path, body = requests.next()
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            local.append((name, response.status_code, (time.perf_counter() - started) * 1000))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def encode_request(port, method, path, body):
+    payload = json.dumps(body).encode('utf-8') if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Length: {len(payload)}\r\n"
+    if body is not None:
+        head += "Content-Type: application/json\r\n"
+    return (head + "\r\n").encode('latin-1') + payload
+
+
+async def _connection(port, requests, deadline, samples):
+    """One client connection sending requests back to back, reconnecting when the server closes it"""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        name, method, path, body = requests.next()
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(encode_request(port, method, path, body))
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(
+                read_response(reader), timeout=max(0.1, deadline - time.perf_counter())
+            )
+        except asyncio.TimeoutError:
+            break
+        except (OSError, asyncio.IncompleteReadError) as e:
+            samples.append((name, type(e).__name__, (time.perf_counter() - started) * 1000))
+            writer = None
+            continue
+        samples.append((name, status, (time.perf_counter() - started) * 1000))
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+def run_http(port, scenario, concurrency, duration):
+    """`concurrency` connections to a server on 127.0.0.1:port, driven from one event loop"""
+    async def drive():
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            _connection(port, scenario.spawn(i), deadline, samples) for i in range(concurrency)
+        ))
+
+    samples = []
+    started = time.perf_counter()
+    asyncio.run(drive())
+    return samples, time.perf_counter() - started
+
+
+def run_gunicorn(scenario, concurrency, duration, mode='wsgi', workers=2, startup_timeout=120):
+    """
+    Start gunicorn.conf.py on a free port, load it over real sockets and stop it
+
+    Returns:
+        samples, elapsed seconds, the server's /api/ready payload
+    """
+    server, port, ready = start_server(mode, workers, startup_timeout)
+    try:
+        samples, elapsed = run_http(port, scenario, concurrency, duration)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return samples, elapsed, ready
@@ -0,0 +1,103 @@
+"""
+Load Test Report
+Per-endpoint throughput, latency percentiles and histograms, and comparison against a stored baseline
+"""
+
+import json
+import math
+import bisect
+from collections import defaultdict
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def percentile(latencies, q):
+    """Nearest-rank percentile of sorted latencies"""
+    if not latencies:
+        return None
+    rank = max(1, math.ceil(q / 100.0 * len(latencies)))
+    return latencies[rank - 1]
+
+
+def histogram(latencies):
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for latency in latencies:
+        counts[bisect.bisect_left(BUCKETS_MS, latency)] += 1
+    return {"le_ms": BUCKETS_MS + ["inf"], "counts": counts}
+
+
+def _summary(samples, elapsed):
+    latencies = sorted(ms for _, status, ms in samples if status == 200)
+    errors = defaultdict(int)
+    for _, status, _ in samples:
+        if status != 200:
+            errors[str(status)] += 1
+    return {
+        "requests": len(samples),
+        "errors": dict(errors),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p90_ms": _round(percentile(latencies, 90)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "max_ms": _round(latencies[-1] if latencies else None),
+        "histogram": histogram(latencies)
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def summarize(samples, elapsed):
+    """Summary of all requests and of each endpoint; latencies only count successful (200) responses"""
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample[0]].append(sample)
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "total": _summary(samples, elapsed),
+        "endpoints": {name: _summary(rows, elapsed) for name, rows in sorted(by_endpoint.items())}
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Compare the runs of a report with a baseline report
+
+    A regression is a p50/p99 more than `tolerance` higher, an RPS more
+    than `tolerance` lower, or errors where the baseline had none, for an
+    endpoint present in both reports.
+
+    Returns:
+        {"regressions": [...], "runs": {target: {endpoint: {metric: {"baseline", "current", "change"}}}}}
+    """
+    regressions = []
+    runs = {}
+    for target, run in report["runs"].items():
+        base_run = baseline.get("runs", {}).get(target)
+        if not base_run:
+            continue
+        current = {"total": run["total"], **run["endpoints"]}
+        base = {"total": base_run["total"], **base_run["endpoints"]}
+        runs[target] = {}
+        for endpoint in current.keys() & base.keys():
+            metrics = {}
+            for metric, worse_if_higher in (("p50_ms", True), ("p99_ms", True), ("rps", False)):
+                before, after = base[endpoint].get(metric), current[endpoint].get(metric)
+                if not before or after is None:
+                    continue
+                change = (after - before) / before
+                metrics[metric] = {"baseline": before, "current": after, "change": round(change, 3)}
+                if (change > tolerance) if worse_if_higher else (change < -tolerance):
+                    regressions.append(f"{target} {endpoint} {metric}: {before} -> {after} ({change:+.0%})")
+            if current[endpoint]["errors"] and not base[endpoint]["errors"]:
+                regressions.append(f"{target} {endpoint} errors: {current[endpoint]['errors']}")
+            runs[target][endpoint] = metrics
+    return {"tolerance": tolerance, "regressions": regressions, "runs": runs}
+
+
+def load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
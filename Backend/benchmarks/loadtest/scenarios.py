@@ -0,0 +1,90 @@
+"""
+Load Test Scenarios
+Request generators for each benchmarked endpoint and the weighted mixes built from them
+"""
+
+import random
+
+from models import MODEL_FEATURES
+
+HEURISTIC_MODELS = ['Kepler', 'K2', 'TESS', 'Light_Curve']
+
+
+def _features(rng, model):
+    # Uniform over each feature's range, so the prediction cache rarely answers
+    return {f["name"]: rng.uniform(f["min"], f["max"]) for f in MODEL_FEATURES[model]["features"]}
+
+
+def predict(rng, options):
+    model = rng.choice(HEURISTIC_MODELS)
+    return 'POST', '/api/predict', {"model": model, "dataset": model, "features": _features(rng, model)}
+
+
+def predict_pipeline(rng, options):
+    dataset = options["dataset"]
+    features = _features(rng, dataset if dataset in MODEL_FEATURES else 'Kepler')
+    return 'POST', '/api/predict', {
+        "model": dataset, "dataset": dataset, "algorithm": options["algorithm"], "features": features
+    }
+
+
+def predictions(rng, options):
+    return 'GET', '/api/predictions?limit=50&include_raw=false', None
+
+
+def model_features(rng, options):
+    return 'GET', f'/api/model-features/{rng.choice(HEURISTIC_MODELS)}', None
+
+
+ENDPOINTS = {
+    "predict": predict,
+    "predict_pipeline": predict_pipeline,
+    "predictions": predictions,
+    "model_features": model_features
+}
+
+# Relative weights of the endpoints in each named mix
+MIXES = {
+    "predict": {"predict": 1},
+    "pipeline": {"predict_pipeline": 1},
+    "read": {"predictions": 1, "model_features": 1},
+    "mixed": {"predict": 6, "predict_pipeline": 2, "predictions": 1, "model_features": 1}
+}
+
+
+def parse_mix(text):
+    """
+    A mix name from MIXES, or "endpoint=weight,..." (e.g. "predict=3,predictions=1")
+
+    Raises:
+        ValueError: for an unknown mix or endpoint
+    """
+    if text in MIXES:
+        return dict(MIXES[text])
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}, expected one of {sorted(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class Scenario:
+    """Draws requests from a weighted mix; each driver thread or connection gets its own seeded copy"""
+
+    def __init__(self, weights, options, seed=0):
+        self.names = list(weights)
+        self.weights = [weights[name] for name in self.names]
+        self.options = options
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def spawn(self, index):
+        return Scenario(dict(zip(self.names, self.weights)), self.options, seed=self.seed * 100003 + index + 1)
+
+    def next(self):
+        """(endpoint name, method, path, JSON body or None)"""
+        name = self.rng.choices(self.names, self.weights)[0]
+        return (name, *ENDPOINTS[name](self.rng, self.options))
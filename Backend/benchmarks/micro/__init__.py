@@ -0,0 +1,14 @@
+"""
+Micro-benchmarks
+Time and allocations (tracemalloc) of the core Python hot paths at growing input sizes
+
+    python -m benchmarks.micro                                      # every suite, default sizes
+    python -m benchmarks.micro --suite predict,preprocessing
+    python -m benchmarks.micro --suite database --db-sizes 1000,1000000
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --baseline micro.json                # exit 1 on a regression
+
+    harness.py     calibrated timing loops, tracemalloc peaks and baseline comparison
+    synthetic.py   TESS-like catalogs, prediction rows and artifact directories
+    suites.py      predict, database, artifacts and preprocessing cases
+"""
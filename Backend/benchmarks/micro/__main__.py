@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import utils
+from benchmarks.prefork import BASE_DIR
+from benchmarks.micro.harness import compare
+from benchmarks.micro.suites import SUITES
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.micro', description="Hot-path micro-benchmarks")
+    parser.add_argument('--suite', default=','.join(SUITES), help=f"comma-separated suites: {', '.join(SUITES)}")
+    parser.add_argument('--batch-sizes', default='1,100,10000,100000', help="rows per batch prediction")
+    parser.add_argument('--db-sizes', default='1000,10000,100000,1000000', help="rows in the predictions table")
+    parser.add_argument('--artifact-counts', default='1000,5000', help="files in the artifact directories")
+    parser.add_argument('--catalog-sizes', default='10000,100000', help="rows in the synthetic TESS catalogs")
+    parser.add_argument('--dataset', default='TESS', help="dataset of the pipeline cases")
+    parser.add_argument('--algorithm', default='RandomForest', help="algorithm of the pipeline cases")
+    parser.add_argument('--repeat', type=int, default=5, help="timed samples per case")
+    parser.add_argument('--min-time', type=float, default=0.05, help="minimum seconds per timed sample")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic data")
+    parser.add_argument('--output', help="write the report to this file (e.g. to use as a baseline)")
+    parser.add_argument('--baseline', help="compare with a stored report and exit 1 on a regression")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative increase before a regression")
+    args = parser.parse_args()
+
+    suites = [name.strip() for name in args.suite.split(',') if name.strip()]
+    unknown = [name for name in suites if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite(s) {', '.join(unknown)}; expected {', '.join(SUITES)}")
+
+    result = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "min_time": args.min_time,
+            "seed": args.seed
+        },
+        "suites": {}
+    }
+
+    # save_prediction and init_db print; keep stdout for the report
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        db_path = utils.DB_PATH
+        try:
+            for name in suites:
+                print(f"▶️ {name}", file=sys.stderr)
+                result["suites"][name] = SUITES[name](args, directory)
+        finally:
+            utils.close_connection()
+            utils.DB_PATH = db_path
+
+    if args.baseline:
+        result["comparison"] = compare(result, load(args.baseline), args.tolerance)
+    if args.output:
+        _write_json(args.output, result)
+
+    print(json.dumps(result, indent=2))
+    if result.get("comparison", {}).get("regressions"):
+        print("❌ Regressions against the baseline:\n  " + "\n  ".join(result["comparison"]["regressions"]),
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Micro-benchmark Harness
+Time a callable over calibrated loops and trace its allocations with tracemalloc
+"""
+
+import gc
+import time
+import statistics
+import tracemalloc
+
+# Peaks below this many KB are too small to compare between runs
+MIN_PEAK_KB = 16
+
+
+def _timed(fn, number, setup):
+    if setup is None:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - started
+    elapsed = 0.0
+    for _ in range(number):
+        setup()
+        started = time.perf_counter()
+        fn()
+        elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def calibrate(fn, min_time, setup=None):
+    """Calls per sample so one sample takes at least min_time seconds (timeit's autorange)"""
+    number = 1
+    while True:
+        for multiple in (1, 2, 5):
+            if _timed(fn, number * multiple, setup) >= min_time:
+                return number * multiple
+        number *= 10
+
+
+def allocations(fn, setup=None):
+    """
+    Memory allocated by one call, as traced by tracemalloc
+
+    Only Python and NumPy allocations are traced; SQLite's own page cache is not.
+
+    Returns:
+        (peak KB, KB still allocated when the call returns, blocks still allocated)
+    """
+    if setup is not None:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = len(tracemalloc.take_snapshot().traces)
+    finally:
+        tracemalloc.stop()
+    return peak / 1024, current / 1024, blocks
+
+
+def measure(fn, repeat=5, min_time=0.05, number=None, setup=None):
+    """
+    Time per call and allocations of fn()
+
+    Each of `repeat` samples runs `number` calls (calibrated from min_time
+    when None); setup() runs untimed before every call when given. Timing
+    runs without tracemalloc, whose hooks would slow every allocation; one
+    more call is then traced.
+    """
+    # Warm-up call: first-call imports and caches are not what is measured
+    if setup is not None:
+        setup()
+    fn()
+    number = number or calibrate(fn, min_time, setup)
+    per_call = sorted(_timed(fn, number, setup) / number * 1e6 for _ in range(repeat))
+    peak_kb, retained_kb, blocks = allocations(fn, setup)
+    return {
+        "calls": number * repeat,
+        "median_us": round(statistics.median(per_call), 2),
+        "min_us": round(per_call[0], 2),
+        "max_us": round(per_call[-1], 2),
+        "peak_kb": round(peak_kb, 1),
+        "retained_kb": round(retained_kb, 1),
+        "retained_blocks": blocks
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Compare the cases of a report with a baseline report
+
+    A regression is a median time or an allocation peak more than
+    `tolerance` above the baseline, for a case present in both reports.
+    Peaks under MIN_PEAK_KB in both reports are not compared.
+
+    Returns:
+        {"regressions": [...], "cases": {suite: {case: {metric: {"baseline", "current", "change"}}}}}
+    """
+    regressions = []
+    cases = {}
+    for suite, results in report["suites"].items():
+        base_results = baseline.get("suites", {}).get(suite, {})
+        for case in results.keys() & base_results.keys():
+            current, base = results[case], base_results[case]
+            metrics = {}
+            for metric in ("median_us", "peak_kb"):
+                before, after = base.get(metric), current.get(metric)
+                if not before or after is None:
+                    continue
+                if metric == "peak_kb" and max(before, after) < MIN_PEAK_KB:
+                    continue
+                change = (after - before) / before
+                metrics[metric] = {"baseline": before, "current": after, "change": round(change, 3)}
+                if change > tolerance:
+                    regressions.append(f"{suite} {case} {metric}: {before} -> {after} ({change:+.0%})")
+            cases.setdefault(suite, {})[case] = metrics
+    return {"tolerance": tolerance, "regressions": regressions, "cases": cases}
@@ -0,0 +1,150 @@
+"""
+Micro-benchmark Suites
+The core hot paths, each measured at several input sizes
+
+Every suite takes the parsed CLI arguments and a scratch directory and
+returns {case name: harness.measure() result}.
+"""
+
+import os
+import sys
+
+import utils
+import artifact_index
+import notebook_parser
+import models
+from benchmarks.micro import synthetic
+from benchmarks.micro.harness import measure
+from preprocessing import Preprocessor, make_target, select_columns
+
+
+def _progress(message):
+    print(f"  {message}", file=sys.stderr)
+
+
+def _sizes(text):
+    return [int(size) for size in text.split(',') if size.strip()]
+
+
+def use_database(path):
+    """Point utils (and its pooled connection) at a fresh database file"""
+    utils.close_connection()
+    utils.DB_PATH = path
+    utils.init_db()
+
+
+def predict(args, directory):
+    """predict_with_model on one row; the batch scorers on growing batches"""
+    features = synthetic.model_inputs('TESS', 1, seed=args.seed).iloc[0].to_dict()
+    results = {
+        "predict_with_model": measure(lambda: models.predict_with_model('TESS', features), args.repeat, args.min_time)
+    }
+    for size in _sizes(args.batch_sizes):
+        _progress(f"predict batch {size}")
+        rows = synthetic.model_inputs('TESS', size, seed=args.seed)
+        results[f"predict_batch_with_model/{size}"] = measure(
+            lambda: models.predict_batch_with_model('TESS', rows), args.repeat, args.min_time
+        )
+
+    # Trained pipelines only when the registry can serve the requested one
+    try:
+        models.registry.get(args.dataset, args.algorithm)
+    except FileNotFoundError as e:
+        _progress(f"skipping pipeline cases: {e}")
+        return results
+    catalog = select_columns(synthetic.tess_catalog(max(_sizes(args.batch_sizes) + [1]), seed=args.seed), 'TESS')
+    row = catalog.drop(columns=['disposition']).iloc[0].dropna().to_dict()
+    results["predict_with_pipeline"] = measure(
+        lambda: models.predict_with_pipeline(args.dataset, args.algorithm, row), args.repeat, args.min_time
+    )
+    for size in _sizes(args.batch_sizes):
+        rows = catalog.iloc[:size]
+        results[f"predict_batch_with_pipeline/{size}"] = measure(
+            lambda: models.predict_batch_with_pipeline(args.dataset, args.algorithm, rows), args.repeat, args.min_time
+        )
+    return results
+
+
+def database(args, directory):
+    """save_prediction and the history reads against predictions tables of growing size"""
+    results = {}
+    features = synthetic.model_inputs('TESS', 1, seed=args.seed).iloc[0].to_dict()
+    prediction = synthetic.prediction('TESS', 0.7, features)
+
+    for size in _sizes(args.db_sizes):
+        _progress(f"database with {size} predictions")
+        use_database(os.path.join(directory, f'predictions-{size}.sqlite3'))
+        for start in range(0, size, 50000):
+            utils.save_predictions(synthetic.prediction_rows(min(50000, size - start), seed=args.seed + start))
+
+        results[f"save_prediction/{size}"] = measure(lambda: utils.save_prediction(*prediction), args.repeat, args.min_time)
+        results[f"get_predictions/{size}"] = measure(lambda: utils.get_predictions(50), args.repeat, args.min_time)
+        results[f"get_predictions_page_filtered/{size}"] = measure(
+            lambda: utils.get_predictions_page(50, model='TESS', min_probability=0.5, include_raw=False),
+            args.repeat, args.min_time
+        )
+        utils.close_connection()
+    return results
+
+
+def artifacts(args, directory):
+    """Indexing and parse_success over artifact directories of growing size"""
+    results = {}
+    dataset = 'TESS'
+    saved = artifact_index.BASE_DIR, notebook_parser.BASE_DIR
+    try:
+        for count in _sizes(args.artifact_counts):
+            _progress(f"{count} artifacts")
+            # A backend directory of its own, so index keys read "static/..." as in production
+            root = os.path.join(directory, f'artifacts-{count}')
+            synthetic.artifact_tree(root, count, dataset)
+            artifact_index.BASE_DIR = notebook_parser.BASE_DIR = root
+            use_database(os.path.join(root, 'artifacts.sqlite3'))
+            roots = [os.path.join(root, 'static')]
+
+            def clear_index():
+                conn = utils.get_connection()
+                conn.execute("DELETE FROM artifacts")
+                conn.commit()
+
+            results[f"artifact_index_rebuild_full/{count}"] = measure(
+                lambda: artifact_index.rebuild(roots), args.repeat, number=1, setup=clear_index
+            )
+            artifact_index.rebuild(roots)
+            results[f"artifact_index_rebuild_unchanged/{count}"] = measure(
+                lambda: artifact_index.rebuild(roots), args.repeat, args.min_time
+            )
+            results[f"parse_success/{count}"] = measure(
+                lambda: notebook_parser.parse_success(f'{dataset}.ipynb', dataset, 1.0), args.repeat, args.min_time
+            )
+            utils.close_connection()
+    finally:
+        artifact_index.BASE_DIR, notebook_parser.BASE_DIR = saved
+    return results
+
+
+def preprocessing(args, directory):
+    """The notebooks' preprocessing on synthetic TESS catalogs of growing size"""
+    results = {}
+    for size in _sizes(args.catalog_sizes):
+        _progress(f"preprocessing {size} rows")
+        raw = synthetic.tess_catalog(size, seed=args.seed)
+        df = make_target(select_columns(raw, 'TESS'), 'TESS').drop(columns=['disposition'])
+        fitted = Preprocessor().fit(df)
+
+        results[f"select_columns_make_target/{size}"] = measure(
+            lambda: make_target(select_columns(raw, 'TESS'), 'TESS'), args.repeat, args.min_time
+        )
+        results[f"preprocessor_fit/{size}"] = measure(lambda: Preprocessor().fit(df), args.repeat, args.min_time)
+        results[f"preprocessor_transform/{size}"] = measure(
+            lambda: fitted.transform(df, drop_outliers=True), args.repeat, args.min_time
+        )
+    return results
+
+
+SUITES = {
+    "predict": predict,
+    "database": database,
+    "artifacts": artifacts,
+    "preprocessing": preprocessing
+}
@@ -0,0 +1,118 @@
+"""
+Synthetic Benchmark Data
+TESS-like catalogs, prediction rows and artifact directories generated from a seed
+"""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import SOURCES
+from models import MODEL_FEATURES, get_label
+from utils import prediction_row
+
+# Shape of each TESS.csv column: 5th/50th/95th percentiles and the fraction missing.
+# Positive, skewed columns are drawn log-normal; the others normal.
+TESS_COLUMNS = {
+    "pl_rade": (1.8, 10.5, 20.1, 0.066),
+    "pl_trandep": (380, 4750, 24467, 0.0),
+    "pl_orbper": (0.86, 4.09, 26.2, 0.014),
+    "pl_trandurh": (0.98, 2.73, 6.12, 0.0),
+    "pl_insol": (7.0, 364, 7233, 0.023),
+    "pl_eqt": (432, 1183, 2501, 0.04),
+    "st_teff": (3619, 5801, 7823, 0.021),
+    "st_logg": (3.79, 4.33, 4.75, 0.111),
+    "st_rad": (0.51, 1.23, 2.62, 0.066),
+    "st_tmag": (8.68, 11.84, 13.53, 0.0),
+    "st_dist": (53.8, 365, 1130, 0.028),
+    "ra": (21.7, 161, 342, 0.0),
+    "dec": (-69.3, 4.7, 70.4, 0.0)
+}
+LINEAR_COLUMNS = ('st_logg', 'st_tmag', 'ra', 'dec')
+
+# TESS.csv disposition frequencies
+DISPOSITIONS = {'PC': 0.607, 'FP': 0.155, 'CP': 0.089, 'KP': 0.076, 'APC': 0.06, 'FA': 0.013}
+
+# Fraction of values multiplied far outside their range, for the outlier fences to catch
+OUTLIER_FRACTION = 0.002
+
+HEURISTIC_MODELS = ['Kepler', 'K2', 'TESS', 'Light_Curve']
+
+
+def tess_catalog(rows, seed=0):
+    """A raw catalog with TESS.csv's source columns, value ranges, gaps and dispositions"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for column, (p5, p50, p95, missing) in TESS_COLUMNS.items():
+        if column in LINEAR_COLUMNS:
+            values = rng.normal(p50, (p95 - p5) / 3.29, rows)
+        else:
+            values = np.exp(rng.normal(np.log(p50), np.log(p95 / p50) / 1.645, rows))
+        values[rng.random(rows) < OUTLIER_FRACTION] *= 1000
+        values[rng.random(rows) < missing] = np.nan
+        data[column] = values
+    data["tfopwg_disp"] = rng.choice(list(DISPOSITIONS), size=rows, p=list(DISPOSITIONS.values()))
+    return pd.DataFrame(data)
+
+
+def model_inputs(model_name, rows, seed=0):
+    """Rows of a heuristic model's MODEL_FEATURES, uniform over each feature's range"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        f["name"]: rng.uniform(f["min"], f["max"], rows) for f in MODEL_FEATURES[model_name]["features"]
+    })
+
+
+def prediction(model, probability, features):
+    """save_prediction() arguments for one heuristic prediction"""
+    label = get_label(probability)
+    raw_output = {"model_used": model, "features_used": features, "confidence": probability,
+                  "classification": label, "threshold": 0.5}
+    return model, model, features, probability, label, raw_output
+
+
+def prediction_rows(count, seed=0):
+    """prediction_row() tuples shaped like the API's heuristic predictions"""
+    rng = np.random.default_rng(seed)
+    features = {model: model_inputs(model, 1, seed).iloc[0].to_dict() for model in HEURISTIC_MODELS}
+    return [
+        prediction_row(*prediction(model, float(probability), features[model]))
+        for model, probability in zip(rng.choice(HEURISTIC_MODELS, size=count), rng.random(count))
+    ]
+
+
+# Artifact file names by kind, in the proportions a run of all three notebooks leaves behind
+ARTIFACT_NAMES = [
+    ('models', '{dataset}_{i}_RandomForest_pipeline.pkl'),
+    ('plots', '{dataset}_{i}_confusion_matrix.png'),
+    ('plots', '{dataset}_{i}_roc_curve.png'),
+    ('plots', '{dataset}_{i}_topk_features.png'),
+    ('plots', '{dataset}_{i}_correlation.png'),
+    ('results', '{dataset}_{i}_top_features.json')
+]
+
+
+def artifact_tree(root, count, dataset='TESS'):
+    """
+    Write `count` small artifact files under root/static, spread over the datasets
+
+    One real metrics file for `dataset` is added, so parse_success reads and
+    ranks it like after a training run.
+    """
+    datasets = list(SOURCES)
+    for subdir in {subdir for subdir, _ in ARTIFACT_NAMES}:
+        os.makedirs(os.path.join(root, 'static', subdir), exist_ok=True)
+    for i in range(count):
+        subdir, pattern = ARTIFACT_NAMES[i % len(ARTIFACT_NAMES)]
+        name = pattern.format(dataset=datasets[i // len(ARTIFACT_NAMES) % len(datasets)], i=i)
+        with open(os.path.join(root, 'static', subdir, name), 'wb') as f:
+            f.write(name.encode('utf-8') * 8)
+
+    metrics = {
+        algorithm: {"accuracy": accuracy, "precision": 0.8, "recall": 0.8, "f1": 0.8, "auc": 0.9}
+        for algorithm, accuracy in (("RandomForest", 0.91), ("XGBoost", 0.9), ("LogisticRegression", 0.8))
+    }
+    with open(os.path.join(root, 'static', 'results', f'{dataset}_metrics.json'), 'w') as f:
+        json.dump({"results": metrics}, f)
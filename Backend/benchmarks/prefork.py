@@ -0,0 +1,168 @@
+"""
+Pre-fork Model Preloading
+Starts gunicorn with and without PRELOAD_MODELS and compares worker memory and first-request latency
+
+    python -m benchmarks.prefork
+    python -m benchmarks.prefork --workers 4 --requests 20
+
+Requests go through /api/predict and are logged to a scratch database
+(DATABASE_PATH in a temporary directory), not to db.sqlite3.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+
+from models import MODEL_FEATURES
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(url, payload=None):
+    """(status, parsed JSON body, milliseconds) of one GET, or POST when a payload is given"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            status, body = response.status, response.read()
+    except urllib.error.HTTPError as e:
+        status, body = e.code, e.read()
+    return status, json.loads(body or b'null'), (time.perf_counter() - start) * 1000
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def memory_mb(pid):
+    """RSS, PSS (shared pages split between the processes mapping them) and private memory of a process"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        "rss": round(fields.get('Rss', 0), 1),
+        "pss": round(fields.get('Pss', 0), 1),
+        "private": round(fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0), 1)
+    }
+
+
+def workers_memory(master_pid):
+    per_worker = [memory_mb(pid) for pid in worker_pids(master_pid)]
+    return {
+        "per_worker": per_worker,
+        "total_pss_mb": round(sum(m["pss"] for m in per_worker) + memory_mb(master_pid)["pss"], 1)
+    }
+
+
+def payload(key):
+    dataset, algorithm = key.split('/')
+    features = MODEL_FEATURES.get(dataset, MODEL_FEATURES["Kepler"])["features"]
+    return {
+        "dataset": dataset,
+        "model": dataset,
+        "algorithm": algorithm,
+        "features": {f["name"]: f["default"] for f in features}
+    }
+
+
+def benchmark(preload, workers, requests, startup_timeout, database_path):
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    env = {**os.environ, 'PORT': str(port), 'WEB_CONCURRENCY': str(workers), 'DATABASE_PATH': database_path,
+           'PRELOAD_MODELS': '1' if preload else '0', 'PREDICTION_CACHE_SIZE': '0'}
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {server.returncode}")
+            if time.perf_counter() - started > startup_timeout:
+                raise RuntimeError(f"not ready after {startup_timeout}s")
+            try:
+                status, ready, _ = request(f'{url}/api/ready')
+                if status == 200 and len(worker_pids(server.pid)) == workers:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.1)
+        ready_seconds = time.perf_counter() - started
+
+        # Keys the preloading master found; with preload off, ask the registry the same way
+        keys = sorted(ready["models"]) or sorted(
+            f"{dataset}/{algorithm}"
+            for dataset in ('Kepler', 'K2', 'TESS')
+            for algorithm in ('LogisticRegression', 'RandomForest', 'XGBoost')
+        )
+        idle = workers_memory(server.pid)
+
+        first, warm = {}, []
+        for key in keys:
+            status, _, ms = request(f'{url}/api/predict', payload(key))
+            if status == 200:
+                first[key] = round(ms, 1)
+        for _ in range(requests):
+            for key in first:
+                warm.append(request(f'{url}/api/predict', payload(key))[2])
+
+        return {
+            "preload": preload,
+            "workers": workers,
+            "ready_seconds": round(ready_seconds, 2),
+            "memory_idle_mb": idle,
+            "memory_after_requests_mb": workers_memory(server.pid),
+            "first_request_ms": first,
+            "warm_request_median_ms": round(statistics.median(warm), 2) if warm else None
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gunicorn pre-fork preloading benchmark")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    parser.add_argument('--requests', type=int, default=10, help="warm requests per model after the first")
+    parser.add_argument('--startup-timeout', type=int, default=120, help="seconds to wait for /api/ready")
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("This benchmark reads /proc/<pid>/smaps_rollup and needs Linux")
+        return 1
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, 'prefork.sqlite3')
+        for preload in (False, True):
+            try:
+                results.append(benchmark(preload, args.workers, args.requests, args.startup_timeout, database_path))
+            except Exception as e:
+                results.append({"preload": preload, "error": str(e)})
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
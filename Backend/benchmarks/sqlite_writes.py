@@ -0,0 +1,103 @@
+"""
+SQLite Write Throughput
+Compares prediction inserts per second before and after connection pooling + WAL
+
+    python -m benchmarks.sqlite_writes --writes 2000 --threads 4
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+import utils
+
+SAMPLE_ROW = (
+    "TESS",
+    "TESS",
+    json.dumps({"transit_depth": 0.001, "orbital_period": 10, "transit_duration": 3}),
+    0.42,
+    "Not Exoplanet",
+    json.dumps({"model_used": "TESS", "confidence": 0.42}),
+)
+
+
+def baseline_write():
+    """The original save_prediction: new connection, rollback journal, commit, close"""
+    conn = sqlite3.connect(utils.DB_PATH)
+    conn.execute(utils.INSERT_PREDICTION_SQL, (*SAMPLE_ROW, datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def pooled_write():
+    """Pooled per-thread connection with WAL and tuned pragmas"""
+    conn = utils.get_connection()
+    conn.execute(utils.INSERT_PREDICTION_SQL, (*SAMPLE_ROW, datetime.now().isoformat()))
+    conn.commit()
+
+
+def run(write, writes, threads):
+    """Perform `writes` inserts spread over `threads` threads; return (seconds, errors, writes)"""
+    errors = []
+    per_thread = writes // threads
+
+    def worker():
+        for _ in range(per_thread):
+            try:
+                write()
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+        utils.close_connection()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start, len(errors), per_thread * threads
+
+
+def fresh_database(directory, name, wal):
+    utils.DB_PATH = os.path.join(directory, name)
+    utils.init_db()
+    utils.close_connection()
+    if not wal:
+        # Recreate the pre-pooling database: default rollback journal
+        conn = sqlite3.connect(utils.DB_PATH)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite prediction write benchmark")
+    parser.add_argument('--writes', type=int, default=2000, help="total inserts per scenario")
+    parser.add_argument('--threads', type=int, default=4, help="concurrent writer threads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fresh_database(directory, 'baseline.sqlite3', wal=False)
+        base_seconds, base_errors, base_writes = run(baseline_write, args.writes, args.threads)
+
+        fresh_database(directory, 'pooled.sqlite3', wal=True)
+        pooled_seconds, pooled_errors, pooled_writes = run(pooled_write, args.writes, args.threads)
+
+    before = base_writes / base_seconds
+    after = pooled_writes / pooled_seconds
+    report = {
+        "writes": base_writes,
+        "threads": args.threads,
+        "before": {"writes_per_second": round(before, 1), "locked_errors": base_errors},
+        "after": {"writes_per_second": round(after, 1), "locked_errors": pooled_errors},
+        "speedup": round(after / before, 2)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
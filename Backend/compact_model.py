@@ -0,0 +1,426 @@
+"""
+Compact Models
+Exports trained pipelines to flat NumPy arrays and scores them without unpickling scikit-learn objects
+
+    <dir>/model.json      preprocessing parameters, classifier kind, classes
+    <dir>/*.npy           tree node arrays or linear coefficients
+
+    python compact_model.py path/to/TESS_RandomForest_pipeline.pkl out_dir
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+MODEL_FILE = 'model.json'
+
+# A compact model must reproduce the pipeline's predict_proba within this tolerance
+VERIFY_TOLERANCE = 1e-6
+
+
+class UnsupportedModel(ValueError):
+    """The pipeline contains a step the compact format cannot represent"""
+
+
+# --- Export
+
+
+def _json_value(value):
+    """Category value as JSON (NaN becomes null)"""
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _export_step(step):
+    name = type(step).__name__
+    if name == 'StandardScaler':
+        return {
+            "type": "scale",
+            "mean": None if step.mean_ is None else step.mean_.tolist(),
+            "scale": None if step.scale_ is None else step.scale_.tolist()
+        }
+    if name == 'SimpleImputer':
+        if step.add_indicator:
+            raise UnsupportedModel("SimpleImputer(add_indicator=True)")
+        return {"type": "impute", "statistics": [_json_value(v) for v in step.statistics_]}
+    if name == 'OneHotEncoder':
+        if step.drop_idx_ is not None or getattr(step, '_infrequent_enabled', False):
+            raise UnsupportedModel("OneHotEncoder with drop or infrequent categories")
+        if step.handle_unknown != 'ignore':
+            raise UnsupportedModel(f"OneHotEncoder(handle_unknown={step.handle_unknown!r})")
+        return {"type": "onehot", "categories": [[_json_value(v) for v in c] for c in step.categories_]}
+    raise UnsupportedModel(f"Unsupported preprocessing step: {name}")
+
+
+def _export_transformers(column_transformer):
+    transformers = []
+    for name, transformer, columns in column_transformer.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        columns = [column_transformer.feature_names_in_[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+        if transformer == 'passthrough':
+            steps = []
+        elif type(transformer).__name__ == 'Pipeline':
+            steps = [_export_step(step) for _, step in transformer.steps if step != 'passthrough']
+        else:
+            steps = [_export_step(transformer)]
+        transformers.append({"name": name, "columns": list(columns), "steps": steps})
+    return transformers
+
+
+def _export_forest(forest, arrays):
+    """Concatenate every tree's nodes into global arrays; leaves point at themselves"""
+    lefts, rights, features, thresholds, values, missing = [], [], [], [], [], []
+    roots, depth, offset = [], 0, 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        own = np.arange(n) + offset
+        lefts.append(np.where(leaf, own, tree.children_left + offset))
+        rights.append(np.where(leaf, own, tree.children_right + offset))
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        value = tree.value[:, 0, :]
+        values.append(value / value.sum(axis=1, keepdims=True))
+        go_left = getattr(tree, 'missing_go_to_left', None)
+        missing.append(np.zeros(n, dtype=bool) if go_left is None else go_left.astype(bool))
+        roots.append(offset)
+        depth = max(depth, tree.max_depth)
+        offset += n
+
+    arrays.update(
+        left=np.concatenate(lefts).astype(np.int32),
+        right=np.concatenate(rights).astype(np.int32),
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        value=np.concatenate(values).astype(np.float64),
+        missing_left=np.concatenate(missing),
+        roots=np.array(roots, dtype=np.int32)
+    )
+    return {"kind": "forest", "max_depth": int(depth)}
+
+
+def _export_xgboost(clf, arrays):
+    """Flatten the booster's native JSON model; leaf values live in split_conditions"""
+    booster = clf.get_booster()
+    model = json.loads(booster.save_raw(raw_format='json'))
+    learner = model["learner"]
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != 'gbtree':
+        raise UnsupportedModel(f"XGBoost booster {gbm['name']}")
+    objective = learner["objective"]["name"]
+    if objective not in ('binary:logistic', 'multi:softprob', 'multi:softmax'):
+        raise UnsupportedModel(f"XGBoost objective {objective}")
+
+    lefts, rights, features, thresholds, leaf_values, default_left = [], [], [], [], [], []
+    roots, depth, offset = [], 0, 0
+    for tree in gbm["model"]["trees"]:
+        left = np.array(tree["left_children"], dtype=np.int64)
+        right = np.array(tree["right_children"], dtype=np.int64)
+        n = len(left)
+        leaf = left == -1
+        own = np.arange(n) + offset
+        conditions = np.array(tree["split_conditions"], dtype=np.float32)
+        lefts.append(np.where(leaf, own, left + offset))
+        rights.append(np.where(leaf, own, right + offset))
+        features.append(np.where(leaf, 0, np.array(tree["split_indices"], dtype=np.int64)))
+        thresholds.append(conditions)
+        leaf_values.append(np.where(leaf, conditions, 0.0))
+        default_left.append(np.array(tree["default_left"], dtype=bool))
+        roots.append(offset)
+        depth = max(depth, _tree_depth(left, right))
+        offset += n
+
+    n_classes = len(clf.classes_)
+    arrays.update(
+        left=np.concatenate(lefts).astype(np.int32),
+        right=np.concatenate(rights).astype(np.int32),
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds).astype(np.float32),
+        leaf_value=np.concatenate(leaf_values).astype(np.float32),
+        missing_left=np.concatenate(default_left),
+        roots=np.array(roots, dtype=np.int32),
+        tree_group=np.array(gbm["model"]["tree_info"], dtype=np.int32)
+    )
+    return {
+        "kind": "xgboost",
+        "max_depth": int(depth),
+        "n_groups": 1 if n_classes <= 2 else n_classes,
+        "base_margin": None,
+        "n_features": int(learner["learner_model_param"]["num_feature"])
+    }
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while frontier:
+        children = [c for node in frontier for c in (left[node], right[node]) if c != -1]
+        if children:
+            depth += 1
+        frontier = children
+    return depth
+
+
+def _export_linear(clf, arrays):
+    arrays.update(
+        coef=np.asarray(clf.coef_, dtype=np.float64),
+        intercept=np.asarray(clf.intercept_, dtype=np.float64)
+    )
+    return {"kind": "linear"}
+
+
+def export_pipeline(pipeline, out_dir, verify=True):
+    """
+    Write a fitted Pipeline([ColumnTransformer, classifier]) in the compact format
+
+    Supports StandardScaler / SimpleImputer / OneHotEncoder preprocessing and
+    RandomForest, LogisticRegression or XGBoost classifiers. The directory is
+    assembled next to out_dir and renamed into place.
+
+    Raises:
+        UnsupportedModel: if a step cannot be represented, or (with verify)
+            the compact model does not reproduce the pipeline's probabilities
+    """
+    steps = [step for _, step in pipeline.steps]
+    if len(steps) != 2 or type(steps[0]).__name__ != 'ColumnTransformer':
+        raise UnsupportedModel("Expected Pipeline([ColumnTransformer, classifier])")
+    column_transformer, clf = steps
+
+    arrays = {}
+    clf_name = type(clf).__name__
+    if clf_name in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+        classifier = _export_forest(clf, arrays)
+    elif clf_name == 'XGBClassifier':
+        classifier = _export_xgboost(clf, arrays)
+    elif clf_name == 'LogisticRegression':
+        classifier = _export_linear(clf, arrays)
+    else:
+        raise UnsupportedModel(f"Unsupported classifier: {clf_name}")
+
+    spec = {
+        "format_version": FORMAT_VERSION,
+        "classifier": {**classifier, "name": clf_name},
+        "classes": [_json_value(c) for c in clf.classes_],
+        "feature_names_in": list(getattr(pipeline, 'feature_names_in_', column_transformer.feature_names_in_)),
+        "transformers": _export_transformers(column_transformer)
+    }
+
+    tmp_dir = f'{out_dir.rstrip(os.sep)}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(values), allow_pickle=False)
+
+    if classifier["kind"] == 'xgboost':
+        # The base margin's encoding differs between XGBoost releases; measure it instead
+        probe = np.zeros((1, classifier["n_features"]), dtype=np.float32)
+        margin = np.atleast_1d(clf.get_booster().inplace_predict(probe, predict_type='margin').ravel())
+        partial = CompactPipeline(spec, _load_arrays(tmp_dir, mmap=False))
+        spec["classifier"]["base_margin"] = (margin - partial._tree_margins(probe)[0]).tolist()
+
+    with open(os.path.join(tmp_dir, MODEL_FILE), 'w') as f:
+        json.dump(spec, f, indent=2)
+
+    if verify:
+        compact = load(tmp_dir, mmap=False)
+        sample = sample_frame(compact)
+        expected = pipeline.predict_proba(sample)
+        error = float(np.max(np.abs(compact.predict_proba(sample) - expected)))
+        if error > VERIFY_TOLERANCE:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise UnsupportedModel(f"Compact {clf_name} differs from the pipeline by {error:.2e}")
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.rename(tmp_dir, out_dir)
+    return spec
+
+
+def sample_frame(compact, rows=256, seed=0):
+    """Random rows around the training distribution, used to verify an export"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for transformer in compact.transformers:
+        for j, column in enumerate(transformer["columns"]):
+            categories = next((s["categories"][j] for s in transformer["steps"] if s["type"] == "onehot"), None)
+            if categories is not None:
+                data[column] = np.array(categories + ['__unseen__'], dtype=object)[rng.integers(0, len(categories) + 1, rows)]
+                continue
+            scale = next((s for s in transformer["steps"] if s["type"] == "scale"), None)
+            mean = scale["mean"][j] if scale and scale["mean"] else 0.0
+            std = scale["scale"][j] if scale and scale["scale"] else 1.0
+            data[column] = mean + std * rng.standard_normal(rows)
+    return pd.DataFrame(data, columns=compact.feature_names_in_)
+
+
+# --- Serving
+
+
+def _load_arrays(model_dir, mmap=True):
+    return {
+        filename[:-4]: np.load(os.path.join(model_dir, filename), mmap_mode='r' if mmap else None, allow_pickle=False)
+        for filename in os.listdir(model_dir)
+        if filename.endswith('.npy')
+    }
+
+
+class CompactPipeline:
+    """
+    Scores a compact export with NumPy only
+
+    Offers the slice of the scikit-learn API the backend uses
+    (predict_proba, predict, classes_, feature_names_in_), so the registry
+    can serve it in place of the unpickled Pipeline. Trees are walked for
+    all rows and all trees at once, one level per step.
+    """
+
+    def __init__(self, spec, arrays):
+        self.spec = spec
+        self.arrays = arrays
+        self.kind = spec["classifier"]["kind"]
+        self.classes_ = np.array(spec["classes"])
+        self.feature_names_in_ = np.array(spec["feature_names_in"], dtype=object)
+        self.transformers = spec["transformers"]
+        index = {name: i for i, name in enumerate(spec["feature_names_in"])}
+        self._positions = [[index[c] for c in t["columns"]] for t in self.transformers]
+
+    def transform(self, X):
+        """
+        The ColumnTransformer's output as a dense float64 matrix
+
+        X is a DataFrame, or a 2-D array whose columns are in
+        feature_names_in_ order (see feature_vector.py).
+        """
+        blocks = []
+        for transformer, positions in zip(self.transformers, self._positions):
+            categories = next((s["categories"] for s in transformer["steps"] if s["type"] == "onehot"), None)
+            if isinstance(X, pd.DataFrame):
+                values = X[transformer["columns"]].to_numpy(dtype=None if categories else np.float64, copy=True)
+            else:
+                values = np.asarray(X)[:, positions]
+            values = values.astype(object if categories else np.float64, copy=False)
+
+            for step in transformer["steps"]:
+                if step["type"] == "impute":
+                    missing = pd.isna(values)
+                    for j, statistic in enumerate(step["statistics"]):
+                        if statistic is not None:
+                            values[missing[:, j], j] = statistic
+                elif step["type"] == "scale":
+                    if step["mean"] is not None:
+                        values = values - np.asarray(step["mean"])
+                    if step["scale"] is not None:
+                        values = values / np.asarray(step["scale"])
+            if categories:
+                values = np.hstack([
+                    self._one_hot(values[:, j], column_categories)
+                    for j, column_categories in enumerate(categories)
+                ])
+            blocks.append(values)
+        return np.hstack(blocks) if blocks else np.empty((len(X), 0))
+
+    @staticmethod
+    def _one_hot(values, categories):
+        """Indicator columns for one feature; unknown values get all zeros (handle_unknown='ignore')"""
+        known = [c for c in categories if c is not None]
+        codes = pd.Categorical(values, categories=known).codes.astype(np.int64)
+        if None in categories:
+            # A missing value seen during fit has its own column
+            codes = np.where(pd.isna(values), categories.index(None), codes)
+        block = np.zeros((len(values), len(categories)))
+        hit = codes >= 0
+        block[np.flatnonzero(hit), codes[hit]] = 1.0
+        return block
+
+    def _leaves(self, Xt):
+        """Leaf node index of every (tree, row) pair"""
+        a = self.arrays
+        left, right, feature = a["left"], a["right"], a["feature"]
+        # Trees compare float32 features against their thresholds, as scikit-learn and XGBoost do
+        Xt = np.ascontiguousarray(Xt, dtype=np.float32)
+        n_trees, n_rows = len(a["roots"]), len(Xt)
+        strict = self.kind == 'xgboost'
+
+        node = np.repeat(np.asarray(a["roots"], dtype=np.int64), n_rows)
+        flat = Xt.ravel()
+        base = np.tile(np.arange(n_rows, dtype=np.int64) * Xt.shape[1], n_trees)
+        # Only (tree, row) pairs still above a leaf are advanced; leaves point at themselves
+        active = np.flatnonzero(left[node] != node)
+        while active.size:
+            current = node[active]
+            x = flat[base[active] + feature[current]]
+            threshold = a["threshold"][current]
+            go_left = x < threshold if strict else x <= threshold
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, a["missing_left"][current], go_left)
+            nxt = np.where(go_left, left[current], right[current])
+            node[active] = nxt
+            active = active[left[nxt] != nxt]
+        return node.reshape(n_trees, n_rows)
+
+    def _tree_margins(self, Xt):
+        """Per-class sum of XGBoost leaf values, without the base margin"""
+        leaves = self.arrays["leaf_value"][self._leaves(Xt)]
+        groups = self.spec["classifier"]["n_groups"]
+        margins = np.zeros((len(Xt), groups))
+        for group in range(groups):
+            margins[:, group] = leaves[np.asarray(self.arrays["tree_group"]) == group].sum(axis=0)
+        return margins
+
+    def predict_proba(self, X):
+        Xt = self.transform(X)
+        if self.kind == 'forest':
+            return self.arrays["value"][self._leaves(Xt)].mean(axis=0)
+        if self.kind == 'linear':
+            scores = Xt @ np.asarray(self.arrays["coef"]).T + np.asarray(self.arrays["intercept"])
+        else:
+            scores = self._tree_margins(Xt) + np.asarray(self.spec["classifier"]["base_margin"])
+        if scores.shape[1] == 1:
+            p = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def load(model_dir, mmap=True):
+    """
+    Open a compact export
+
+    Arrays are read-only memory maps, so worker processes share their pages
+    through the OS page cache and loading costs little more than opening files.
+    """
+    with open(os.path.join(model_dir, MODEL_FILE), 'r') as f:
+        spec = json.load(f)
+    if spec.get("format_version") != FORMAT_VERSION:
+        raise UnsupportedModel(f"Unknown compact format version {spec.get('format_version')}")
+    return CompactPipeline(spec, _load_arrays(model_dir, mmap))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a trained pipeline to the compact serving format")
+    parser.add_argument('pipeline', help="path to a *_pipeline.pkl file")
+    parser.add_argument('out_dir', help="directory to write model.json and the .npy arrays to")
+    args = parser.parse_args()
+
+    import joblib
+    spec = export_pipeline(joblib.load(args.pipeline), args.out_dir)
+    print(json.dumps({"out_dir": args.out_dir, "classifier": spec["classifier"]["name"],
+                      "files": sorted(os.listdir(args.out_dir))}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,11 +11,101 @@ class Config:
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
     
     # Database
-    DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db.sqlite3')
+    DATABASE_PATH = os.environ.get('DATABASE_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db.sqlite3')
     
     # Notebooks directory
     NOTEBOOKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Notebooks')
     
+    # Bundled pipelines (*_pipeline.pkl) and result JSON, served until a dataset has a
+    # promoted version in the model store
+    MODELS_DIR = os.environ.get('MODELS_DIR') or os.path.join(NOTEBOOKS_DIR, 'static', 'models')
+    RESULTS_DIR = os.environ.get('RESULTS_DIR') or os.path.join(NOTEBOOKS_DIR, 'static', 'results')
+    
+    # Versioned model store (see model_store.py): successful runs are published as immutable
+    # versions, served once promoted; the newest MODEL_STORE_KEEP versions are kept.
+    # MODEL_STORE_AUTO_PROMOTE=1 serves every published run without review
+    MODEL_STORE_DIR = os.environ.get('MODEL_STORE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_store')
+    MODEL_STORE_AUTO_PROMOTE = os.environ.get('MODEL_STORE_AUTO_PROMOTE', '0') == '1'
+    MODEL_STORE_KEEP = int(os.environ.get('MODEL_STORE_KEEP', 5))
+    # Export published pipelines to flat .npy arrays and serve those instead of the pickles
+    COMPACT_MODELS = os.environ.get('COMPACT_MODELS', '1') == '1'
+    
+    # Load every servable pipeline at startup - in the gunicorn master before it forks
+    # (see gunicorn.conf.py), so workers share one copy - instead of on first request
+    PRELOAD_MODELS = os.environ.get('PRELOAD_MODELS', '1') == '1'
+    
+    # "wsgi" serves app.py on sync gunicorn workers; "asgi" serves asgi.py on uvicorn
+    # workers, running the Flask views on ASGI_THREADS threads per worker
+    SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 8))
+    
+    # Source CSVs, and their memory-mapped columnar copies (see dataset_store.py). The newest
+    # DATASET_STORE_KEEP versions are kept so readers of a replaced version can finish
+    DATA_SOURCES_DIR = os.path.join(NOTEBOOKS_DIR, 'Data Sources')
+    DATASET_STORE_DIR = os.environ.get('DATASET_STORE_DIR') or os.path.join(NOTEBOOKS_DIR, 'Data Store')
+    DATASET_STORE_KEEP = int(os.environ.get('DATASET_STORE_KEEP', 3))
+    
+    # Training engine (training.py): artifact root the notebooks also write to
+    # (they run from Notebooks/ and save to ../static), and its core budget (0 = all cores)
+    TRAINING_OUTPUT_DIR = os.environ.get('TRAINING_OUTPUT_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    TRAINING_MAX_CORES = int(os.environ.get('TRAINING_MAX_CORES', 0))
+    
+    # Notebook execution: max notebooks running at once per worker, and per-run timeout
+    NOTEBOOK_MAX_CONCURRENCY = int(os.environ.get('NOTEBOOK_MAX_CONCURRENCY', 1))
+    NOTEBOOK_TIMEOUT = int(os.environ.get('NOTEBOOK_TIMEOUT', 300))
+    
+    # "kernel" runs cells on the warm kernel pool, "nbconvert" starts a fresh process per run
+    NOTEBOOK_ENGINE = os.environ.get('NOTEBOOK_ENGINE', 'kernel')
+    KERNEL_POOL_SIZE = int(os.environ.get('KERNEL_POOL_SIZE', NOTEBOOK_MAX_CONCURRENCY))
+    KERNEL_MAX_RUNS = int(os.environ.get('KERNEL_MAX_RUNS', 10))
+    KERNEL_MAX_RSS_MB = int(os.environ.get('KERNEL_MAX_RSS_MB', 2048))
+    KERNEL_POOL_PREWARM = os.environ.get('KERNEL_POOL_PREWARM', '0') == '1'
+    # Seconds a run waits for a pooled kernel (at most its own timeout) before starting a cold one
+    KERNEL_ACQUIRE_TIMEOUT = int(os.environ.get('KERNEL_ACQUIRE_TIMEOUT', 30))
+    
+    # Run-all: notebooks executed at once (0 = one per core) and the memory they may
+    # use together; a notebook's need is its highest recorded peak RSS, or the default
+    RUN_ALL_MAX_PARALLEL = int(os.environ.get('RUN_ALL_MAX_PARALLEL', 0))
+    RUN_ALL_MEMORY_MB = int(os.environ.get('RUN_ALL_MEMORY_MB', 4096))
+    RUN_ALL_NOTEBOOK_MB = int(os.environ.get('RUN_ALL_NOTEBOOK_MB', 1024))
+    
+    # Training run cache: artifacts are copied from these roots after a successful run
+    ARTIFACT_ROOTS = [
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'),
+        os.path.join(NOTEBOOKS_DIR, 'static')
+    ]
+    RUN_CACHE_DIR = os.environ.get('RUN_CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run_cache')
+    RUN_CACHE_MAX_MB = int(os.environ.get('RUN_CACHE_MAX_MB', 512))
+    
+    # Write-behind prediction logging: buffer rows and group-commit them off the request path.
+    # On by default with SERVER_MODE=asgi, so event-loop workers never wait on a SQLite commit
+    PREDICTION_WRITE_BEHIND = os.environ.get('PREDICTION_WRITE_BEHIND', '1' if SERVER_MODE == 'asgi' else '0') == '1'
+    PREDICTION_LOG_BATCH_SIZE = int(os.environ.get('PREDICTION_LOG_BATCH_SIZE', 200))
+    PREDICTION_LOG_FLUSH_MS = int(os.environ.get('PREDICTION_LOG_FLUSH_MS', 250))
+    PREDICTION_LOG_QUEUE_SIZE = int(os.environ.get('PREDICTION_LOG_QUEUE_SIZE', 10000))
+    
+    # Largest page /api/predictions will return
+    PREDICTIONS_MAX_PAGE_SIZE = int(os.environ.get('PREDICTIONS_MAX_PAGE_SIZE', 500))
+    
+    # Heuristic model noise: standard deviation of the jitter added to each probability
+    # (0 disables it). The noise is a fixed function of the seed and the inputs, so
+    # cache misses, evictions and restarts return the same probability.
+    PREDICTION_JITTER = float(os.environ.get('PREDICTION_JITTER', 0.05))
+    PREDICTION_JITTER_SEED = int(os.environ.get('PREDICTION_JITTER_SEED') or 0)
+    
+    # Memoized single predictions: LRU size (0 disables) and entry lifetime in seconds
+    PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 4096))
+    PREDICTION_CACHE_TTL = int(os.environ.get('PREDICTION_CACHE_TTL', 300))
+    
+    # Metrics (see metrics.py): directory of the memory-mapped shards every worker records
+    # into (gunicorn.conf.py creates one when unset; without it metrics cover one process)
+    # and float64 slots per shard - a histogram label set takes one per bucket plus two
+    METRICS_DIR = os.environ.get('METRICS_DIR') or None
+    METRICS_MAX_SLOTS = int(os.environ.get('METRICS_MAX_SLOTS', 8192))
+    
+    # Rows per predict_proba call for batch scoring
+    BATCH_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', 5000))
+    
     # API settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size
     JSON_SORT_KEYS = False
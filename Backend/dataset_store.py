@@ -0,0 +1,327 @@
+"""
+Dataset Store
+Converts the source CSVs once into typed, memory-mapped .npy columns
+
+    python dataset_store.py            # convert every source CSV that changed
+    python dataset_store.py TESS
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from model_registry import file_sha256
+
+# Source CSV and the columns each notebook keeps, as {source column: renamed column}
+SOURCES = {
+    "TESS": {
+        "file": "TESS.csv",
+        "columns": {
+            "pl_rade": "planet_radius_earth",
+            "pl_trandep": "transit_depth_ppm",
+            "pl_orbper": "orbital_period_days",
+            "pl_trandurh": "transit_duration_hrs",
+            "pl_insol": "insolation_flux_earth",
+            "pl_eqt": "equilibrium_temp_k",
+            "st_teff": "stellar_temp_k",
+            "st_logg": "stellar_logg",
+            "st_rad": "stellar_radius_solar",
+            "st_tmag": "stellar_magnitude",
+            "st_dist": "stellar_distance_pc",
+            "ra": "RA_deg",
+            "dec": "Dec_deg",
+            "tfopwg_disp": "disposition"
+        }
+    },
+    "Kepler": {
+        "file": "Kepler.csv",
+        "columns": {
+            "koi_prad": "planet_radius_earth",
+            "koi_prad_err1": "planet_radius_err_upper",
+            "koi_prad_err2": "planet_radius_err_lower",
+            "koi_ror": "radius_ratio_Rp_Rstar",
+            "koi_depth": "transit_depth_ppm",
+            "koi_srho": "stellar_density_gcm3",
+            "koi_period": "orbital_period_days",
+            "koi_sma": "semi_major_axis_AU",
+            "koi_eccen": "eccentricity",
+            "koi_incl": "inclination_deg",
+            "koi_duration": "transit_duration_hrs",
+            "koi_ingress": "ingress_duration_hrs",
+            "koi_dor": "scaled_distance_a_Rstar",
+            "koi_teq": "equilibrium_temp_K",
+            "koi_insol": "insolation_flux_Earth",
+            "koi_steff": "stellar_temp_K",
+            "koi_slogg": "stellar_logg",
+            "koi_smet": "stellar_metallicity_FeH",
+            "koi_srad": "stellar_radius_solar",
+            "koi_smass": "stellar_mass_solar",
+            "koi_sage": "stellar_age_Gyr",
+            "koi_disposition": "final_disposition",
+            "koi_pdisposition": "kepler_disposition",
+            "koi_score": "disposition_score",
+            "koi_model_snr": "signal_to_noise",
+            "koi_num_transits": "num_transits",
+            "ra": "RA_deg",
+            "dec": "Dec_deg",
+            "koi_kepmag": "kepler_mag"
+        }
+    },
+    "K2": {
+        "file": "k2.csv",
+        # The K2 notebook selects these columns without renaming them
+        "columns": {
+            name: name for name in [
+                'pl_orbper', 'pl_rade', 'pl_radj', 'st_rad', 'st_mass', 'sy_dist',
+                'st_teff', 'st_logg', 'disposition', 'discoverymethod', 'disc_facility',
+                'soltype', 'pl_name'
+            ]
+        }
+    }
+}
+
+MANIFEST = 'manifest.json'
+CURRENT = 'current.json'
+
+_lock = threading.Lock()
+
+
+def source_path(dataset):
+    return os.path.join(Config.DATA_SOURCES_DIR, SOURCES[dataset]["file"])
+
+
+def _dataset_dir(dataset):
+    return os.path.join(Config.DATASET_STORE_DIR, dataset)
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def convert(dataset, csv_path=None, sha256=None):
+    """
+    Parse a source CSV once and write its selected columns as .npy files
+
+    Numeric columns keep the dtype pandas infers. String columns are stored
+    as int32 codes plus a category list in the manifest (-1 marks a missing
+    value). Each conversion goes to its own version directory, named after
+    the CSV hash, and becomes current with an atomic pointer swap. The
+    replaced version stays on disk for readers that already resolved it;
+    versions beyond DATASET_STORE_KEEP are removed by the next conversion.
+
+    Returns:
+        manifest dict of the converted version
+    """
+    csv_path = csv_path or source_path(dataset)
+    sha256 = sha256 or file_sha256(csv_path)
+    mapping = SOURCES[dataset]["columns"]
+
+    df = pd.read_csv(csv_path, usecols=lambda c: c.strip() in mapping)
+    df.columns = [c.strip() for c in df.columns]
+    # Keep the notebook's column order
+    df = df[[c for c in mapping if c in df.columns]]
+
+    dataset_dir = _dataset_dir(dataset)
+    version = sha256[:16]
+    tmp_dir = os.path.join(dataset_dir, f'.tmp-{os.getpid()}-{threading.get_ident()}')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, source in enumerate(df.columns):
+        series = df[source]
+        filename = f'{i:03d}.npy'
+        column = {"name": mapping[source], "source": source, "file": filename}
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy()
+            column.update(kind="numeric", dtype=str(values.dtype))
+        else:
+            codes, categories = pd.factorize(series.astype(object), use_na_sentinel=True)
+            values = codes.astype(np.int32)
+            column.update(kind="string", dtype="int32", categories=[str(c) for c in categories])
+        np.save(os.path.join(tmp_dir, filename), np.ascontiguousarray(values), allow_pickle=False)
+        columns.append(column)
+
+    stat = os.stat(csv_path)
+    manifest = {
+        "dataset": dataset,
+        "version": version,
+        "source": os.path.basename(csv_path),
+        "source_sha256": sha256,
+        "source_fingerprint": [stat.st_mtime_ns, stat.st_size],
+        "rows": len(df),
+        "columns": columns,
+        "converted_at": datetime.now().isoformat()
+    }
+    _write_json(os.path.join(tmp_dir, MANIFEST), manifest)
+
+    version_dir = os.path.join(dataset_dir, version)
+    try:
+        os.rename(tmp_dir, version_dir)
+    except OSError:
+        # Another worker converted the same CSV first - its copy is identical
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Older versions are pruned before the swap: the one being replaced stays until later conversions
+    prune(dataset, keep=Config.DATASET_STORE_KEEP - 1, exclude=version)
+    _write_json(os.path.join(dataset_dir, CURRENT), {"version": version})
+
+    print(f"🗃️ Converted {manifest['source']} -> {dataset}/{version} ({len(df)} rows, {len(columns)} columns)")
+    return manifest
+
+
+def list_versions(dataset):
+    """Manifests of the dataset's converted versions, newest first"""
+    dataset_dir = _dataset_dir(dataset)
+    if not os.path.isdir(dataset_dir):
+        return []
+    manifests = [
+        _read_json(os.path.join(dataset_dir, name, MANIFEST))
+        for name in os.listdir(dataset_dir) if not name.startswith('.')
+    ]
+    return sorted((m for m in manifests if m), key=lambda m: m["converted_at"], reverse=True)
+
+
+def prune(dataset, keep=None, exclude=None):
+    """
+    Delete the oldest versions beyond the newest `keep`, never the current one
+
+    A reader resolves the current version and then opens its files, so a
+    version that was current a moment ago may still be about to be read; it
+    is only removed once `keep` newer versions have replaced it.
+    """
+    keep = Config.DATASET_STORE_KEEP if keep is None else keep
+    current = (_read_json(os.path.join(_dataset_dir(dataset), CURRENT)) or {}).get("version")
+    versions = [m for m in list_versions(dataset) if m["version"] != exclude]
+    for manifest in versions[max(keep, 1):]:
+        if manifest["version"] != current:
+            # Readers that still map the old files keep them open until they are done
+            shutil.rmtree(os.path.join(_dataset_dir(dataset), manifest["version"]), ignore_errors=True)
+
+
+def ensure_converted(dataset, csv_path=None):
+    """
+    Return the manifest of the current version, converting the CSV if it changed
+
+    A lookup costs one os.stat() of the CSV. The CSV is only re-hashed when
+    its mtime/size differ from the converted copy, and only re-parsed when
+    the hash differs too.
+
+    Raises:
+        KeyError: if the dataset has no SOURCES entry
+        FileNotFoundError: if the source CSV does not exist
+    """
+    csv_path = csv_path or source_path(dataset)
+    stat = os.stat(csv_path)
+    fingerprint = [stat.st_mtime_ns, stat.st_size]
+
+    dataset_dir = _dataset_dir(dataset)
+    current = _read_json(os.path.join(dataset_dir, CURRENT))
+    manifest = _read_json(os.path.join(dataset_dir, current["version"], MANIFEST)) if current else None
+    if manifest is not None and manifest["source_fingerprint"] == fingerprint:
+        return manifest
+
+    with _lock:
+        os.makedirs(dataset_dir, exist_ok=True)
+        sha256 = file_sha256(csv_path)
+        if manifest is not None and manifest["source_sha256"] == sha256:
+            # CSV was touched but not changed - remember the new fingerprint
+            manifest["source_fingerprint"] = fingerprint
+            _write_json(os.path.join(dataset_dir, manifest["version"], MANIFEST), manifest)
+            return manifest
+        return convert(dataset, csv_path, sha256)
+
+
+def load_dataset(dataset, columns=None, raw_names=False, csv_path=None):
+    """
+    Load a converted dataset as a DataFrame
+
+    Numeric columns are copy-on-write memory maps of the .npy files, so no
+    data is read or copied until it is used. String columns are decoded to
+    object arrays, the dtype the notebooks' preprocessors expect.
+
+    Args:
+        dataset: Dataset name in SOURCES (TESS, Kepler, K2)
+        columns: Optional subset of (renamed) columns to load
+        raw_names: Use the source CSV's column names instead of the renamed ones
+        csv_path: Source CSV, defaults to Data Sources/<file>
+    """
+    manifest = ensure_converted(dataset, csv_path)
+    version_dir = os.path.join(_dataset_dir(dataset), manifest["version"])
+    wanted = set(columns) if columns is not None else None
+    # An empty file cannot be memory-mapped
+    mmap_mode = 'c' if manifest["rows"] else None
+
+    data = {}
+    for column in manifest["columns"]:
+        if wanted is not None and column["name"] not in wanted:
+            continue
+        values = np.load(os.path.join(version_dir, column["file"]), mmap_mode=mmap_mode, allow_pickle=False)
+        if column["kind"] == "string":
+            # Index -1 (missing) picks the trailing NaN
+            lookup = np.array(column["categories"] + [np.nan], dtype=object)
+            values = lookup[values]
+        data[column["source"] if raw_names else column["name"]] = values
+
+    return pd.DataFrame(data, copy=False)
+
+
+def dataset_for_file(csv_path):
+    """Name of the dataset whose source file is csv_path, or None"""
+    filename = os.path.basename(str(csv_path).replace('\\', '/')).lower()
+    for dataset, source in SOURCES.items():
+        if source["file"].lower() == filename:
+            return dataset
+    return None
+
+
+def read_source(csv_path):
+    """
+    Drop-in replacement for pd.read_csv in the notebooks
+
+    Known source CSVs are served from the store with their original column
+    names (only the columns the notebook selects); anything else is parsed
+    with pd.read_csv.
+    """
+    dataset = dataset_for_file(csv_path)
+    if dataset is None:
+        return pd.read_csv(csv_path)
+    return load_dataset(dataset, raw_names=True, csv_path=str(csv_path).replace('\\', '/'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert source CSVs into the memory-mapped dataset store")
+    parser.add_argument('datasets', nargs='*', help="datasets to convert (default: all with a source CSV)")
+    parser.add_argument('--force', action='store_true', help="convert even if the CSV is unchanged")
+    args = parser.parse_args()
+
+    for dataset in args.datasets or list(SOURCES):
+        path = source_path(dataset)
+        if not os.path.exists(path):
+            print(f"⚠️ Skipping {dataset}: {path} not found")
+            continue
+        manifest = convert(dataset) if args.force else ensure_converted(dataset)
+        print(json.dumps({k: manifest[k] for k in ('dataset', 'version', 'rows', 'converted_at')}))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
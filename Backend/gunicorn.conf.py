@@ -0,0 +1,67 @@
+"""
+Gunicorn Configuration
+Builds the app once in the master, then forks workers that share its preloaded models
+
+    gunicorn --config gunicorn.conf.py
+    WEB_CONCURRENCY=4 PRELOAD_MODELS=0 gunicorn --config gunicorn.conf.py
+    SERVER_MODE=asgi gunicorn --config gunicorn.conf.py
+"""
+
+import gc
+import os
+import shutil
+import tempfile
+
+import metrics
+from config import Config
+
+wsgi_app = 'app:create_app(warm_kernels=False)'
+if Config.SERVER_MODE == 'asgi':
+    # Same routes from an event loop per worker (see asgi.py)
+    wsgi_app = 'asgi:create_app(warm_kernels=False)'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
+
+# Run the app factory in the master so the workers inherit its pipelines instead of
+# each loading its own; with PRELOAD_MODELS=0 every worker imports the app itself
+preload_app = Config.PRELOAD_MODELS
+
+# One metrics directory for the master and every worker, so /metrics on any worker
+# reports them all; set before the app (and its model loads) is imported
+created_metrics_dir = not Config.METRICS_DIR
+if created_metrics_dir:
+    Config.METRICS_DIR = tempfile.mkdtemp(prefix='exoml-metrics-')
+metrics.prepare_directory(Config.METRICS_DIR)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from app import startup
+        server.log.info("Preloaded %d pipeline(s) in %.2fs; forking %d worker(s)",
+                        len(startup["models"]), startup["seconds"], server.cfg.workers)
+
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        # The master's SQLite connection must not be shared with the child
+        from utils import close_connection
+        close_connection()
+    # Move everything loaded so far to the permanent generation: otherwise the workers'
+    # collections write to the preloaded objects' GC headers and un-share their pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import warm_kernel_pool
+    warm_kernel_pool()
+
+
+def child_exit(server, worker):
+    metrics.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if created_metrics_dir:
+        shutil.rmtree(Config.METRICS_DIR, ignore_errors=True)
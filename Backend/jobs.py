@@ -0,0 +1,198 @@
+"""
+Notebook Job Queue
+Runs notebooks on a bounded background pool so API requests return immediately
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config import Config
+from utils import get_connection
+from metrics import NOTEBOOK_RUN_SECONDS
+from notebook_runner import execute_notebook
+
+ACTIVE_STATES = ('queued', 'running')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return this worker's notebook pool, creating it on first use
+
+    Created lazily so the pool's threads are never started before gunicorn forks.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.NOTEBOOK_MAX_CONCURRENCY,
+                thread_name_prefix='notebook-job'
+            )
+        return _executor
+
+
+def _pid_alive(pid):
+    """Check whether the worker that owns a job is still running"""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _row_to_job(row):
+    """Convert a notebook_jobs row into the API representation"""
+    now = datetime.now()
+    started = datetime.fromisoformat(row["started_at"]) if row["started_at"] else None
+    finished = datetime.fromisoformat(row["finished_at"]) if row["finished_at"] else None
+    elapsed = ((finished or now) - started).total_seconds() if started else 0.0
+
+    return {
+        "job_id": row["id"],
+        "notebook": row["notebook"],
+        "status": row["status"],
+        "progress": {
+            "stage": row["stage"],
+            "elapsed_seconds": round(elapsed, 1)
+        },
+        "submitted_at": row["submitted_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "result": json.loads(row["result"]) if row["result"] else None
+    }
+
+
+def _update_job(job_id, **fields):
+    conn = get_connection()
+    assignments = ', '.join(f"{name} = ?" for name in fields)
+    try:
+        conn.execute(
+            f"UPDATE notebook_jobs SET {assignments} WHERE id = ?",
+            (*fields.values(), job_id)
+        )
+        conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+
+def submit_job(notebook_name, notebook_path, runner=None):
+    """
+    Queue a notebook run, or attach to the run already in progress
+
+    The job row is shared through SQLite so every gunicorn worker sees it;
+    the run itself happens on the submitting worker's pool. `runner` replaces
+    execute_notebook for jobs that are not a single notebook (e.g. run-all);
+    it is called as runner(notebook_name, notebook_path) and returns the result.
+
+    Returns:
+        job dict, attached (True if an existing job was reused)
+    """
+    conn = get_connection()
+    try:
+        # IMMEDIATE takes the write lock up front so two workers cannot both
+        # decide there is no active job for this notebook
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            f"""
+            SELECT * FROM notebook_jobs
+            WHERE notebook = ? AND status IN ({', '.join('?' * len(ACTIVE_STATES))})
+            ORDER BY submitted_at DESC
+            """,
+            (notebook_name, *ACTIVE_STATES)
+        ).fetchall()
+
+        for row in rows:
+            if _pid_alive(row["worker_pid"]):
+                conn.commit()
+                return _row_to_job(row), True
+            # The owning worker died mid-run - the job will never finish
+            conn.execute(
+                "UPDATE notebook_jobs SET status = 'failed', stage = 'abandoned', finished_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), row["id"])
+            )
+
+        job_id = uuid.uuid4().hex
+        conn.execute(
+            """
+            INSERT INTO notebook_jobs (id, notebook, status, stage, worker_pid, submitted_at)
+            VALUES (?, ?, 'queued', 'queued', ?, ?)
+            """,
+            (job_id, notebook_name, os.getpid(), datetime.now().isoformat())
+        )
+        conn.commit()
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+    get_executor().submit(_run_job, job_id, notebook_name, notebook_path, runner or execute_notebook)
+    return get_job(job_id), False
+
+
+def _run_job(job_id, notebook_name, notebook_path, runner):
+    """Execute a queued notebook and store its parsed result"""
+    _update_job(job_id, status='running', stage='executing', started_at=datetime.now().isoformat())
+    started = time.perf_counter()
+    try:
+        result = runner(notebook_name, notebook_path)
+    except Exception as e:
+        result = {
+            "success": False,
+            "error": "Unexpected error",
+            "message": str(e),
+            "notebook": notebook_name
+        }
+
+    if result.get("cache", {}).get("hit"):
+        outcome = 'cached'
+    else:
+        outcome = 'succeeded' if result.get("success") else 'failed'
+    NOTEBOOK_RUN_SECONDS.observe(time.perf_counter() - started, (notebook_name, outcome))
+
+    _update_job(
+        job_id,
+        status='succeeded' if result.get("success") else 'failed',
+        stage='done',
+        result=json.dumps(result),
+        finished_at=datetime.now().isoformat()
+    )
+    print(f"{'✅' if result.get('success') else '❌'} Notebook job {job_id[:8]} finished: {notebook_name}")
+
+
+def get_job(job_id):
+    """Return a job by id, or None if it does not exist"""
+    conn = get_connection()
+    row = conn.execute("SELECT * FROM notebook_jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def list_jobs(limit=20):
+    """Return the most recently submitted jobs"""
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT * FROM notebook_jobs ORDER BY submitted_at DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [_row_to_job(row) for row in rows]
+
+
+def wait_for_job(job_id, timeout_seconds, poll_interval=1.0):
+    """Block until a job leaves the active states or the timeout passes"""
+    deadline = time.monotonic() + timeout_seconds
+    job = get_job(job_id)
+    while job and job["status"] in ACTIVE_STATES and time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        job = get_job(job_id)
+    return job
@@ -0,0 +1,337 @@
+"""
+Kernel Pool
+Keeps pre-warmed Jupyter kernels so notebook runs skip kernel start-up and heavy imports
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import atexit
+import threading
+
+import nbformat
+from jupyter_client.manager import KernelManager
+
+from config import Config
+
+# Imported once when a kernel starts; later runs find them in sys.modules
+WARMUP_CODE = """
+import warnings
+warnings.filterwarnings('ignore')
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot
+import numpy, pandas, seaborn, joblib
+from sklearn import compose, ensemble, linear_model, metrics, model_selection, pipeline, preprocessing
+try:
+    import xgboost
+except Exception:
+    pass
+"""
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Clears the previous run's variables and matches nbconvert's cwd. Libraries stay imported;
+# backend modules (preprocessing, dataset_store, ...) are dropped so the run imports their current source
+RESET_CODE = """
+%reset -f
+import os, sys
+os.chdir({cwd!r})
+for _name, _module in list(sys.modules.items()):
+    _file = getattr(_module, '__file__', None) or ''
+    if _file.startswith({backend!r}) and 'site-packages' not in _file:
+        del sys.modules[_name]
+del _name, _module, _file
+"""
+
+# Evaluated in the kernel to read its current resident set size in MB (Linux only)
+RSS_EXPRESSION = (
+    "int(open('/proc/self/statm').read().split()[1]) * __import__('os').sysconf('SC_PAGE_SIZE') / 2**20 "
+    "if __import__('os').path.exists('/proc/self/statm') else 0.0"
+)
+
+# Reset the kernel's peak RSS (VmHWM) before a cell and read it back afterwards (Linux only)
+RESET_PEAK_RSS_EXPRESSION = (
+    "open('/proc/self/clear_refs', 'w').write('5') "
+    "if __import__('os').path.exists('/proc/self/clear_refs') else None"
+)
+PEAK_RSS_EXPRESSION = (
+    "next(int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmHWM:')) / 1024 "
+    "if __import__('os').path.exists('/proc/self/status') else None"
+)
+
+OUTPUT_MSG_TYPES = ('stream', 'display_data', 'execute_result', 'error')
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+
+def user_expression_value(reply, name):
+    """Read a numeric user_expressions result from an execute_reply, None if unavailable"""
+    value = reply['content'].get('user_expressions', {}).get(name)
+    if not value or value.get('status') != 'ok':
+        return None
+    try:
+        return float(value['data']['text/plain'])
+    except (KeyError, ValueError):
+        return None
+
+
+class PooledKernel:
+    """A started kernel with its blocking client and usage counters"""
+
+    def __init__(self, kernel_name, cwd):
+        self.manager = KernelManager(kernel_name=kernel_name)
+        self.manager.start_kernel(cwd=cwd)
+        self.client = self.manager.client()
+        self.client.start_channels()
+        self.client.wait_for_ready(timeout=60)
+        self.runs = 0
+        # Cold kernels are started when the pool is exhausted and shut down after one run
+        self.pooled = True
+        self.execute(WARMUP_CODE, timeout=120)
+
+    def execute(self, code, timeout=None, output_hook=None, user_expressions=None):
+        """Run code and return the execute_reply message"""
+        return self.client.execute_interactive(
+            code,
+            store_history=False,
+            user_expressions=user_expressions,
+            timeout=timeout,
+            output_hook=output_hook or (lambda msg: None)
+        )
+
+    def evaluate(self, expression, timeout=10):
+        """Evaluate an expression silently in the kernel, None if it fails"""
+        try:
+            reply = self.client.execute_interactive(
+                '', silent=True, user_expressions={'value': expression}, timeout=timeout
+            )
+            return user_expression_value(reply, 'value')
+        except Exception:
+            return None
+
+    def rss_mb(self):
+        """Current memory used by the kernel process, 0.0 if unknown"""
+        return self.evaluate(RSS_EXPRESSION) or 0.0
+
+    def shutdown(self):
+        try:
+            self.client.stop_channels()
+            self.manager.shutdown_kernel(now=True)
+        except Exception as e:
+            print(f"⚠️ Error shutting down kernel: {e}")
+
+
+class KernelPool:
+    """
+    Bounded pool of warm kernels
+
+    A kernel is recycled (shut down and replaced in the background) after
+    `max_runs` notebook runs, when its RSS grows past `max_rss_mb`, or when a
+    run times out. A run that finds every kernel busy for KERNEL_ACQUIRE_TIMEOUT
+    seconds runs on a cold kernel outside the pool instead of waiting on.
+    """
+
+    def __init__(self, size=None, max_runs=None, max_rss_mb=None, kernel_name='python3', cwd=None):
+        self.size = size or Config.KERNEL_POOL_SIZE
+        self.max_runs = max_runs or Config.KERNEL_MAX_RUNS
+        self.max_rss_mb = max_rss_mb or Config.KERNEL_MAX_RSS_MB
+        self.kernel_name = kernel_name
+        self.cwd = cwd or Config.NOTEBOOKS_DIR
+        self._idle = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._all = set()
+        atexit.register(self.shutdown)
+
+    def _start_kernel(self):
+        kernel = PooledKernel(self.kernel_name, self.cwd)
+        with self._lock:
+            self._all.add(kernel)
+        return kernel
+
+    def _start_in_background(self):
+        """Start one kernel on a thread and add it to the idle queue"""
+        def start():
+            try:
+                self._idle.put(self._start_kernel())
+            except Exception as e:
+                with self._lock:
+                    self._started -= 1
+                print(f"❌ Failed to start kernel: {e}")
+
+        threading.Thread(target=start, name='kernel-warmup', daemon=True).start()
+
+    def reserve(self, size):
+        """Allow at least `size` kernels at once; the extra kernels start on demand"""
+        with self._lock:
+            self.size = max(self.size, size)
+
+    def warm(self):
+        """Start kernels in the background until the pool is full"""
+        with self._lock:
+            missing = self.size - self._started
+            self._started += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            self._start_in_background()
+
+    def acquire(self, timeout=None):
+        """
+        An idle kernel, a newly started one while the pool has room, or a cold one
+
+        Waits up to `timeout` seconds (default KERNEL_ACQUIRE_TIMEOUT) for a
+        busy kernel to be released before starting a cold kernel.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_start = self._started < self.size
+            if can_start:
+                self._started += 1
+        if can_start:
+            try:
+                return self._start_kernel()
+            except Exception:
+                with self._lock:
+                    self._started -= 1
+                raise
+
+        timeout = Config.KERNEL_ACQUIRE_TIMEOUT if timeout is None else timeout
+        try:
+            return self._idle.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            pass
+        print(f"⚠️ No pooled kernel free after {timeout:.0f}s; starting a cold kernel")
+        kernel = self._start_kernel()
+        kernel.pooled = False
+        return kernel
+
+    def release(self, kernel, healthy=True):
+        kernel.runs += 1
+        if not kernel.pooled:
+            with self._lock:
+                self._all.discard(kernel)
+            kernel.shutdown()
+            return
+        rss = kernel.rss_mb() if healthy else 0.0
+
+        if healthy and kernel.runs < self.max_runs and rss < self.max_rss_mb:
+            self._idle.put(kernel)
+            return
+
+        reason = "unhealthy" if not healthy else f"{kernel.runs} runs, {rss:.0f} MB"
+        print(f"♻️ Recycling kernel ({reason})")
+        with self._lock:
+            self._all.discard(kernel)
+        kernel.shutdown()
+        # Keep the slot: the replacement is warmed before anyone needs it
+        self._start_in_background()
+
+    def run_notebook(self, notebook_path, timeout_seconds):
+        """
+        Execute every code cell of a notebook on a warm kernel
+
+        Outputs are written back into the notebook file, like nbconvert --inplace.
+
+        Returns:
+            dict with success, timed_out, per-cell measurements and error text
+        """
+        deadline = time.monotonic() + timeout_seconds
+        nb = nbformat.read(notebook_path, as_version=4)
+        cells = []
+        error_text = ''
+        timed_out = False
+        healthy = True
+        current = None
+
+        # Waiting for a kernel counts against the run's timeout
+        kernel = self.acquire(timeout=min(Config.KERNEL_ACQUIRE_TIMEOUT, timeout_seconds))
+        try:
+            kernel.execute(RESET_CODE.format(cwd=os.path.dirname(notebook_path), backend=BASE_DIR + os.sep), timeout=30)
+
+            for index, cell in enumerate(nb.cells):
+                if cell.cell_type != 'code' or not cell.source.strip():
+                    continue
+
+                outputs = []
+
+                def collect(msg, outputs=outputs):
+                    if msg['msg_type'] in OUTPUT_MSG_TYPES:
+                        outputs.append(nbformat.v4.output_from_msg(msg))
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Notebook timeout reached")
+
+                kernel.evaluate(RESET_PEAK_RSS_EXPRESSION)
+                cell_start = time.perf_counter()
+                current = (index, cell.source, cell_start)
+                reply = kernel.execute(
+                    cell.source,
+                    timeout=remaining,
+                    output_hook=collect,
+                    user_expressions={'peak_rss_mb': PEAK_RSS_EXPRESSION}
+                )
+                seconds = time.perf_counter() - cell_start
+
+                cell.outputs = outputs
+                cell.execution_count = reply['content'].get('execution_count')
+                status = reply['content']['status']
+                cells.append({
+                    "cell": index,
+                    "source": cell.source,
+                    "seconds": seconds,
+                    "peak_rss_mb": user_expression_value(reply, 'peak_rss_mb'),
+                    "output_bytes": len(json.dumps(outputs)),
+                    "status": status
+                })
+
+                if status == 'error':
+                    traceback = reply['content'].get('traceback') or [
+                        f"{reply['content'].get('ename')}: {reply['content'].get('evalue')}"
+                    ]
+                    error_text = ANSI_ESCAPE.sub('', '\n'.join(traceback))
+                    break
+        except TimeoutError:
+            timed_out = True
+            healthy = False
+            if current is not None and (not cells or cells[-1]["cell"] != current[0]):
+                # Record the cell that was still running when the limit hit
+                cells.append({
+                    "cell": current[0],
+                    "source": current[1],
+                    "seconds": time.perf_counter() - current[2],
+                    "peak_rss_mb": None,
+                    "output_bytes": 0,
+                    "status": "timeout"
+                })
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.release(kernel, healthy)
+
+        if not timed_out:
+            nbformat.write(nb, notebook_path)
+
+        return {
+            "success": not timed_out and not error_text,
+            "timed_out": timed_out,
+            "cells": cells,
+            "stderr": error_text
+        }
+
+    def shutdown(self):
+        with self._lock:
+            kernels = list(self._all)
+            self._all.clear()
+        for kernel in kernels:
+            kernel.shutdown()
+
+
+# One pool per worker process; kernels start on first use (or via warm())
+kernel_pool = KernelPool()
@@ -0,0 +1,320 @@
+"""
+Metrics
+Prometheus counters, gauges and histograms recorded into per-thread shards and merged on scrape
+
+Each thread records into its own preallocated array of float64 slots. A
+histogram owns one slot per bucket plus one for the sum, so an observation
+is two in-place adds with no lock. With METRICS_DIR set (gunicorn.conf.py
+sets one for its workers) the arrays are memory-mapped files there, and
+/metrics on any worker sums the files of every process. Otherwise they
+live in memory and cover this process only.
+
+    curl localhost:5000/metrics
+"""
+
+import os
+import json
+import mmap
+import glob
+import bisect
+import threading
+
+import numpy as np
+
+from config import Config
+
+# Latency buckets in seconds, for request, database and model-load timings
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Notebook runs take minutes
+NOTEBOOK_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 3600.0)
+
+# Slots past the end of every shard where label sets that did not fit are recorded (and never exported)
+SCRATCH_SLOTS = 64
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Registry:
+    """
+    Slot layout and shards of this process
+
+    The first time a label set is seen it is given the next free slots under
+    a lock, and the layout is appended to <pid>.keys so other processes can
+    read the shards. After that the slot is a plain dict lookup.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Fresh layout and shards: a forked worker records into files of its own"""
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._size = Config.METRICS_MAX_SLOTS
+        self._slots = {}
+        self._keys = []
+        self._next = 0
+        self._full = False
+        self._shards = []
+        self._local = threading.local()
+        self._gauges = None
+
+    @property
+    def directory(self):
+        return Config.METRICS_DIR
+
+    def _directory(self):
+        """METRICS_DIR, created when a file is first written there (it may not exist yet, or have been removed)"""
+        os.makedirs(self.directory, exist_ok=True)
+        return self.directory
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def _array(self, name):
+        """
+        A zeroed float64 array of _size + SCRATCH_SLOTS slots, file-backed when METRICS_DIR is set
+
+        If the file cannot be created the array is kept in memory: those
+        samples are missing from /metrics, but recording never fails a request.
+        """
+        length = (self._size + SCRATCH_SLOTS) * 8
+        if self.directory:
+            try:
+                path = os.path.join(self._directory(), f'{self._pid}-{name}.bin')
+                with open(path, 'wb+') as f:
+                    f.truncate(length)
+                    buffer = mmap.mmap(f.fileno(), length)
+                return memoryview(buffer).cast('d')
+            except OSError as e:
+                print(f"⚠️ Metrics: cannot write to {self.directory} ({e}); recording {name} in memory")
+        return memoryview(bytearray(length)).cast('d')
+
+    def shard(self):
+        """This thread's shard; a new thread takes over the shard of one that has exited"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            current = threading.current_thread()
+            with self._lock:
+                for entry in self._shards:
+                    if not entry[0].is_alive():
+                        entry[0] = current
+                        shard = entry[1]
+                        break
+                else:
+                    shard = self._array(f'thread-{len(self._shards)}')
+                    self._shards.append([current, shard])
+            self._local.shard = shard
+        return shard
+
+    def gauges(self):
+        """Shard of the gauges, one per process: a gauge is set, never added to"""
+        if self._gauges is None:
+            with self._lock:
+                if self._gauges is None:
+                    self._gauges = self._array('gauges')
+        return self._gauges
+
+    def slot(self, metric, labels):
+        """First slot of a metric's label set in this process"""
+        slot = self._slots.get((metric.name, labels))
+        if slot is None:
+            slot = self._allocate(metric, labels)
+        return slot
+
+    def _allocate(self, metric, labels):
+        if len(labels) != len(metric.labelnames):
+            raise ValueError(f"{metric.name} takes labels {metric.labelnames}, got {labels}")
+        with self._lock:
+            key = (metric.name, labels)
+            if key in self._slots:
+                return self._slots[key]
+            if self._next + metric.width > self._size:
+                if not self._full:
+                    self._full = True
+                    print(f"⚠️ Metrics: all {self._size} slots in use; new label sets are not exported "
+                          f"(raise METRICS_MAX_SLOTS)")
+                self._slots[key] = self._size
+                return self._size
+            slot = self._next
+            self._next += metric.width
+            self._keys.append((metric.name, labels, slot))
+            if self.directory:
+                try:
+                    with open(os.path.join(self._directory(), f'{self._pid}.keys'), 'a') as f:
+                        f.write(json.dumps([metric.name, list(labels), slot]) + '\n')
+                except OSError as e:
+                    print(f"⚠️ Metrics: cannot write to {self.directory} ({e}); {metric.name} is not exported")
+            self._slots[key] = slot
+            return slot
+
+    def _process_values(self):
+        """[(keys, summed thread shards, gauges or None)] for this process, or every process in METRICS_DIR"""
+        if not self.directory:
+            with self._lock:
+                keys = list(self._keys)
+                shards = [np.frombuffer(shard, dtype=np.float64) for _, shard in self._shards]
+                gauges = np.frombuffer(self._gauges, dtype=np.float64) if self._gauges is not None else None
+            total = np.sum(shards, axis=0) if shards else np.zeros(self._size + SCRATCH_SLOTS)
+            return [(keys, total, gauges)]
+
+        processes = []
+        for keys_file in glob.glob(os.path.join(self.directory, '*.keys')):
+            pid = os.path.basename(keys_file)[:-len('.keys')]
+            with open(keys_file, 'r') as f:
+                # A line still being appended has no newline yet
+                keys = [(name, tuple(labels), slot) for name, labels, slot in
+                        (json.loads(line) for line in f if line.endswith('\n'))]
+            shards = [np.fromfile(path, dtype=np.float64)
+                      for path in glob.glob(os.path.join(self.directory, f'{pid}-thread-*.bin'))]
+            total = np.sum(shards, axis=0) if shards else None
+            gauges_file = os.path.join(self.directory, f'{pid}-gauges.bin')
+            gauges = np.fromfile(gauges_file, dtype=np.float64) if os.path.exists(gauges_file) else None
+            processes.append((keys, total, gauges))
+        return processes
+
+    def collect(self):
+        """{metric name: {label values: slot values}} summed over every shard"""
+        samples = {name: {} for name in self.metrics}
+        for keys, total, gauges in self._process_values():
+            for name, labels, slot in keys:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                source = gauges if metric.kind == 'gauge' else total
+                if source is None or slot + metric.width > len(source):
+                    continue
+                values = source[slot:slot + metric.width]
+                current = samples[name].get(labels)
+                samples[name][labels] = values.copy() if current is None else current + values
+        return samples
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for name, by_labels in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, values in sorted(by_labels.items()):
+                lines.extend(metric.samples(labels, values))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def _number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Metric:
+    kind = None
+    width = 1
+
+    def __init__(self, name, help_text, labelnames=(), registry=None):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    def samples(self, labels, values):
+        return [f"{self.name}{_label_text(self.labelnames, labels)} {_number(values[0])}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        self.registry.shard()[self.registry.slot(self, labels)] += amount
+
+
+class Gauge(Metric):
+    """Per-process value; across processes the gauges of live processes are summed"""
+    kind = 'gauge'
+
+    def set(self, value, labels=()):
+        self.registry.gauges()[self.registry.slot(self, labels)] = value
+
+
+class Histogram(Metric):
+    """Slots: one count per bucket (non-cumulative), the +Inf bucket, then the sum"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        self.width = len(self.buckets) + 2
+        if self.width > SCRATCH_SLOTS:
+            raise ValueError(f"{name}: at most {SCRATCH_SLOTS - 2} buckets")
+        super().__init__(name, help_text, labelnames, registry)
+
+    def observe(self, value, labels=()):
+        slot = self.registry.slot(self, labels)
+        shard = self.registry.shard()
+        # Prometheus buckets are upper bounds inclusive of the value
+        shard[slot + bisect.bisect_left(self.buckets, value)] += 1
+        shard[slot + self.width - 1] += value
+
+    def samples(self, labels, values):
+        names = self.labelnames + ('le',)
+        cumulative = np.cumsum(values[:-1])
+        lines = [
+            f"{self.name}_bucket{_label_text(names, labels + (_number(bound),))} {_number(count)}"
+            for bound, count in zip(self.buckets, cumulative)
+        ]
+        lines.append(f"{self.name}_bucket{_label_text(names, labels + ('+Inf',))} {_number(cumulative[-1])}")
+        lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {_number(values[-1])}")
+        lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {_number(cumulative[-1])}")
+        return lines
+
+
+def prepare_directory(directory):
+    """Create METRICS_DIR, or empty it of a previous server's shards"""
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.bin')) + glob.glob(os.path.join(directory, '*.keys')):
+        os.remove(path)
+
+
+def mark_process_dead(pid):
+    """Drop an exited worker's gauges; its counters and histograms keep counting in the totals"""
+    if Config.METRICS_DIR:
+        try:
+            os.remove(os.path.join(Config.METRICS_DIR, f'{pid}-gauges.bin'))
+        except FileNotFoundError:
+            pass
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = Histogram(
+    'exoml_http_request_duration_seconds', "Time to build the response, by route and model",
+    ('method', 'route', 'status', 'model')
+)
+PREDICTIONS = Counter('exoml_predictions_total', "Predictions returned, by model and label", ('model', 'label'))
+DB_WRITE_SECONDS = Histogram(
+    'exoml_db_write_duration_seconds', "Prediction inserts including commit, single rows or group commits",
+    ('kind',)
+)
+PREDICTION_QUEUE_DEPTH = Gauge('exoml_prediction_log_queue_depth', "Rows waiting in the write-behind buffer")
+NOTEBOOK_RUN_SECONDS = Histogram(
+    'exoml_notebook_run_duration_seconds', "Notebook job duration, by notebook and outcome",
+    ('notebook', 'outcome'), buckets=NOTEBOOK_BUCKETS
+)
+MODEL_LOAD_SECONDS = Histogram(
+    'exoml_model_load_duration_seconds', "Pipeline loads into the model registry, by model and format",
+    ('model', 'format')
+)
+CACHE_LOOKUPS = Counter('exoml_prediction_cache_lookups_total', "Prediction cache lookups, by result", ('result',))
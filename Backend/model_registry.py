@@ -0,0 +1,266 @@
+"""
+Model Registry
+Keeps the trained notebook pipelines warm in memory, preloaded once before gunicorn forks its workers
+"""
+
+import os
+import re
+import json
+import glob
+import time
+import hashlib
+import threading
+from datetime import datetime
+
+import joblib
+
+from config import Config
+from compact_model import load as load_compact
+from feature_vector import FeatureVector
+from metrics import MODEL_LOAD_SECONDS
+import model_store
+
+# Algorithms the notebooks and training.py train; anything else is never looked up on disk
+ALGORITHMS = ('RandomForest', 'LogisticRegression', 'XGBoost')
+# Dataset names reach file paths, so only plain names are resolved (the API also checks SOURCES)
+DATASET_NAME = re.compile(r'^\w+$')
+# The unprefixed "<algorithm>_pipeline.pkl" files predate the dataset prefix; the TESS
+# notebook trained them, and its training columns are the ones they expect
+LEGACY_DATASET = 'TESS'
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in fixed-size chunks so large pickles are never read whole"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Lazily loads `*_pipeline.pkl` files and serves them from memory
+
+    Pipelines are keyed as "<dataset>/<algorithm>" (e.g. "TESS/RandomForest")
+    and served from the model store's promoted version. Every lookup costs an
+    os.stat() of the version pointer and of the pickle; the pickle is only
+    re-read when the resolved file changes *and* its content hash differs
+    from the copy already in memory.
+    """
+
+    def __init__(self, models_dir=None, results_dir=None):
+        self.models_dir = models_dir or Config.MODELS_DIR
+        self.results_dir = results_dir or Config.RESULTS_DIR
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(dataset, algorithm):
+        return f"{dataset}/{algorithm}"
+
+    def resolve(self, dataset, algorithm):
+        """
+        Find the pipeline file for a dataset/algorithm pair
+
+        The promoted version in the model store wins. Before a dataset has one,
+        "<dataset>_<algorithm>_pipeline.pkl" is looked up in models_dir, and for
+        LEGACY_DATASET the unprefixed "<algorithm>_pipeline.pkl" after it.
+
+        Returns:
+            (pipeline path, directory of its result files, store version or None),
+            or None if nothing was trained (or the names are not valid)
+        """
+        if algorithm not in ALGORITHMS or not isinstance(dataset, str) or not DATASET_NAME.match(dataset):
+            return None
+        version_dir = model_store.current_dir(dataset)
+        if version_dir is not None:
+            path = os.path.join(version_dir, 'models', f'{dataset}_{algorithm}_pipeline.pkl')
+            if os.path.exists(path):
+                return path, os.path.join(version_dir, 'results'), os.path.basename(version_dir)
+
+        candidates = [os.path.join(self.models_dir, f'{dataset}_{algorithm}_pipeline.pkl')]
+        if dataset == LEGACY_DATASET:
+            candidates.append(os.path.join(self.models_dir, f'{algorithm}_pipeline.pkl'))
+        for path in candidates:
+            if os.path.exists(path):
+                return path, self.results_dir, None
+        return None
+
+    def resolve_path(self, dataset, algorithm):
+        resolved = self.resolve(dataset, algorithm)
+        return resolved[0] if resolved else None
+
+    def algorithms(self, dataset):
+        """Algorithms that resolve() can find a pipeline for, for one dataset"""
+        names = set()
+        version_dir = model_store.current_dir(dataset)
+        directories = [os.path.join(version_dir, 'models')] if version_dir else []
+        for directory in directories + [self.models_dir]:
+            for path in glob.glob(os.path.join(directory, '*_pipeline.pkl')):
+                name = os.path.basename(path)[:-len('_pipeline.pkl')]
+                if name.startswith(f'{dataset}_'):
+                    names.add(name[len(dataset) + 1:])
+                elif '_' not in name and dataset == LEGACY_DATASET:
+                    # Legacy unprefixed pipeline, trained on LEGACY_DATASET only
+                    names.add(name)
+        return sorted(name for name in names if name in ALGORITHMS)
+
+    def preload(self, datasets):
+        """
+        Load every servable pipeline of the given datasets
+
+        Called by the app factory before gunicorn forks, so the workers start
+        with the pipelines, training columns and medians already in memory and
+        share those pages copy-on-write.
+
+        Returns:
+            {key: None, or the reason the pipeline could not be loaded}
+        """
+        status = {}
+        for dataset in datasets:
+            for algorithm in self.algorithms(dataset):
+                key = self.make_key(dataset, algorithm)
+                try:
+                    self.get(dataset, algorithm)
+                    status[key] = None
+                except Exception as e:
+                    status[key] = str(e)
+                    print(f"⚠️ Could not preload {key}: {e}")
+        return status
+
+    def get(self, dataset, algorithm):
+        """
+        Return the registry entry for a dataset/algorithm pair
+
+        A promotion changes the resolved path, so the new version is loaded on
+        the next lookup. While one thread loads it, the others keep serving
+        the previous pipeline instead of waiting.
+
+        Raises:
+            FileNotFoundError: if no pipeline file exists for the pair
+        """
+        key = self.make_key(dataset, algorithm)
+        resolved = self.resolve(dataset, algorithm)
+        if resolved is None:
+            raise FileNotFoundError(f"No trained pipeline found for {key} in {self.models_dir}")
+        path, results_dir, store_version = resolved
+
+        stat = os.stat(path)
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry["path"] == path and entry["fingerprint"] == fingerprint:
+            return entry
+
+        # Hot swap: only the first caller blocks on the load
+        if not self._lock.acquire(blocking=entry is None):
+            return entry
+        try:
+            # Another thread may have refreshed the entry while we waited
+            entry = self._entries.get(key)
+            if entry is not None and entry["path"] == path and entry["fingerprint"] == fingerprint:
+                return entry
+
+            sha256 = file_sha256(path)
+            if entry is not None and entry["path"] == path and entry["sha256"] == sha256:
+                # File was touched but its content is unchanged - keep the loaded pipeline
+                entry["fingerprint"] = fingerprint
+                return entry
+
+            started = time.perf_counter()
+            entry = self._load(key, dataset, algorithm, path, results_dir, store_version, fingerprint, sha256)
+            MODEL_LOAD_SECONDS.observe(time.perf_counter() - started, (key, entry["format"]))
+            self._entries[key] = entry
+            return entry
+        finally:
+            self._lock.release()
+
+    def _load(self, key, dataset, algorithm, path, results_dir, store_version, fingerprint, sha256):
+        """
+        Load a pipeline together with the artifacts needed to build its input row
+
+        Store versions with a compact export are served from its memory-mapped
+        arrays; everything else is unpickled.
+        """
+        compact = model_store.compact_dir(os.path.dirname(results_dir), dataset, algorithm) if store_version else None
+        # A prefixed and a legacy file with the same content share one copy
+        shared = next((e for e in self._entries.values() if e["path"] == path and e["sha256"] == sha256), None)
+        if shared is not None:
+            pipeline, model_format = shared["pipeline"], shared["format"]
+        elif Config.COMPACT_MODELS and compact and os.path.isdir(compact):
+            pipeline, model_format = load_compact(compact), 'compact'
+        else:
+            pipeline, model_format = joblib.load(path), 'pickle'
+
+        columns = list(getattr(pipeline, 'feature_names_in_', []))
+        columns_file = os.path.join(results_dir, f'{dataset}_training_columns.json')
+        if not columns and os.path.exists(columns_file):
+            with open(columns_file, 'r') as f:
+                columns = json.load(f)
+
+        medians = {}
+        medians_file = os.path.join(results_dir, f'{dataset}_feature_medians.json')
+        if os.path.exists(medians_file):
+            with open(medians_file, 'r') as f:
+                medians = json.load(f)
+
+        # Fitted imputation state from the shared preprocessing library, when the notebook
+        # saved one: supplies categorical modes and any median the JSON file lacks
+        # Imported here because preprocessing -> dataset_store imports file_sha256 from this module
+        from preprocessing import Preprocessor, preprocessor_path
+        preprocessor = None
+        modes = {}
+        prep_file = preprocessor_path(results_dir, dataset)
+        if os.path.exists(prep_file):
+            preprocessor = Preprocessor.load(prep_file)
+            modes = dict(preprocessor.categorical_fill)
+            medians = {
+                **{c: v for c, v in preprocessor.fill_values().items() if c in preprocessor.numeric_columns},
+                **medians
+            }
+
+        if shared is not None:
+            print(f"🔗 {key} shares the {model_format} pipeline of {shared['key']} ({sha256[:12]})")
+        else:
+            print(f"📦 Loaded {model_format} pipeline {key} from {os.path.basename(path)} ({sha256[:12]})")
+
+        return {
+            "key": key,
+            "dataset": dataset,
+            "algorithm": algorithm,
+            "path": path,
+            "pipeline": pipeline,
+            "format": model_format,
+            "store_version": store_version,
+            "columns": columns,
+            "medians": medians,
+            "modes": modes,
+            "preprocessor": preprocessor,
+            "vector": FeatureVector(columns, medians, modes),
+            "fingerprint": fingerprint,
+            "sha256": sha256,
+            "loaded_at": datetime.now().isoformat()
+        }
+
+    def loaded(self):
+        """Describe the pipelines currently held in memory"""
+        return [
+            {
+                "key": entry["key"],
+                "path": entry["path"],
+                "version": entry["sha256"][:12],
+                "store_version": entry["store_version"],
+                "format": entry["format"],
+                "loaded_at": entry["loaded_at"]
+            }
+            for entry in self._entries.values()
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# One registry per process; forked workers start from the master's preloaded entries
+registry = ModelRegistry()
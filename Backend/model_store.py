@@ -0,0 +1,338 @@
+"""
+Model Store
+Immutable, versioned copies of each dataset's trained pipelines, promoted by an atomic pointer swap
+
+    <MODEL_STORE_DIR>/<dataset>/<version>/models/<dataset>_<algorithm>_pipeline.pkl
+    <MODEL_STORE_DIR>/<dataset>/<version>/results/<dataset>_*.json
+    <MODEL_STORE_DIR>/<dataset>/<version>/compact/<dataset>_<algorithm>/   (see compact_model.py)
+    <MODEL_STORE_DIR>/<dataset>/<version>/manifest.json
+    <MODEL_STORE_DIR>/<dataset>/current.json          {"version": ..., "history": [...]}
+
+    python model_store.py TESS                    # list versions
+    python model_store.py TESS --publish          # snapshot static/ as a new version
+    python model_store.py TESS --rollback [VERSION]
+"""
+
+import os
+import sys
+import json
+import glob
+import shutil
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+
+from config import Config
+
+MANIFEST = 'manifest.json'
+CURRENT = 'current.json'
+
+# Result files a pipeline needs at serving time, copied into every version
+RESULT_SUFFIXES = ['_training_columns.json', '_feature_medians.json', '_preprocessor.json', '_metrics.json']
+
+_lock = threading.Lock()
+# Pointer file fingerprint -> parsed pointer, so a lookup costs one os.stat()
+_pointers = {}
+
+
+def _dataset_dir(dataset):
+    return os.path.join(Config.MODEL_STORE_DIR, dataset)
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_pointer(dataset):
+    """The dataset's current.json, or None before the first promotion"""
+    path = os.path.join(_dataset_dir(dataset), CURRENT)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    fingerprint = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = _pointers.get(dataset)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    pointer = _read_json(path)
+    if pointer is not None:
+        _pointers[dataset] = (fingerprint, pointer)
+    return pointer
+
+
+def current_version(dataset):
+    pointer = read_pointer(dataset)
+    return pointer["version"] if pointer else None
+
+
+def version_dir(dataset, version):
+    return os.path.join(_dataset_dir(dataset), version)
+
+
+def current_dir(dataset):
+    """Directory of the promoted version, or None if the dataset has none"""
+    version = current_version(dataset)
+    return version_dir(dataset, version) if version else None
+
+
+def _collect(dataset, source_dir):
+    """Files of a dataset's latest training run under source_dir, as {relative path: absolute path}"""
+    files = {}
+    for path in glob.glob(os.path.join(source_dir, 'models', f'{dataset}_*_pipeline.pkl')):
+        files[f'models/{os.path.basename(path)}'] = path
+    for suffix in RESULT_SUFFIXES:
+        path = os.path.join(source_dir, 'results', f'{dataset}{suffix}')
+        if os.path.exists(path):
+            files[f'results/{dataset}{suffix}'] = path
+    return files
+
+
+def list_versions(dataset):
+    """Manifests of every stored version, newest first"""
+    dataset_dir = _dataset_dir(dataset)
+    if not os.path.isdir(dataset_dir):
+        return []
+    manifests = [
+        _read_json(os.path.join(dataset_dir, name, MANIFEST))
+        for name in os.listdir(dataset_dir)
+        if not name.startswith(('.', CURRENT))
+    ]
+    return sorted((m for m in manifests if m), key=lambda m: m["created_at"], reverse=True)
+
+
+def compact_dir(version_path, dataset, algorithm):
+    return os.path.join(version_path, 'compact', f'{dataset}_{algorithm}')
+
+
+def export_compact(dataset, version_path):
+    """
+    Export every pipeline of a version to the compact serving format
+
+    Returns:
+        {algorithm: None, or the reason it could not be exported}
+    """
+    # Imported here: only publishing needs joblib and the exporter
+    import joblib
+    from compact_model import export_pipeline
+
+    status = {}
+    for path in sorted(glob.glob(os.path.join(version_path, 'models', f'{dataset}_*_pipeline.pkl'))):
+        algorithm = os.path.basename(path)[len(dataset) + 1:-len('_pipeline.pkl')]
+        try:
+            export_pipeline(joblib.load(path), compact_dir(version_path, dataset, algorithm))
+            status[algorithm] = None
+        except Exception as e:
+            # The pickle is still served for this algorithm
+            status[algorithm] = str(e)
+            print(f"⚠️ No compact export for {dataset}/{algorithm}: {e}")
+    return status
+
+
+def publish(dataset, source_dir=None, source=None, promote=None):
+    """
+    Copy a finished run's pipelines and result files into a new immutable version
+
+    The copy, including the compact export of each pipeline, is assembled
+    in a temporary directory and renamed into place, so a version directory
+    is never seen half-written. If an existing
+    version already holds the same files (e.g. a run-cache hit restored
+    them), that version is reused instead of copied again.
+
+    Args:
+        dataset: Dataset the run trained (TESS, Kepler, K2)
+        source_dir: Artifact root with models/ and results/, defaults to TRAINING_OUTPUT_DIR
+        source: What produced the files (notebook name, "training.py", ...)
+        promote: Make the version current, defaults to MODEL_STORE_AUTO_PROMOTE
+
+    Returns:
+        manifest dict of the version, or None if the run left no pipelines
+    """
+    # Imported here because model_registry imports this module
+    from model_registry import file_sha256
+
+    source_dir = source_dir or Config.TRAINING_OUTPUT_DIR
+    promote = Config.MODEL_STORE_AUTO_PROMOTE if promote is None else promote
+    files = _collect(dataset, source_dir)
+    if not any(name.startswith('models/') for name in files):
+        return None
+
+    hashes = {name: file_sha256(path) for name, path in sorted(files.items())}
+    content = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode('utf-8')).hexdigest()
+
+    with _lock:
+        manifest = next((m for m in list_versions(dataset) if m["content_sha256"] == content), None)
+        if manifest is None:
+            created = datetime.now()
+            version = f"{created:%Y%m%d-%H%M%S}-{content[:8]}"
+            dataset_dir = _dataset_dir(dataset)
+            tmp_dir = os.path.join(dataset_dir, f'.tmp-{os.getpid()}-{threading.get_ident()}')
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            for name, path in files.items():
+                target = os.path.join(tmp_dir, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(path, target)
+
+            compact = export_compact(dataset, tmp_dir) if Config.COMPACT_MODELS else {}
+            metrics = _read_json(os.path.join(tmp_dir, 'results', f'{dataset}_metrics.json'))
+            manifest = {
+                "dataset": dataset,
+                "version": version,
+                "content_sha256": content,
+                "files": hashes,
+                "algorithms": sorted(
+                    os.path.basename(name)[len(dataset) + 1:-len('_pipeline.pkl')]
+                    for name in files if name.startswith('models/')
+                ),
+                "compact": compact,
+                "metrics": metrics.get('results', metrics) if isinstance(metrics, dict) else None,
+                "source": source,
+                "created_at": created.isoformat()
+            }
+            _write_json(os.path.join(tmp_dir, MANIFEST), manifest)
+            try:
+                os.rename(tmp_dir, version_dir(dataset, version))
+                print(f"📦 Published {dataset} model version {version}")
+            except OSError:
+                # Another worker published the same files in the same second
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        if promote:
+            _promote(dataset, manifest["version"])
+        prune(dataset)
+    return manifest
+
+
+def publish_run(result):
+    """
+    Publish the pipelines of a successful notebook run and note the version in its result
+
+    Failures are reported in the log; the run itself still succeeded.
+    """
+    if not result.get("success") or not result.get("dataset"):
+        return result
+    try:
+        manifest = publish(result["dataset"], source=result.get("notebook"))
+        result["model_version"] = manifest["version"] if manifest else None
+    except Exception as e:
+        print(f"❌ Error publishing {result['dataset']} models: {e}")
+    return result
+
+
+def _promote(dataset, version):
+    """Point current.json at a version (caller holds the lock)"""
+    if os.path.basename(version) != version or version.startswith('.') or _read_json(os.path.join(version_dir(dataset, version), MANIFEST)) is None:
+        raise LookupError(f"Unknown {dataset} model version: {version}")
+    pointer = read_pointer(dataset) or {"version": None, "history": []}
+    if pointer["version"] == version:
+        return pointer
+    history = [v for v in [pointer["version"], *pointer["history"]] if v and v != version]
+    pointer = {
+        "version": version,
+        "history": history[:Config.MODEL_STORE_KEEP],
+        "promoted_at": datetime.now().isoformat()
+    }
+    _write_json(os.path.join(_dataset_dir(dataset), CURRENT), pointer)
+    print(f"🚀 Promoted {dataset} model version {version}")
+    return pointer
+
+
+def promote(dataset, version):
+    """
+    Make a stored version current
+
+    Serving workers switch on their next lookup; in-flight requests finish
+    on the pipeline they already hold.
+
+    Raises:
+        LookupError: if the version does not exist
+    """
+    with _lock:
+        return _promote(dataset, version)
+
+
+def rollback(dataset, version=None):
+    """
+    Re-promote the previously promoted version, or a specific one
+
+    Rolling back without a version walks the promotion history, so
+    repeated rollbacks keep going further back.
+
+    Raises:
+        LookupError: if there is nothing to roll back to or the version does not exist
+    """
+    with _lock:
+        pointer = read_pointer(dataset)
+        if pointer is None:
+            raise LookupError(f"No promoted {dataset} model version")
+        if version is not None:
+            return _promote(dataset, version)
+
+        history = [v for v in pointer["history"] if os.path.isdir(version_dir(dataset, v))]
+        if not history:
+            raise LookupError(f"No earlier {dataset} model version to roll back to")
+        pointer = {
+            "version": history[0],
+            "history": history[1:],
+            "promoted_at": datetime.now().isoformat(),
+            "rolled_back_from": pointer["version"]
+        }
+        _write_json(os.path.join(_dataset_dir(dataset), CURRENT), pointer)
+        print(f"⏪ Rolled {dataset} back to model version {history[0]}")
+        return pointer
+
+
+def prune(dataset, keep=None):
+    """Delete the oldest versions beyond `keep`, never the current one or its rollback history"""
+    keep = Config.MODEL_STORE_KEEP if keep is None else keep
+    pointer = read_pointer(dataset) or {"version": None, "history": []}
+    protected = {pointer["version"], *pointer["history"]}
+    for manifest in list_versions(dataset)[keep:]:
+        if manifest["version"] not in protected:
+            # Workers that loaded these pipelines keep them in memory
+            shutil.rmtree(version_dir(dataset, manifest["version"]), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned model store")
+    parser.add_argument('dataset', help="dataset name (TESS, Kepler, K2)")
+    parser.add_argument('--publish', action='store_true', help="snapshot the dataset's current artifacts as a new version")
+    parser.add_argument('--no-promote', action='store_true', help="publish without making the version current")
+    parser.add_argument('--promote', metavar='VERSION', help="make a stored version current")
+    parser.add_argument('--rollback', nargs='?', const='', metavar='VERSION', help="re-promote the previous (or given) version")
+    args = parser.parse_args()
+
+    if args.publish:
+        manifest = publish(args.dataset, source='model_store.py', promote=not args.no_promote)
+        if manifest is None:
+            print(f"⚠️ No {args.dataset}_*_pipeline.pkl files in {Config.TRAINING_OUTPUT_DIR}")
+            return 1
+    elif args.promote:
+        promote(args.dataset, args.promote)
+    elif args.rollback is not None:
+        rollback(args.dataset, args.rollback or None)
+
+    print(json.dumps({
+        "dataset": args.dataset,
+        "current": read_pointer(args.dataset),
+        "versions": [
+            {k: m[k] for k in ('version', 'algorithms', 'source', 'created_at')}
+            for m in list_versions(args.dataset)
+        ]
+    }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,14 @@
+import json
+import time
+import zlib
+import hashlib
+
 import numpy as np
+import pandas as pd
+
+from config import Config
+from model_registry import registry
+from prediction_cache import prediction_cache, normalize_features
 
 # Top 3 most important features for each model based on feature importance analysis
 MODEL_FEATURES = {
@@ -132,6 +142,24 @@ MODEL_FEATURES = {
     }
 }
 
+# Heuristic weights applied to the normalized MODEL_FEATURES values (same order)
+MODEL_WEIGHTS = {
+    # Kepler/K2: disposition_score is highly predictive
+    "Kepler": [0.6, 0.25, 0.15],
+    "K2": [0.6, 0.25, 0.15],
+    # TESS: Transit characteristics
+    "TESS": [0.5, 0.3, 0.2],
+    # Light Curve: Shape and periodicity analysis
+    "Light_Curve": [0.3, 0.4, 0.3]
+}
+
+
+# Version of the heuristic model for the prediction cache - changes with its features, weights or noise
+HEURISTIC_VERSION = hashlib.sha256(json.dumps(
+    [MODEL_FEATURES, MODEL_WEIGHTS, Config.PREDICTION_JITTER, Config.PREDICTION_JITTER_SEED],
+    sort_keys=True
+).encode('utf-8')).hexdigest()[:12]
+
 
 def get_model_features(model_name):
     """
@@ -140,6 +168,72 @@ def get_model_features(model_name):
     return MODEL_FEATURES.get(model_name, MODEL_FEATURES["Kepler"])
 
 
+def get_label(prob):
+    """
+    Map an exoplanet probability to a classification label
+    """
+    if prob > 0.7:
+        return "Confirmed Exoplanet"
+    elif prob > 0.5:
+        return "Candidate Exoplanet"
+    return "Not Exoplanet"
+
+
+def get_labels(probs):
+    """
+    Vectorized get_label for an array of probabilities
+    """
+    return np.select(
+        [probs > 0.7, probs > 0.5],
+        ["Confirmed Exoplanet", "Candidate Exoplanet"],
+        default="Not Exoplanet"
+    ).tolist()
+
+
+def _mix64(h):
+    """splitmix64 finalizer over a uint64 array"""
+    with np.errstate(over='ignore'):
+        h = h + np.uint64(0x9E3779B97F4A7C15)
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def _row_normals(model_name, values):
+    """
+    One standard normal per row of `values`, a fixed function of the seed, the model and that row
+
+    Each row's float64 bits are hashed column by column and the hash is
+    turned into a normal with Box-Muller, so a row gets the same noise
+    alone or anywhere in a batch, without a generator per row.
+    """
+    # + 0.0 folds -0.0 into 0.0, which has different bits
+    bits = (np.atleast_2d(np.asarray(values, dtype=np.float64)) + 0.0).view(np.uint64)
+    seed = (Config.PREDICTION_JITTER_SEED << 32) ^ zlib.crc32(model_name.encode('utf-8'))
+    h = np.full(len(bits), seed & 0xFFFFFFFFFFFFFFFF, dtype=np.uint64)
+    for column in bits.T:
+        h = _mix64(h ^ column)
+    # 53-bit uniforms in (0, 1)
+    u1 = ((h >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0 ** 53
+    u2 = ((_mix64(h) >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0 ** 53
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+
+def jitter(model_name, feature_values, size=None):
+    """
+    Noise added to heuristic probabilities
+
+    Returns 0 when PREDICTION_JITTER is 0. Otherwise the noise of each row
+    is derived from PREDICTION_JITTER_SEED and that row's inputs, so the same
+    candidate always gets the same probability, whether it is scored alone
+    or in a batch (feature_values is then one row per candidate).
+    """
+    if Config.PREDICTION_JITTER <= 0:
+        return 0.0 if size is None else np.zeros(size)
+    noise = _row_normals(model_name, feature_values) * Config.PREDICTION_JITTER
+    return float(noise[0]) if size is None else noise
+
+
 def predict_with_model(model_name, input_features):
     """
     Predict exoplanet probability using model-specific features
@@ -179,36 +273,18 @@ def predict_with_model(model_name, input_features):
             return 0.0, "Invalid Input", {"error": "No valid features provided"}
 
         # Model-specific prediction logic
-        if model_name in ["Kepler", "K2"]:
-            # Kepler/K2: disposition_score is highly predictive
-            # Weighted average with emphasis on disposition_score
-            weights = [0.6, 0.25, 0.15]  # disposition_score, signal_to_noise, transit_depth
-            prob = sum(w * v for w, v in zip(weights, feature_values))
-
-        elif model_name == "TESS":
-            # TESS: Transit characteristics
-            weights = [0.5, 0.3, 0.2]  # transit_depth, orbital_period, transit_duration
-            prob = sum(w * v for w, v in zip(weights, feature_values))
-
-        elif model_name == "Light_Curve":
-            # Light Curve: Shape and periodicity analysis
-            weights = [0.3, 0.4, 0.3]  # flux_ratio, transit_shape, periodicity_score
+        weights = MODEL_WEIGHTS.get(model_name)
+        if weights is not None:
             prob = sum(w * v for w, v in zip(weights, feature_values))
-
         else:
             # Default: simple average
             prob = np.mean(feature_values)
 
         # Add some realistic variation
-        prob = float(np.clip(prob + np.random.normal(0, 0.05), 0, 1))
+        prob = float(np.clip(prob + jitter(model_name, feature_values), 0, 1))
 
         # Determine label
-        if prob > 0.7:
-            label = "Confirmed Exoplanet"
-        elif prob > 0.5:
-            label = "Candidate Exoplanet"
-        else:
-            label = "Not Exoplanet"
+        label = get_label(prob)
 
         # Detailed output
         raw_output = {
@@ -224,4 +300,194 @@ def predict_with_model(model_name, input_features):
         return prob, label, raw_output
 
     except Exception as e:
-        return 0.0, "Error", {"error": str(e), "message": "Prediction failed"}
\ No newline at end of file
+        return 0.0, "Error", {"error": str(e), "message": "Prediction failed"}
+
+
+def predict_with_pipeline(dataset, algorithm, input_features):
+    """
+    Predict exoplanet probability with a trained notebook pipeline
+
+    The pipeline is served from the in-process model registry. Its
+    FeatureVector fills the training columns that are not supplied from the
+    saved feature medians; compact pipelines score that NumPy row directly.
+    Pickled pipelines select columns by name, so they still get the row as a
+    one-row DataFrame (see FeatureVector).
+
+    Args:
+        dataset: Dataset the pipeline was trained on (Kepler, K2, TESS)
+        algorithm: Trained algorithm (RandomForest, LogisticRegression, XGBoost)
+        input_features: Dict with feature names and values
+
+    Returns:
+        probability, label, raw_output
+
+    Raises:
+        FileNotFoundError: if no pipeline has been trained for the pair
+        ValueError: if a numeric feature is not a number
+    """
+    entry = registry.get(dataset, algorithm)
+    vector = entry["vector"]
+
+    # Training medians (modes for categoricals) overwritten with the provided values
+    X, used, ignored = vector.row(input_features)
+    if entry["format"] != 'compact':
+        X = vector.frame(X)
+    prob = float(entry["pipeline"].predict_proba(X)[0][1])
+    label = get_label(prob)
+
+    raw_output = {
+        "model_used": entry["key"],
+        "model_type": algorithm,
+        "model_version": entry["sha256"][:12],
+        "store_version": entry.get("store_version"),
+        "features_used": used,
+        "ignored_features": ignored,
+        "imputed_features": [c for c in vector.columns if c not in used],
+        "confidence": prob,
+        "classification": label,
+        "threshold": 0.5
+    }
+
+    return prob, label, raw_output
+
+
+def warm_up(keys):
+    """
+    Score one row of training medians with each loaded pipeline
+
+    A process's first predict_proba pays for lazy imports and first-call setup
+    in pandas and scikit-learn. The app factory runs this in the gunicorn
+    master, so that cost is not repeated by the first request of every worker.
+
+    Args:
+        keys: Registry keys ("TESS/RandomForest", ...)
+
+    Returns:
+        {key: milliseconds, or the error the pipeline raised}
+    """
+    timings = {}
+    for key in keys:
+        dataset, algorithm = key.split('/', 1)
+        started = time.perf_counter()
+        try:
+            predict_with_pipeline(dataset, algorithm, {})
+            timings[key] = round((time.perf_counter() - started) * 1000, 1)
+        except Exception as e:
+            timings[key] = str(e)
+    return timings
+
+
+def predict_cached(model_name, dataset, algorithm, input_features):
+    """
+    Single prediction through the per-worker prediction cache
+
+    Scores with the trained pipeline when an algorithm is given, otherwise
+    with the heuristic model. Pipeline entries are keyed by the pipeline's
+    content hash, so replacing the file invalidates them.
+
+    Returns:
+        probability, label, raw_output, cache_hit
+
+    Raises:
+        FileNotFoundError: if no pipeline has been trained for the pair
+        ValueError: if a numeric pipeline feature is not a number
+    """
+    if algorithm:
+        entry = registry.get(dataset, algorithm)
+        model_key, version = entry["key"], entry["sha256"]
+    else:
+        model_key, version = model_name, HEURISTIC_VERSION
+
+    features = normalize_features(input_features)
+    cached = prediction_cache.get(model_key, version, features)
+    if cached is not None:
+        return (*cached, True)
+
+    if algorithm:
+        result = predict_with_pipeline(dataset, algorithm, input_features)
+    else:
+        result = predict_with_model(model_name, input_features)
+    if result[1] != "Error":
+        prediction_cache.put(model_key, version, features, result)
+    return (*result, False)
+
+
+def predict_batch_with_model(model_name, rows):
+    """
+    Vectorized predict_with_model for many rows at once
+
+    Builds one 2-D array of the model's MODEL_FEATURES, normalizes it with the
+    feature min/max in a single NumPy expression and applies the model weights
+    as a matrix product.
+
+    Args:
+        model_name: Name of the model (Kepler, K2, TESS, Light_Curve)
+        rows: DataFrame with one row per candidate
+
+    Returns:
+        probabilities (np.ndarray), labels (list)
+    """
+    model_config = MODEL_FEATURES.get(model_name, MODEL_FEATURES["Kepler"])
+    feature_defs = model_config["features"]
+
+    mins = np.array([f["min"] for f in feature_defs], dtype=float)
+    maxs = np.array([f["max"] for f in feature_defs], dtype=float)
+    defaults = np.array([f["default"] for f in feature_defs], dtype=float)
+
+    values = np.empty((len(rows), len(feature_defs)), dtype=float)
+    for j, feature_def in enumerate(feature_defs):
+        name = feature_def["name"]
+        if name in rows.columns:
+            values[:, j] = pd.to_numeric(rows[name], errors='coerce').to_numpy(dtype=float)
+        else:
+            values[:, j] = np.nan
+
+    provided = ~np.isnan(values)
+    normalized = np.clip((values - mins) / (maxs - mins), 0, 1)
+    # Missing values fall back to the (unclamped) normalized default
+    normalized = np.where(provided, normalized, (defaults - mins) / (maxs - mins))
+
+    weights = MODEL_WEIGHTS.get(model_name)
+    if weights is not None:
+        probs = normalized @ np.asarray(weights, dtype=float)
+    else:
+        probs = normalized.mean(axis=1)
+
+    # Add some realistic variation
+    probs = np.clip(probs + jitter(model_name, normalized, size=len(probs)), 0, 1)
+
+    return probs, get_labels(probs)
+
+
+def predict_batch_with_pipeline(dataset, algorithm, rows, chunk_size=5000):
+    """
+    Score many rows with a trained notebook pipeline
+
+    The pipeline's FeatureVector turns the rows into one matrix, filling
+    missing training columns from the saved feature medians, and
+    predict_proba is called once per chunk of rows.
+
+    Args:
+        dataset: Dataset the pipeline was trained on (Kepler, K2, TESS)
+        algorithm: Trained algorithm (RandomForest, LogisticRegression, XGBoost)
+        rows: DataFrame with one row per candidate
+        chunk_size: Maximum number of rows per predict_proba call
+
+    Returns:
+        probabilities (np.ndarray), labels (list)
+
+    Raises:
+        FileNotFoundError: if no pipeline has been trained for the pair
+    """
+    entry = registry.get(dataset, algorithm)
+    vector = entry["vector"]
+    X = vector.matrix(rows)
+
+    probs = np.empty(len(X), dtype=float)
+    for start in range(0, len(X), chunk_size):
+        chunk = X[start:start + chunk_size]
+        if entry["format"] != 'compact':
+            chunk = vector.frame(chunk)
+        probs[start:start + chunk_size] = entry["pipeline"].predict_proba(chunk)[:, 1]
+
+    return probs, get_labels(probs)
@@ -8,8 +8,10 @@ import json
 import re
 from datetime import datetime
 
+from artifact_index import BASE_DIR, list_artifacts
 
-def parse_notebook_output(notebook_name, result, execution_start_time):
+
+def parse_notebook_output(notebook_name, result, execution_start_time, profile=None):
     """
     Parse notebook execution result and return user-friendly output
     
@@ -17,6 +19,7 @@ def parse_notebook_output(notebook_name, result, execution_start_time):
         notebook_name: Name of the executed notebook
         result: subprocess.CompletedProcess result
         execution_start_time: When execution started
+        profile: Optional per-cell profile from build_profile()
         
     Returns:
         dict: Formatted output for API response
@@ -28,18 +31,73 @@ def parse_notebook_output(notebook_name, result, execution_start_time):
     
     # Check if execution was successful
     if result.returncode == 0:
-        return parse_success(notebook_name, dataset_name, execution_time)
+        return parse_success(notebook_name, dataset_name, execution_time, profile)
     else:
-        return parse_failure(notebook_name, result, execution_time)
+        return parse_failure(notebook_name, result, execution_time, profile)
+
 
+def _cell_label(source, max_length=80):
+    """First meaningful line of a cell, used to recognise it across runs"""
+    for line in source.splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            return line if len(line) <= max_length else line[:max_length - 3] + '...'
+    return ''
 
-def parse_success(notebook_name, dataset_name, execution_time):
+
+def build_profile(cells, run_id=None):
+    """
+    Summarize per-cell measurements into the `profile` section of a result
+    
+    Args:
+        cells: List of dicts with cell, source, seconds, peak_rss_mb, output_bytes, status
+        run_id: Identifier of the run the measurements belong to
+        
+    Returns:
+        dict or None if there are no measurements
+    """
+    if not cells:
+        return None
+    
+    profile_cells = [
+        {
+            "cell": cell["cell"],
+            "label": _cell_label(cell.get("source", '')),
+            "seconds": round(cell["seconds"], 3),
+            "peak_rss_mb": round(cell["peak_rss_mb"], 1) if cell.get("peak_rss_mb") is not None else None,
+            "output_bytes": cell.get("output_bytes", 0),
+            "status": cell.get("status", "ok")
+        }
+        for cell in cells
+    ]
+    
+    slowest = max(profile_cells, key=lambda c: c["seconds"])
+    peaks = [c["peak_rss_mb"] for c in profile_cells if c["peak_rss_mb"] is not None]
+    
+    return {
+        "run_id": run_id,
+        "cells": profile_cells,
+        "total_cell_seconds": round(sum(c["seconds"] for c in profile_cells), 3),
+        "peak_rss_mb": max(peaks) if peaks else None,
+        "total_output_bytes": sum(c["output_bytes"] for c in profile_cells),
+        "slowest_cell": {
+            "cell": slowest["cell"],
+            "label": slowest["label"],
+            "seconds": slowest["seconds"]
+        }
+    }
+
+
+def parse_success(notebook_name, dataset_name, execution_time, profile=None):
     """Parse successful notebook execution"""
     
-    # Try to load metrics from saved JSON file
-    metrics_file = os.path.join('static', 'results', f'{dataset_name}_metrics.json')
-    training_cols_file = os.path.join('static', 'results', f'{dataset_name}_training_columns.json')
-    medians_file = os.path.join('static', 'results', f'{dataset_name}_feature_medians.json')
+    # Everything the run wrote for this dataset, from the artifact index
+    indexed = {}
+    for artifact in list_artifacts(dataset=dataset_name, root='static'):
+        indexed.setdefault(artifact["kind"], []).append(artifact)
+    
+    def indexed_path(kind):
+        return indexed[kind][0]["path"] if kind in indexed else None
     
     results = {
         "models_trained": [],
@@ -70,9 +128,10 @@ def parse_success(notebook_name, dataset_name, execution_time):
     }
     
     # Read metrics if available
-    if os.path.exists(metrics_file):
+    metrics_file = indexed_path('metrics')
+    if metrics_file:
         try:
-            with open(metrics_file, 'r') as f:
+            with open(os.path.join(BASE_DIR, metrics_file), 'r') as f:
                 metrics_data = json.load(f)
                 
                 # Handle both simple dict and nested 'results' structure
@@ -99,56 +158,21 @@ def parse_success(notebook_name, dataset_name, execution_time):
                                 "auc": round(model_data.get('auc', 0) * 100, 2) if model_data.get('auc') else None
                             }
                 
-                artifacts["data_files"]["metrics"] = metrics_file.replace('\\', '/')
+                artifacts["data_files"]["metrics"] = metrics_file
         except Exception as e:
             print(f"Error reading metrics file: {e}")
     
-    # Check for training columns file
-    if os.path.exists(training_cols_file):
-        artifacts["data_files"]["training_columns"] = training_cols_file.replace('\\', '/')
-    
-    # Check for medians file
-    if os.path.exists(medians_file):
-        artifacts["data_files"]["feature_medians"] = medians_file.replace('\\', '/')
-    
-    # Find top features files
-    results_dir = os.path.join('static', 'results')
-    if os.path.exists(results_dir):
-        for file in os.listdir(results_dir):
-            if file.startswith(dataset_name) and 'top_features' in file and file.endswith('.json'):
-                artifacts["data_files"]["top_features"].append(os.path.join('static', 'results', file).replace('\\', '/'))
-    
-    # Find saved models
-    models_dir = os.path.join('static', 'models')
-    if os.path.exists(models_dir):
-        for file in os.listdir(models_dir):
-            # Match both "ModelName_pipeline.pkl" and "Dataset_ModelName_pipeline.pkl" patterns
-            if file.endswith('_pipeline.pkl'):
-                model_path = os.path.join('static', 'models', file).replace('\\', '/')
-                artifacts["models"]["files"].append(model_path)
-        artifacts["models"]["count"] = len(artifacts["models"]["files"])
-    
-    # Find generated plots and categorize them
-    plots_dir = os.path.join('static', 'plots')
-    if os.path.exists(plots_dir):
-        for file in os.listdir(plots_dir):
-            if file.startswith(dataset_name) and file.endswith('.png'):
-                plot_path = os.path.join('static', 'plots', file).replace('\\', '/')
-                
-                # Categorize plot by type
-                if 'confusion' in file.lower():
-                    artifacts["plots"]["by_type"]["confusion_matrices"].append(plot_path)
-                elif 'roc' in file.lower():
-                    artifacts["plots"]["by_type"]["roc_curves"].append(plot_path)
-                elif 'topk' in file.lower() or 'feature' in file.lower():
-                    artifacts["plots"]["by_type"]["feature_importance"].append(plot_path)
-                else:
-                    artifacts["plots"]["by_type"]["other"].append(plot_path)
-        
-        # Calculate total plot count
-        artifacts["plots"]["count"] = sum([
-            len(plots) for plots in artifacts["plots"]["by_type"].values()
-        ])
+    artifacts["data_files"]["training_columns"] = indexed_path('training_columns')
+    artifacts["data_files"]["feature_medians"] = indexed_path('feature_medians')
+    artifacts["data_files"]["top_features"] = [a["path"] for a in indexed.get('top_features', [])]
+    
+    artifacts["models"]["files"] = [a["path"] for a in indexed.get('model', [])]
+    artifacts["models"]["count"] = len(artifacts["models"]["files"])
+    
+    # Plots are categorized when they are indexed
+    for plot in indexed.get('plot', []):
+        artifacts["plots"]["by_type"][plot["category"]].append(plot["path"])
+    artifacts["plots"]["count"] = len(indexed.get('plot', []))
     
     # Generate comprehensive next steps
     next_steps = []
@@ -181,6 +205,10 @@ def parse_success(notebook_name, dataset_name, execution_time):
     if artifacts["data_files"]["training_columns"]:
         next_steps.append(f"🔧 Training configuration saved - ready for production use")
     
+    if profile:
+        slowest = profile["slowest_cell"]
+        next_steps.append(f"⏱️ Slowest cell: #{slowest['cell']} {slowest['label']} ({slowest['seconds']:.1f}s)")
+    
     if not next_steps:
         next_steps.append("✅ Notebook executed successfully")
     
@@ -194,11 +222,12 @@ def parse_success(notebook_name, dataset_name, execution_time):
         "results": results,
         "artifacts": artifacts,
         "warnings": [],
-        "next_steps": next_steps
+        "next_steps": next_steps,
+        "profile": profile
     }
 
 
-def parse_failure(notebook_name, result, execution_time):
+def parse_failure(notebook_name, result, execution_time, profile=None):
     """Parse failed notebook execution"""
     
     dataset_name = notebook_name.replace('_Exoplanet_Modeling_FlaskReady.ipynb', '')
@@ -274,15 +303,29 @@ def parse_failure(notebook_name, result, execution_time):
             "traceback": traceback_lines if traceback_lines else [error_output[:500]]
         },
         "troubleshooting": troubleshooting,
-        "artifacts": {}
+        "artifacts": {},
+        "profile": profile
     }
 
 
-def parse_timeout_error(notebook_name, execution_time, timeout_seconds):
+def parse_timeout_error(notebook_name, execution_time, timeout_seconds, profile=None):
     """Parse timeout error"""
     
     dataset_name = notebook_name.replace('_Exoplanet_Modeling_FlaskReady.ipynb', '')
     
+    troubleshooting = [
+        f"⏱️ Increase timeout in railway.json (current: {timeout_seconds}s)",
+        "🔧 Optimize notebook by reducing dataset size",
+        "💻 Consider using a more powerful Railway plan",
+        "📊 Review cell execution times to identify bottlenecks",
+        "🎯 Consider splitting notebook into smaller chunks"
+    ]
+    if profile:
+        slowest = profile["slowest_cell"]
+        troubleshooting[3] = (
+            f"📊 Slowest cell: #{slowest['cell']} {slowest['label']} ({slowest['seconds']:.1f}s) - see profile"
+        )
+    
     return {
         "success": False,
         "error": "Execution timeout",
@@ -296,12 +339,7 @@ def parse_timeout_error(notebook_name, execution_time, timeout_seconds):
             "error_message": f"Execution time exceeded {timeout_seconds}s limit",
             "timeout_limit": timeout_seconds
         },
-        "troubleshooting": [
-            f"⏱️ Increase timeout in railway.json (current: {timeout_seconds}s)",
-            "🔧 Optimize notebook by reducing dataset size",
-            "💻 Consider using a more powerful Railway plan",
-            "📊 Review cell execution times to identify bottlenecks",
-            "🎯 Consider splitting notebook into smaller chunks"
-        ],
-        "artifacts": {}
+        "troubleshooting": troubleshooting,
+        "artifacts": {},
+        "profile": profile
     }
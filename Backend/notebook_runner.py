@@ -0,0 +1,162 @@
+"""
+Notebook Runner
+Executes a training notebook and returns the parsed, user-friendly result
+"""
+
+import json
+import uuid
+import subprocess
+from datetime import datetime
+
+import nbformat
+
+from config import Config
+from dataset_store import SOURCES
+from notebook_parser import parse_notebook_output, parse_timeout_error, build_profile
+from utils import save_cell_profile
+import run_cache
+import artifact_index
+import model_store
+
+
+def execute_notebook(notebook_name, notebook_path, timeout_seconds=None):
+    """
+    Execute a notebook in place
+
+    Uses the warm kernel pool by default; set NOTEBOOK_ENGINE=nbconvert to
+    start a fresh `jupyter nbconvert` process for every run instead. The
+    per-cell profile of the run is returned in the result and stored so
+    cell regressions can be tracked across runs. The files the run wrote are
+    added to the artifact index before the result is parsed. Successful runs
+    are published to the model store and saved to the run cache.
+
+    Args:
+        notebook_name: File name of the notebook (used for reporting)
+        notebook_path: Absolute path to the notebook
+        timeout_seconds: Execution limit, defaults to Config.NOTEBOOK_TIMEOUT
+
+    Returns:
+        dict: parse_notebook_output / parse_timeout_error payload
+    """
+    timeout_seconds = timeout_seconds or Config.NOTEBOOK_TIMEOUT
+
+    # Hash the inputs before running so the key matches what was trained
+    cache_key, cache_inputs = run_cache.compute_run_key(notebook_path)
+    before = run_cache.snapshot_artifacts(artifact_scope(notebook_name))
+
+    if Config.NOTEBOOK_ENGINE == 'nbconvert':
+        parsed = execute_with_nbconvert(notebook_name, notebook_path, timeout_seconds, before)
+    else:
+        parsed = execute_with_kernel_pool(notebook_name, notebook_path, timeout_seconds, before)
+
+    save_cell_profile(notebook_name, parsed.get("profile"))
+
+    parsed["cache"] = {"hit": False, "key": cache_key}
+    model_store.publish_run(parsed)
+    if parsed.get("success"):
+        try:
+            run_cache.store(cache_key, cache_inputs, notebook_name, parsed, before, artifact_scope(notebook_name))
+        except Exception as e:
+            print(f"❌ Error caching run: {e}")
+    return parsed
+
+
+def artifact_scope(notebook_name):
+    """
+    Dataset whose `<dataset>_*` artifacts a notebook writes, or None for any other notebook
+
+    Run-all executes the dataset notebooks concurrently; scoping each run's
+    before/after snapshots keeps a sibling's outputs out of its cache entry
+    and index records.
+    """
+    dataset = notebook_name.replace('_Exoplanet_Modeling_FlaskReady.ipynb', '')
+    return dataset if dataset in SOURCES else None
+
+
+def index_artifacts(notebook_name, before):
+    """Index the artifacts written since the `before` snapshot"""
+    if before is None:
+        return
+    try:
+        after = run_cache.snapshot_artifacts(artifact_scope(notebook_name))
+        artifact_index.record_changes(before, after, notebook_name)
+    except Exception as e:
+        print(f"❌ Error indexing artifacts: {e}")
+
+
+def execute_with_nbconvert(notebook_name, notebook_path, timeout_seconds, before=None):
+    """Run the notebook through a cold `jupyter nbconvert --execute` subprocess"""
+    # Track execution time
+    execution_start = datetime.now()
+
+    try:
+        result = subprocess.run([
+            'jupyter', 'nbconvert', '--to', 'notebook', '--execute',
+            '--inplace', notebook_path
+        ], capture_output=True, text=True, timeout=timeout_seconds)
+    except subprocess.TimeoutExpired:
+        index_artifacts(notebook_name, before)
+        execution_time = (datetime.now() - execution_start).total_seconds()
+        return parse_timeout_error(notebook_name, execution_time, timeout_seconds)
+
+    index_artifacts(notebook_name, before)
+    profile = build_profile(cells_from_notebook(notebook_path), run_id=uuid.uuid4().hex)
+    return parse_notebook_output(notebook_name, result, execution_start, profile)
+
+
+def cells_from_notebook(notebook_path):
+    """
+    Read per-cell wall time and output size from an executed notebook
+
+    nbclient records execute_input/execute_reply timestamps in each cell's
+    metadata; peak RSS is not available for out-of-process runs.
+    """
+    try:
+        nb = nbformat.read(notebook_path, as_version=4)
+    except Exception:
+        return []
+
+    cells = []
+    for index, cell in enumerate(nb.cells):
+        timing = cell.get('metadata', {}).get('execution', {})
+        started = timing.get('iopub.execute_input')
+        finished = timing.get('shell.execute_reply')
+        if cell.cell_type != 'code' or not (started and finished):
+            continue
+        seconds = (
+            datetime.fromisoformat(finished.replace('Z', '+00:00')) -
+            datetime.fromisoformat(started.replace('Z', '+00:00'))
+        ).total_seconds()
+        errored = any(output.get('output_type') == 'error' for output in cell.outputs)
+        cells.append({
+            "cell": index,
+            "source": cell.source,
+            "seconds": seconds,
+            "peak_rss_mb": None,
+            "output_bytes": len(json.dumps(cell.outputs)),
+            "status": 'error' if errored else 'ok'
+        })
+    return cells
+
+
+def execute_with_kernel_pool(notebook_name, notebook_path, timeout_seconds, before=None):
+    """Run the notebook cell by cell on a pre-warmed kernel"""
+    from kernel_pool import kernel_pool
+
+    execution_start = datetime.now()
+    run = kernel_pool.run_notebook(notebook_path, timeout_seconds)
+    index_artifacts(notebook_name, before)
+    profile = build_profile(run["cells"], run_id=uuid.uuid4().hex)
+
+    if run["timed_out"]:
+        execution_time = (datetime.now() - execution_start).total_seconds()
+        return parse_timeout_error(notebook_name, execution_time, timeout_seconds, profile)
+
+    # Shape the run like a finished nbconvert process for the parser
+    result = subprocess.CompletedProcess(
+        args=[notebook_path],
+        returncode=0 if run["success"] else 1,
+        stdout='',
+        stderr=run["stderr"]
+    )
+    return parse_notebook_output(notebook_name, result, execution_start, profile)
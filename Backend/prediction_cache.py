@@ -0,0 +1,131 @@
+"""
+Prediction Cache
+Memoizes single predictions for repeated feature vectors, one cache per worker process
+"""
+
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+from config import Config
+from metrics import CACHE_LOOKUPS
+
+
+def normalize_features(features):
+    """
+    Turn a feature dict into a hashable, order-independent tuple
+
+    Numeric values (including numeric strings) are compared as floats so
+    {"orbital_period": 10} and {"orbital_period": "10.0"} share an entry.
+    """
+    items = []
+    for name, value in features.items():
+        if not isinstance(value, bool):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                value = str(value)
+        items.append((str(name), value))
+    return tuple(sorted(items))
+
+
+class PredictionCache:
+    """
+    LRU cache with a per-entry TTL, keyed by (model, version, feature tuple)
+
+    Each model remembers the version its entries were computed with. The
+    first lookup that sees a new version (e.g. a pipeline file was replaced
+    and the registry reloaded it) drops every entry of that model.
+    """
+
+    def __init__(self, max_size=None, ttl_seconds=None):
+        self.max_size = Config.PREDICTION_CACHE_SIZE if max_size is None else max_size
+        self.ttl_seconds = Config.PREDICTION_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def _check_version(self, model, version):
+        """Drop a model's entries when its version changes (caller holds the lock)"""
+        if self._versions.get(model) == version:
+            return
+        stale = [key for key in self._entries if key[0] == model]
+        for key in stale:
+            del self._entries[key]
+        if model in self._versions:
+            self.invalidations += 1
+        self._versions[model] = version
+
+    def get(self, model, version, features):
+        """
+        Look up a cached prediction
+
+        Returns:
+            (probability, label, raw_output), or None on a miss. raw_output
+            is a copy, so callers may change it without touching the entry
+        """
+        if not self.enabled:
+            return None
+        key = (model, version, features)
+        with self._lock:
+            self._check_version(model, version)
+            item = self._entries.get(key)
+            if item is not None and (self.ttl_seconds <= 0 or item[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc(('hit',))
+                value = item[1]
+            else:
+                value = None
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                CACHE_LOOKUPS.inc(('miss',))
+        return copy.deepcopy(value) if value is not None else None
+
+    def put(self, model, version, features, value):
+        if not self.enabled:
+            return
+        key = (model, version, features)
+        expires = time.monotonic() + self.ttl_seconds
+        # The caller goes on to return (and may change) its own copy
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._check_version(model, version)
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+# One cache per worker process
+prediction_cache = PredictionCache()
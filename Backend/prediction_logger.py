@@ -0,0 +1,146 @@
+"""
+Write-Behind Prediction Logger
+Takes prediction inserts off the request path and group-commits them in the background
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+
+from config import Config
+from metrics import PREDICTION_QUEUE_DEPTH
+from utils import prediction_row, save_prediction, save_predictions
+
+_STOP = object()
+
+
+class PredictionLogger:
+    """
+    Bounded in-memory buffer of prediction rows flushed by one background thread
+
+    Rows are written with a single executemany + COMMIT once `batch_size` rows
+    are buffered or `flush_ms` milliseconds have passed since the first one.
+    When the buffer is full the row is written synchronously instead of
+    being dropped.
+    """
+
+    def __init__(self, batch_size=None, flush_ms=None, max_queue=None):
+        self.batch_size = batch_size or Config.PREDICTION_LOG_BATCH_SIZE
+        self.flush_seconds = (flush_ms or Config.PREDICTION_LOG_FLUSH_MS) / 1000.0
+        self.max_queue = max_queue or Config.PREDICTION_LOG_QUEUE_SIZE
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.flushed = 0
+        self.batches = 0
+        self.overflows = 0
+        self.errors = 0
+        atexit.register(self.stop)
+
+    def _ensure_started(self):
+        """Start the flusher in this process (a forked worker starts its own)"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._thread = threading.Thread(target=self._run, name='prediction-logger', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def log(self, dataset, model, features, probability, label, raw_output):
+        """Queue one prediction for the next group commit"""
+        self._ensure_started()
+        row = prediction_row(dataset, model, features, probability, label, raw_output)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Back-pressure: pay the disk latency rather than lose the row
+            self.overflows += 1
+            save_prediction(dataset, model, features, probability, label, raw_output)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            PREDICTION_QUEUE_DEPTH.set(self._queue.qsize())
+            self._flush(batch)
+            if stop:
+                self._drain()
+                return
+
+    def _drain(self):
+        """Write whatever is still buffered"""
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            save_predictions(batch)
+            self.flushed += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.errors += len(batch)
+            print(f"❌ Error flushing {len(batch)} prediction(s): {e}")
+
+    def stop(self, timeout=10):
+        """Flush the buffer and stop the background thread"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._drain()
+
+    def stats(self):
+        return {
+            "enabled": Config.PREDICTION_WRITE_BEHIND,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "overflows": self.overflows,
+            "errors": self.errors
+        }
+
+
+prediction_logger = PredictionLogger()
+
+
+def log_prediction(dataset, model, features, probability, label, raw_output):
+    """Record a prediction, buffered when PREDICTION_WRITE_BEHIND is enabled"""
+    if Config.PREDICTION_WRITE_BEHIND:
+        prediction_logger.log(dataset, model, features, probability, label, raw_output)
+    else:
+        save_prediction(dataset, model, features, probability, label, raw_output)
@@ -0,0 +1,224 @@
+"""
+Shared Preprocessing
+Column selection, imputation and outlier removal used by the notebooks and the API
+"""
+
+import os
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import SOURCES
+
+# How each dataset's label column becomes the training Target
+TARGETS = {
+    "TESS": {
+        "column": "disposition",
+        # PC, CP, KP, APC = planet (1); FP, FA = false positive (0)
+        "mapping": {'PC': 1, 'CP': 1, 'KP': 1, 'APC': 1, 'FP': 0, 'FA': 0}
+    },
+    "Kepler": {
+        "column": "final_disposition",
+        "mapping": {'CONFIRMED': 1, 'CANDIDATE': 1, 'FALSE POSITIVE': 0}
+    },
+    "K2": {
+        "column": "disposition",
+        "mapping": {'CONFIRMED': 2, 'CANDIDATE': 1, 'FALSE POSITIVE': 0}
+    }
+}
+
+
+def select_columns(df, dataset):
+    """Keep the dataset's selected source columns and rename them, like the notebooks' rename_map"""
+    mapping = SOURCES[dataset]["columns"]
+    df = df.rename(columns=lambda c: c.strip())
+    return df[[c for c in mapping if c in df.columns]].rename(columns=mapping)
+
+
+def make_target(df, dataset, target='Target'):
+    """Drop rows with an unknown disposition and add the integer Target column"""
+    spec = TARGETS[dataset]
+    labels = df[spec["column"]]
+    df = df[labels.isin(list(spec["mapping"]))].copy()
+    df[target] = df[spec["column"]].map(spec["mapping"]).astype(int)
+    return df
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class Preprocessor:
+    """
+    Fit/transform imputation and extreme-outlier removal
+
+    Numeric columns are handled as one 2-D float block: fill values come from
+    a single nanmedian/nanmean call, both quantiles from a single quantile
+    call, and imputation is one np.where. Categorical columns are filled with
+    their mode. The fitted state is a few small lists, saved as JSON.
+
+    Args:
+        numeric_strategy: "median" or "mean" for numeric fill values
+        lower_q, upper_q: Quantiles the outlier fences are built from
+        multiplier: Fences sit multiplier * (upper_q - lower_q) beyond the quantiles
+        exclude: Columns left untouched (e.g. the Target)
+    """
+
+    def __init__(self, numeric_strategy='median', lower_q=0.01, upper_q=0.99, multiplier=3.0, exclude=('Target',)):
+        if numeric_strategy not in ('median', 'mean'):
+            raise ValueError(f"Unknown numeric_strategy: {numeric_strategy}")
+        self.numeric_strategy = numeric_strategy
+        self.lower_q = lower_q
+        self.upper_q = upper_q
+        self.multiplier = multiplier
+        self.exclude = list(exclude)
+        self.numeric_columns = []
+        self.categorical_columns = []
+        self.numeric_fill = None
+        self.categorical_fill = {}
+        self.lower = None
+        self.upper = None
+
+    @property
+    def fitted(self):
+        return self.numeric_fill is not None
+
+    def fit(self, df):
+        """Learn fill values and outlier fences from a DataFrame"""
+        columns = [c for c in df.columns if c not in self.exclude]
+        self.numeric_columns = [c for c in columns if _is_numeric(df[c])]
+        self.categorical_columns = [c for c in columns if not _is_numeric(df[c])]
+
+        X = df[self.numeric_columns].to_numpy(dtype=float)
+        with warnings.catch_warnings():
+            # All-NaN columns get a NaN fill value, like pandas' median()
+            warnings.simplefilter('ignore', RuntimeWarning)
+            reduce = np.nanmedian if self.numeric_strategy == 'median' else np.nanmean
+            self.numeric_fill = reduce(X, axis=0) if len(X) else np.full(X.shape[1], np.nan)
+
+            # Fences are computed on the imputed data, as the notebooks did
+            X = np.where(np.isnan(X), self.numeric_fill, X)
+            q_low, q_high = np.nanquantile(X, [self.lower_q, self.upper_q], axis=0) if len(X) else (
+                np.full(X.shape[1], np.nan), np.full(X.shape[1], np.nan))
+        iqr = q_high - q_low
+        self.lower = q_low - self.multiplier * iqr
+        self.upper = q_high + self.multiplier * iqr
+
+        self.categorical_fill = {}
+        for c in self.categorical_columns:
+            mode = df[c].mode()
+            if not mode.empty:
+                self.categorical_fill[c] = mode.iloc[0]
+        return self
+
+    def _check_fitted(self):
+        if not self.fitted:
+            raise RuntimeError("Preprocessor is not fitted")
+
+    def impute(self, df):
+        """Return a copy of df with missing values filled"""
+        self._check_fitted()
+        df = df.copy()
+        numeric = [c for c in self.numeric_columns if c in df.columns]
+        if numeric:
+            idx = [self.numeric_columns.index(c) for c in numeric]
+            X = df[numeric].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            df[numeric] = np.where(np.isnan(X), self.numeric_fill[idx], X)
+        fill = {c: v for c, v in self.categorical_fill.items() if c in df.columns}
+        if fill:
+            df = df.fillna(fill)
+        return df
+
+    def outlier_mask(self, df):
+        """Boolean array, True for rows inside every fence (missing values never count as outliers)"""
+        self._check_fitted()
+        numeric = [c for c in self.numeric_columns if c in df.columns]
+        if not numeric:
+            return np.ones(len(df), dtype=bool)
+        idx = [self.numeric_columns.index(c) for c in numeric]
+        X = df[numeric].to_numpy(dtype=float)
+        outside = (X < self.lower[idx]) | (X > self.upper[idx])
+        return ~outside.any(axis=1)
+
+    def transform(self, df, drop_outliers=False):
+        """Impute, then optionally drop rows outside the outlier fences"""
+        df = self.impute(df)
+        if drop_outliers:
+            df = df[self.outlier_mask(df)]
+        return df
+
+    def fit_transform(self, df, drop_outliers=True):
+        return self.fit(df).transform(df, drop_outliers=drop_outliers)
+
+    def fill_values(self):
+        """Fill value per column: numeric medians/means and categorical modes"""
+        self._check_fitted()
+        values = {c: float(v) for c, v in zip(self.numeric_columns, self.numeric_fill) if not np.isnan(v)}
+        values.update(self.categorical_fill)
+        return values
+
+    def to_dict(self):
+        self._check_fitted()
+
+        def floats(arr):
+            return [None if np.isnan(v) else float(v) for v in arr]
+
+        return {
+            "numeric_strategy": self.numeric_strategy,
+            "lower_q": self.lower_q,
+            "upper_q": self.upper_q,
+            "multiplier": self.multiplier,
+            "exclude": self.exclude,
+            "numeric_columns": self.numeric_columns,
+            "numeric_fill": floats(self.numeric_fill),
+            "lower": floats(self.lower),
+            "upper": floats(self.upper),
+            "categorical_columns": self.categorical_columns,
+            "categorical_fill": {c: str(v) for c, v in self.categorical_fill.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        prep = cls(
+            numeric_strategy=state["numeric_strategy"],
+            lower_q=state["lower_q"],
+            upper_q=state["upper_q"],
+            multiplier=state["multiplier"],
+            exclude=state["exclude"]
+        )
+
+        def array(values):
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+        prep.numeric_columns = state["numeric_columns"]
+        prep.numeric_fill = array(state["numeric_fill"])
+        prep.lower = array(state["lower"])
+        prep.upper = array(state["upper"])
+        prep.categorical_columns = state["categorical_columns"]
+        prep.categorical_fill = state["categorical_fill"]
+        return prep
+
+    def save(self, path):
+        """Write the fitted state as JSON (atomically)"""
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+def preprocessor_path(results_dir, dataset):
+    return os.path.join(results_dir, f'{dataset}_preprocessor.json')
+
+
+def remove_extreme_outliers(df, numeric_cols, lower_q=0.01, upper_q=0.99, multiplier=3.0):
+    """Vectorized drop-in for the notebooks' remove_extreme_outliers"""
+    prep = Preprocessor(lower_q=lower_q, upper_q=upper_q, multiplier=multiplier, exclude=[])
+    prep.fit(df[numeric_cols])
+    return df[prep.outlier_mask(df)].copy()
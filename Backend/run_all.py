@@ -0,0 +1,222 @@
+"""
+Run-All Orchestrator
+Trains every dataset notebook in one parallel run within a core and memory budget
+
+    python run_all.py
+    python run_all.py --force --max-parallel 2 --memory-mb 3072
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config import Config
+from dataset_store import SOURCES, source_path, ensure_converted
+from notebook_runner import execute_notebook
+from training import available_cores
+from utils import get_cell_profile_history
+import run_cache
+
+NOTEBOOK_SUFFIX = '_FlaskReady.ipynb'
+RUN_ALL_JOB = 'run-all'
+
+
+def discover_notebooks(notebooks_dir=None):
+    """Every *_FlaskReady.ipynb under the notebooks directory, as (name, path)"""
+    notebooks_dir = notebooks_dir or Config.NOTEBOOKS_DIR
+    if not os.path.isdir(notebooks_dir):
+        return []
+    return [
+        (name, os.path.join(notebooks_dir, name))
+        for name in sorted(os.listdir(notebooks_dir))
+        if name.endswith(NOTEBOOK_SUFFIX)
+    ]
+
+
+def estimate_memory_mb(notebook_name):
+    """Highest peak RSS recorded for the notebook's recent runs, or the configured default"""
+    peaks = [
+        run["peak_rss_mb"]
+        for cell in get_cell_profile_history(notebook_name, runs=5)
+        for run in cell["runs"]
+        if run["peak_rss_mb"]
+    ]
+    return max(peaks) if peaks else Config.RUN_ALL_NOTEBOOK_MB
+
+
+def prepare_shared_inputs():
+    """
+    Convert each source CSV into the dataset store once, before the fan-out
+
+    Notebooks started together would otherwise all find a stale store and
+    parse the same CSV at the same time.
+    """
+    shared = {}
+    for dataset in SOURCES:
+        if not os.path.exists(source_path(dataset)):
+            continue
+        try:
+            manifest = ensure_converted(dataset)
+            shared[dataset] = {"version": manifest["version"], "rows": manifest["rows"]}
+        except Exception as e:
+            shared[dataset] = {"error": str(e)}
+    return shared
+
+
+def check_budget(max_parallel, memory_mb):
+    """Reject a max_parallel or memory_mb that is not a positive integer (None keeps the default)"""
+    for name, value in (("max_parallel", max_parallel), ("memory_mb", memory_mb)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+            raise ValueError(f"{name} must be a positive integer, got {value!r}")
+
+
+class MemoryBudget:
+    """Admit notebooks while their estimated memory fits; one always runs even if it alone is too big"""
+
+    def __init__(self, limit_mb):
+        self.limit_mb = limit_mb
+        self.in_use_mb = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, mb):
+        with self._condition:
+            while self.in_use_mb and self.in_use_mb + mb > self.limit_mb:
+                self._condition.wait()
+            self.in_use_mb += mb
+
+    def release(self, mb):
+        with self._condition:
+            self.in_use_mb -= mb
+            self._condition.notify_all()
+
+
+def run_all(force=False, max_parallel=None, memory_mb=None, timeout_seconds=None):
+    """
+    Execute every dataset notebook and merge their results into one report
+
+    Notebooks whose code, data and libraries are unchanged are served from
+    the run cache unless `force` is set. The rest run concurrently - at most
+    `max_parallel` at once, largest expected memory first, while their
+    estimated peak RSS fits in `memory_mb`.
+
+    Returns:
+        consolidated report dict
+    """
+    started = time.perf_counter()
+    check_budget(max_parallel, memory_mb)
+    max_parallel = max_parallel or Config.RUN_ALL_MAX_PARALLEL or available_cores()
+    memory_mb = memory_mb or Config.RUN_ALL_MEMORY_MB
+
+    notebooks = discover_notebooks()
+    shared = prepare_shared_inputs()
+
+    results = {}
+    pending = []
+    for name, path in notebooks:
+        cached = None if force else run_cache.fetch(path)
+        if cached is not None:
+            results[name] = cached
+        else:
+            pending.append((estimate_memory_mb(name), name, path))
+    pending.sort(reverse=True)
+
+    workers = max(1, min(max_parallel, len(pending)))
+    if Config.NOTEBOOK_ENGINE != 'nbconvert':
+        from kernel_pool import kernel_pool
+        kernel_pool.reserve(workers)
+
+    budget = MemoryBudget(memory_mb)
+
+    def run(item):
+        estimate, name, path = item
+        budget.acquire(estimate)
+        try:
+            print(f"▶️ run-all: starting {name} (~{estimate:.0f} MB)")
+            return name, execute_notebook(name, path, timeout_seconds)
+        except Exception as e:
+            return name, {"success": False, "error": "Unexpected error", "message": str(e), "notebook": name}
+        finally:
+            budget.release(estimate)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='run-all') as pool:
+            for name, result in pool.map(run, pending):
+                results[name] = result
+
+    return build_report(notebooks, results, shared, {
+        "max_parallel": workers,
+        "memory_mb": memory_mb,
+        "estimates_mb": {name: round(estimate, 1) for estimate, name, _ in pending}
+    }, time.perf_counter() - started)
+
+
+def build_report(notebooks, results, shared, budget, execution_time):
+    """Merge per-notebook parse_notebook_output payloads into one summary"""
+    datasets = {}
+    next_steps = []
+    for name, _ in notebooks:
+        result = results.get(name, {})
+        dataset = result.get("dataset") or name.split('_')[0]
+        datasets[dataset] = {
+            "notebook": name,
+            "success": bool(result.get("success")),
+            "cached": bool(result.get("cache", {}).get("hit")),
+            "execution_time": result.get("execution_time"),
+            "best_model": result.get("results", {}).get("best_model"),
+            "metrics": result.get("results", {}).get("metrics"),
+            "error": None if result.get("success") else result.get("message") or result.get("error")
+        }
+        next_steps.extend(f"[{dataset}] {step}" for step in result.get("next_steps", []))
+
+    succeeded = sum(1 for d in datasets.values() if d["success"])
+    cached = sum(1 for d in datasets.values() if d["cached"])
+    return {
+        "success": bool(datasets) and succeeded == len(datasets),
+        "message": f"{succeeded}/{len(datasets)} notebook(s) succeeded ({cached} from cache)",
+        "timestamp": datetime.now().isoformat(),
+        "execution_time": round(execution_time, 1),
+        "summary": {
+            "notebooks": len(datasets),
+            "succeeded": succeeded,
+            "failed": len(datasets) - succeeded,
+            "cached": cached
+        },
+        "budget": budget,
+        "shared_inputs": shared,
+        "datasets": datasets,
+        "next_steps": next_steps,
+        "notebooks": results
+    }
+
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {text}")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every *_FlaskReady.ipynb notebook in parallel")
+    parser.add_argument('--force', action='store_true', help="ignore the run cache and retrain everything")
+    parser.add_argument('--max-parallel', type=positive_int, help="notebooks running at once (default: one per core)")
+    parser.add_argument('--memory-mb', type=positive_int, help="memory the running notebooks may use together")
+    parser.add_argument('--timeout', type=int, help="per-notebook timeout in seconds")
+    args = parser.parse_args()
+
+    from utils import init_db
+    init_db()
+
+    report = run_all(args.force, args.max_parallel, args.memory_mb, args.timeout)
+    # The full per-notebook payloads are long; the CLI prints the summary
+    print(json.dumps({k: v for k, v in report.items() if k != "notebooks"}, indent=2, ensure_ascii=False))
+    return 0 if report["success"] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
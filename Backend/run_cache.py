@@ -0,0 +1,287 @@
+"""
+Training Run Cache
+Skips notebook re-execution when the notebook code, input CSVs, backend modules and library versions are unchanged
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from importlib import metadata
+
+from config import Config
+from model_registry import file_sha256
+import artifact_index
+import model_store
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Libraries whose version changes can change the trained models or plots
+TRACKED_PACKAGES = ['numpy', 'pandas', 'scikit-learn', 'xgboost', 'joblib', 'matplotlib', 'seaborn']
+
+CSV_REFERENCE = re.compile(r"""['"]([^'"]+\.csv)['"]""", re.IGNORECASE)
+IMPORT_STATEMENT = re.compile(r'^\s*(?:from|import)\s+(\w+)', re.MULTILINE)
+
+# sha256 of input files memoized by (path, mtime, size) so unchanged CSVs are not re-read
+_file_hashes = {}
+_lock = threading.Lock()
+
+
+def _cached_file_hash(path):
+    stat = os.stat(path)
+    memo_key = (path, stat.st_mtime_ns, stat.st_size)
+    digest = _file_hashes.get(memo_key)
+    if digest is None:
+        digest = file_sha256(path)
+        _file_hashes[memo_key] = digest
+    return digest
+
+
+def _library_versions():
+    versions = {"python": sys.version.split()[0]}
+    for package in TRACKED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def _input_csvs(notebook_dir, sources):
+    """CSV files referenced by the notebook code, falling back to every file in Data Sources"""
+    data_dir = os.path.join(notebook_dir, 'Data Sources')
+    paths = set()
+    for name in CSV_REFERENCE.findall('\n'.join(sources)):
+        for candidate in (os.path.join(notebook_dir, name), os.path.join(data_dir, os.path.basename(name))):
+            if os.path.exists(candidate):
+                paths.add(os.path.abspath(candidate))
+    if not paths and os.path.isdir(data_dir):
+        paths = {os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.lower().endswith('.csv')}
+    return sorted(paths)
+
+
+def _local_modules(sources):
+    """
+    Backend modules (preprocessing.py, dataset_store.py, ...) the code imports, directly or through each other
+
+    The notebooks put the backend directory on sys.path, so a change to one
+    of these files changes what a run trains just like a change to a cell.
+    """
+    found = set()
+    pending = IMPORT_STATEMENT.findall('\n'.join(sources))
+    while pending:
+        name = pending.pop()
+        path = os.path.join(BASE_DIR, f'{name}.py')
+        if name in found or not os.path.isfile(path):
+            continue
+        found.add(name)
+        with open(path, 'r', encoding='utf-8') as f:
+            pending.extend(IMPORT_STATEMENT.findall(f.read()))
+    return sorted(os.path.join(BASE_DIR, f'{name}.py') for name in found)
+
+
+def compute_run_key(notebook_path):
+    """
+    Hash everything that determines a training run's output
+
+    Returns:
+        key (hex sha256), inputs dict describing what was hashed
+    """
+    with open(notebook_path, 'r', encoding='utf-8') as f:
+        nb = json.load(f)
+
+    # Only code matters - outputs and markdown change without affecting training
+    sources = [
+        ''.join(cell.get('source', ''))
+        for cell in nb.get('cells', [])
+        if cell.get('cell_type') == 'code'
+    ]
+    csvs = _input_csvs(os.path.dirname(notebook_path), sources)
+
+    inputs = {
+        "code": hashlib.sha256('\x00'.join(sources).encode('utf-8')).hexdigest(),
+        "data": {os.path.relpath(p, BASE_DIR).replace('\\', '/'): _cached_file_hash(p) for p in csvs},
+        "modules": {os.path.basename(p): _cached_file_hash(p) for p in _local_modules(sources)},
+        "libraries": _library_versions()
+    }
+    key = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+    return key, inputs
+
+
+def snapshot_artifacts(dataset=None):
+    """
+    Map every file under the artifact roots to its (mtime, size)
+
+    With a dataset, only its `<dataset>_*` files are included. Notebooks
+    running at the same time write other datasets' files, which must not
+    show up in this run's diff.
+    """
+    prefix = f'{dataset}_' if dataset else ''
+    snapshot = {}
+    for root in Config.ARTIFACT_ROOTS:
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.startswith(prefix):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # Replaced or removed by a concurrent run since the listing
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def _entry_dir(key):
+    return os.path.join(Config.RUN_CACHE_DIR, key)
+
+
+def _write_manifest(entry_dir, manifest):
+    tmp_path = os.path.join(entry_dir, 'manifest.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(entry_dir, 'manifest.json'))
+
+
+def _read_manifest(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, 'manifest.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def lookup(notebook_path):
+    """
+    Parsed result of a cached run, without restoring its artifacts
+
+    Returns:
+        result dict with a "cache" section, or None on a miss
+    """
+    key, _ = compute_run_key(notebook_path)
+    manifest = _read_manifest(_entry_dir(key))
+    if manifest is None:
+        return None
+    result = dict(manifest["result"])
+    result["cache"] = {"hit": True, "key": key, "cached_at": manifest["created_at"]}
+    return result
+
+
+def restore(result):
+    """
+    Copy back and publish the artifacts of the cached run a lookup() returned
+
+    Returns:
+        the result, or a failed result if the entry was evicted since the lookup
+    """
+    key = result["cache"]["key"]
+    entry_dir = _entry_dir(key)
+    manifest = _read_manifest(entry_dir)
+    if manifest is None:
+        return {
+            "success": False,
+            "error": "Cached run evicted",
+            "message": f"Run cache entry {key[:12]} was evicted before its artifacts were restored",
+            "cache": result["cache"]
+        }
+
+    for relpath in manifest["files"]:
+        source = os.path.join(entry_dir, 'files', relpath)
+        destination = os.path.join(BASE_DIR, relpath)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        # Copy next to the destination and swap, so readers never see a partial file
+        tmp_path = destination + '.restore.tmp'
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, destination)
+    artifact_index.record(manifest["files"], manifest["notebook"])
+
+    manifest["last_used"] = time.time()
+    _write_manifest(entry_dir, manifest)
+
+    # The restored pipelines become a (usually existing) store version again
+    model_store.publish_run(result)
+    print(f"⚡ Run cache hit for {manifest['notebook']} ({key[:12]})")
+    return result
+
+
+def fetch(notebook_path):
+    """
+    Restore the artifacts of a cached run and return its parsed result
+
+    Returns:
+        result dict with a "cache" section, or None on a miss
+    """
+    result = lookup(notebook_path)
+    return restore(result) if result is not None else None
+
+
+def store(key, inputs, notebook_name, result, before, dataset=None):
+    """
+    Save the artifacts a run wrote (new or modified since `before`) with its result
+
+    `before` is a snapshot_artifacts(dataset) taken when the run started.
+    """
+    after = snapshot_artifacts(dataset)
+    changed = [path for path, stat in after.items() if before.get(path) != stat]
+
+    entry_dir = _entry_dir(key)
+    tmp_dir = entry_dir + f'.tmp-{os.getpid()}-{threading.get_ident()}'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    files, size_bytes = [], 0
+    for path in changed:
+        relpath = os.path.relpath(path, BASE_DIR).replace('\\', '/')
+        target = os.path.join(tmp_dir, 'files', relpath)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            shutil.copy2(path, target)
+        except FileNotFoundError:
+            continue
+        files.append(relpath)
+        size_bytes += os.path.getsize(target)
+
+    os.makedirs(tmp_dir, exist_ok=True)
+    _write_manifest(tmp_dir, {
+        "key": key,
+        "notebook": notebook_name,
+        "inputs": inputs,
+        "files": files,
+        "size_bytes": size_bytes,
+        "result": result,
+        "created_at": datetime.now().isoformat(),
+        "last_used": time.time()
+    })
+
+    with _lock:
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        evict(Config.RUN_CACHE_MAX_MB * 1024 * 1024)
+
+    print(f"💾 Cached run of {notebook_name} ({key[:12]}, {len(files)} artifact(s))")
+
+
+def evict(budget_bytes):
+    """Drop least recently used entries until the cache fits the size budget"""
+    if not os.path.isdir(Config.RUN_CACHE_DIR):
+        return
+    entries = []
+    for name in os.listdir(Config.RUN_CACHE_DIR):
+        manifest = _read_manifest(os.path.join(Config.RUN_CACHE_DIR, name))
+        if manifest is not None:
+            entries.append((manifest["last_used"], manifest["size_bytes"], name))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= budget_bytes:
+            break
+        shutil.rmtree(os.path.join(Config.RUN_CACHE_DIR, name), ignore_errors=True)
+        total -= size
+        print(f"🗑️ Evicted cached run {name[:12]}")
@@ -0,0 +1,276 @@
+"""
+Training Engine
+Fits the shared preprocessing once and trains the candidate models in parallel
+
+    python training.py TESS
+    python training.py TESS --algorithms RandomForest XGBoost --max-cores 4
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+from threadpoolctl import threadpool_limits
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler, OneHotEncoder
+
+from config import Config
+from artifact_index import record
+from model_registry import ALGORITHMS
+from model_store import publish
+from dataset_store import load_dataset
+from preprocessing import TARGETS, Preprocessor, make_target, preprocessor_path
+
+try:
+    from xgboost import XGBClassifier
+    XGB_AVAILABLE = True
+except Exception:
+    XGB_AVAILABLE = False
+
+RANDOM_STATE = 42
+
+# What each dataset's notebook does before fitting: the columns it drops, how it imputes
+# and whether it removes extreme outliers. The label's source column is always dropped.
+DATASET_SETTINGS = {
+    "TESS": {"drop": [], "numeric_strategy": 'median', "drop_outliers": True},
+    "Kepler": {
+        "drop": ['stellar_age_Gyr', 'ingress_duration_hrs', 'eccentricity', 'orbital_period_days'],
+        "numeric_strategy": 'mean',
+        "drop_outliers": False
+    },
+    "K2": {"drop": [], "numeric_strategy": 'median', "drop_outliers": True}
+}
+
+
+def available_cores():
+    """CPU cores this process may use, capped by TRAINING_MAX_CORES"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    if Config.TRAINING_MAX_CORES > 0:
+        cores = min(cores, Config.TRAINING_MAX_CORES)
+    return max(1, cores)
+
+
+def plan_cores(algorithms, cores):
+    """
+    Split the core budget between models trained at the same time
+
+    Returns:
+        number of concurrent fits, {algorithm: threads for that fit}
+    """
+    workers = max(1, min(len(algorithms), cores))
+    threads = {name: 1 for name in algorithms}
+    # LogisticRegression (lbfgs) uses one core; the tree ensembles share the rest
+    parallel = [name for name in algorithms if name != 'LogisticRegression']
+    if parallel:
+        spare = max(len(parallel), cores - (len(algorithms) - len(parallel)))
+        for i, name in enumerate(parallel):
+            threads[name] = spare // len(parallel) + (1 if i < spare % len(parallel) else 0)
+    return workers, threads
+
+
+def build_classifier(name, n_threads):
+    """The notebooks' candidate models, with their thread count set explicitly"""
+    if name == 'RandomForest':
+        return RandomForestClassifier(n_estimators=200, random_state=RANDOM_STATE, n_jobs=n_threads)
+    if name == 'LogisticRegression':
+        return LogisticRegression(max_iter=1000, random_state=RANDOM_STATE)
+    if name == 'XGBoost':
+        if not XGB_AVAILABLE:
+            raise ValueError("XGBoost is not installed")
+        return XGBClassifier(eval_metric='logloss', random_state=RANDOM_STATE, n_jobs=n_threads)
+    raise ValueError(f"Unknown algorithm: {name}")
+
+
+def build_column_transformer(numeric_features, categorical_features):
+    """Same scaler/one-hot layout as the notebooks' build_preprocessor"""
+    transformers = []
+    if numeric_features:
+        transformers.append(('num', Pipeline([('scaler', StandardScaler())]), numeric_features))
+    if categorical_features:
+        encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
+        transformers.append(('cat', Pipeline([('onehot', encoder)]), categorical_features))
+    return ColumnTransformer(transformers, remainder='drop')
+
+
+def evaluate(clf, X, y):
+    """The metrics evaluate_models() writes, for binary or multi-class targets"""
+    y_pred = clf.predict(X)
+    binary = len(np.unique(y)) <= 2
+    average = 'binary' if binary else 'weighted'
+    metrics = {
+        'accuracy': float(accuracy_score(y, y_pred)),
+        'precision': float(precision_score(y, y_pred, average=average, zero_division=0)),
+        'recall': float(recall_score(y, y_pred, average=average, zero_division=0)),
+        'f1': float(f1_score(y, y_pred, average=average, zero_division=0)),
+        'auc': None
+    }
+    if hasattr(clf, 'predict_proba'):
+        proba = clf.predict_proba(X)
+        try:
+            metrics['auc'] = float(roc_auc_score(y, proba[:, 1]) if binary else roc_auc_score(y, proba, multi_class='ovr'))
+        except ValueError:
+            pass
+    return metrics
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def train_dataset(dataset, algorithms=None, output_dir=None, max_cores=None, test_size=0.2, publish_models=None,
+                  promote=None):
+    """
+    Train every candidate model for a dataset and write the notebook artifacts
+
+    The shared Preprocessor and the ColumnTransformer are fitted once, and the
+    transformed train/test matrices are reused by every model. Models are fitted
+    on a thread pool - the heavy loops in scikit-learn and XGBoost release the
+    GIL, and threads share the cached matrices without copying them. Each fit
+    gets an explicit n_jobs/nthread from the core budget, and BLAS is limited
+    to the same budget, so concurrent fits do not oversubscribe the CPU.
+
+    Writes to <output_dir>/models and <output_dir>/results:
+        <dataset>_<algorithm>_pipeline.pkl, <dataset>_metrics.json,
+        <dataset>_training_columns.json, <dataset>_feature_medians.json,
+        <dataset>_preprocessor.json
+
+    and publishes them as a new model store version. publish_models defaults
+    to publishing only runs written to TRAINING_OUTPUT_DIR, so a scratch
+    --output-dir stays out of the store; promote defaults to
+    MODEL_STORE_AUTO_PROMOTE.
+
+    Returns:
+        report dict with per-model fit times and metrics
+    """
+    started = time.perf_counter()
+    algorithms = list(algorithms or [a for a in ALGORITHMS if a != 'XGBoost' or XGB_AVAILABLE])
+    output_dir = output_dir or Config.TRAINING_OUTPUT_DIR
+    if publish_models is None:
+        publish_models = os.path.abspath(output_dir) == os.path.abspath(Config.TRAINING_OUTPUT_DIR)
+    models_dir = os.path.join(output_dir, 'models')
+    results_dir = os.path.join(output_dir, 'results')
+    os.makedirs(models_dir, exist_ok=True)
+    os.makedirs(results_dir, exist_ok=True)
+
+    # --- Shared preprocessing, done once
+    t0 = time.perf_counter()
+    settings = DATASET_SETTINGS[dataset]
+    df = make_target(load_dataset(dataset), dataset)
+    # The disposition the Target is mapped from would leak the label into the features
+    dropped = [TARGETS[dataset]["column"], *settings["drop"]]
+    df = df.drop(columns=[c for c in dropped if c in df.columns])
+    prep = Preprocessor(numeric_strategy=settings["numeric_strategy"], exclude=['Target'])
+    df = prep.fit_transform(df, drop_outliers=settings["drop_outliers"])
+    prep.save(preprocessor_path(results_dir, dataset))
+
+    X = df.drop(columns=['Target'])
+    y = df['Target'].astype(int).to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=RANDOM_STATE, stratify=y
+    )
+
+    column_transformer = build_column_transformer(prep.numeric_columns, prep.categorical_columns)
+    Xt_train = column_transformer.fit_transform(X_train)
+    Xt_test = column_transformer.transform(X_test)
+    preprocess_seconds = time.perf_counter() - t0
+
+    _write_json(os.path.join(results_dir, f'{dataset}_training_columns.json'), X_train.columns.tolist())
+    _write_json(
+        os.path.join(results_dir, f'{dataset}_feature_medians.json'),
+        X_train.median(numeric_only=True).to_dict()
+    )
+
+    # --- Concurrent model fits
+    cores = max_cores or available_cores()
+    workers, threads = plan_cores(algorithms, cores)
+
+    def fit(name):
+        clf = build_classifier(name, threads[name])
+        fit_started = time.perf_counter()
+        clf.fit(Xt_train, y_train)
+        fit_seconds = time.perf_counter() - fit_started
+        metrics = evaluate(clf, Xt_test, y_test)
+
+        # The fitted ColumnTransformer is shared, so the pickle predicts from raw rows like before
+        pipeline = Pipeline([('preprocessor', column_transformer), ('clf', clf)])
+        path = os.path.join(models_dir, f'{dataset}_{name}_pipeline.pkl')
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        joblib.dump(pipeline, tmp_path)
+        os.replace(tmp_path, path)
+        print(f"✅ Trained {dataset}/{name} in {fit_seconds:.2f}s ({threads[name]} thread(s))")
+        return name, fit_seconds, metrics, path
+
+    with threadpool_limits(limits=max(threads.values())):
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='train') as pool:
+            fitted = list(pool.map(fit, algorithms))
+
+    metrics_file = {}
+    models = {}
+    for name, fit_seconds, metrics, path in fitted:
+        metrics_file[name] = {**metrics, 'fit_seconds': round(fit_seconds, 3)}
+        models[name] = {
+            "fit_seconds": round(fit_seconds, 3),
+            "threads": threads[name],
+            "metrics": metrics,
+            "pipeline": path
+        }
+    _write_json(os.path.join(results_dir, f'{dataset}_metrics.json'), metrics_file)
+
+    record([
+        *(m["pipeline"] for m in models.values()),
+        *(os.path.join(results_dir, f'{dataset}{suffix}') for suffix in (
+            '_metrics.json', '_training_columns.json', '_feature_medians.json', '_preprocessor.json'))
+    ], notebook='training.py')
+    manifest = publish(dataset, output_dir, source='training.py', promote=promote) if publish_models else None
+
+    return {
+        "dataset": dataset,
+        "rows": {"train": len(X_train), "test": len(X_test)},
+        "features": {"numeric": len(prep.numeric_columns), "categorical": len(prep.categorical_columns)},
+        "cores": cores,
+        "concurrent_fits": workers,
+        "preprocess_seconds": round(preprocess_seconds, 3),
+        "sum_fit_seconds": round(sum(m["fit_seconds"] for m in models.values()), 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "model_version": manifest["version"] if manifest else None,
+        "models": models
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the candidate models for a dataset in parallel")
+    parser.add_argument('dataset', help="dataset name (TESS, Kepler, K2)")
+    parser.add_argument('--algorithms', nargs='+', choices=ALGORITHMS, help="models to train (default: all available)")
+    parser.add_argument('--max-cores', type=int, help="core budget (default: all usable cores)")
+    parser.add_argument('--output-dir', help="artifact root containing models/ and results/")
+    store = parser.add_mutually_exclusive_group()
+    store.add_argument('--publish', action='store_true',
+                       help="add the models to the model store even from another --output-dir")
+    store.add_argument('--promote', action='store_true', help="publish the models and serve them")
+    store.add_argument('--no-publish', action='store_true', help="do not add the models to the model store")
+    args = parser.parse_args()
+
+    publish_models = True if args.publish or args.promote else False if args.no_publish else None
+    report = train_dataset(args.dataset, args.algorithms, args.output_dir, args.max_cores,
+                           publish_models=publish_models, promote=True if args.promote else None)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
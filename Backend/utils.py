@@ -1,18 +1,99 @@
 import sqlite3
 import os
 import json
-from datetime import datetime
+import time
+import base64
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
 
-# Use absolute path for database
+from metrics import DB_WRITE_SECONDS
+
+# Use absolute path for database (DATABASE_PATH points a server at another file, e.g. for load tests)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "db.sqlite3")
+DB_PATH = os.environ.get('DATABASE_PATH') or os.path.join(BASE_DIR, "db.sqlite3")
+
+# Applied to every pooled connection. WAL lets readers run alongside the single
+# writer; synchronous=NORMAL only fsyncs at checkpoints, which is safe in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY"
+)
+
+# Statements are kept as constants so the connection's statement cache reuses them
+INSERT_PREDICTION_SQL = """
+    INSERT INTO predictions (dataset, model, features, probability, label, raw_output, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Width of a probability histogram bucket; probability 1.0 lands in the last bucket
+HISTOGRAM_BUCKETS = 10
+
+# Rollups are upserted in the same transaction as the rows they summarize
+UPSERT_LABEL_STATS_SQL = """
+    INSERT INTO prediction_stats_labels (label, count) VALUES (?, ?)
+    ON CONFLICT (label) DO UPDATE SET count = count + excluded.count
+"""
+UPSERT_HISTOGRAM_STATS_SQL = """
+    INSERT INTO prediction_stats_histogram (bucket, count) VALUES (?, ?)
+    ON CONFLICT (bucket) DO UPDATE SET count = count + excluded.count
+"""
+UPSERT_MODEL_STATS_SQL = """
+    INSERT INTO prediction_stats_models (model, count, probability_sum) VALUES (?, ?, ?)
+    ON CONFLICT (model) DO UPDATE SET
+        count = count + excluded.count,
+        probability_sum = probability_sum + excluded.probability_sum
+"""
+UPSERT_HOURLY_STATS_SQL = """
+    INSERT INTO prediction_stats_hourly (hour, count) VALUES (?, ?)
+    ON CONFLICT (hour) DO UPDATE SET count = count + excluded.count
+"""
+
+_local = threading.local()
 
 def get_connection():
-    """Create a connection to the SQLite database"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """
+    Return this thread's pooled connection to the SQLite database
+
+    A connection is opened once per thread and worker process (a forked
+    worker opens its own), so pragmas are applied once and prepared
+    statements stay cached. Callers must not close it.
+    """
+    key = (os.getpid(), DB_PATH)
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.key != key:
+        conn = sqlite3.connect(DB_PATH, timeout=5.0, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        _local.conn = conn
+        _local.key = key
     return conn
 
+def close_connection():
+    """Close this thread's pooled connection, if any"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.key[0] == os.getpid():
+        conn.close()
+    _local.conn = None
+
+def _rollback(conn):
+    """Leave a pooled connection usable after a failed statement"""
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+# Database files init_db() has set up in this process
+_initialized = set()
+
+def ensure_db():
+    """init_db() once per database file and process"""
+    if DB_PATH not in _initialized:
+        init_db()
+
 def init_db():
     """Initialize the database with the predictions table"""
     conn = get_connection()
@@ -29,69 +110,400 @@ def init_db():
             created_at TEXT NOT NULL
         )
     """)
+    # Keyset pagination walks these newest-first; id (the rowid) is implicitly appended
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_predictions_created_at
+        ON predictions (created_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_predictions_model_created_at
+        ON predictions (model, created_at)
+    """)
+    # Incremental rollups behind /api/predictions/stats
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prediction_stats_labels (
+            label TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prediction_stats_histogram (
+            bucket INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prediction_stats_models (
+            model TEXT PRIMARY KEY,
+            count INTEGER NOT NULL,
+            probability_sum REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS prediction_stats_hourly (
+            hour TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notebook_jobs (
+            id TEXT PRIMARY KEY,
+            notebook TEXT NOT NULL,
+            status TEXT NOT NULL,
+            stage TEXT,
+            result TEXT,
+            worker_pid INTEGER,
+            submitted_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notebook_jobs_notebook_status
+        ON notebook_jobs (notebook, status)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS notebook_cell_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            notebook TEXT NOT NULL,
+            cell INTEGER NOT NULL,
+            label TEXT,
+            seconds REAL NOT NULL,
+            peak_rss_mb REAL,
+            output_bytes INTEGER,
+            status TEXT,
+            created_at TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notebook_cell_profiles_notebook
+        ON notebook_cell_profiles (notebook, created_at)
+    """)
+    # Files written by training runs, kept current by the runner (see artifact_index.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS artifacts (
+            path TEXT PRIMARY KEY,
+            dataset TEXT,
+            kind TEXT NOT NULL,
+            category TEXT,
+            size_bytes INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            notebook TEXT,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_artifacts_dataset_kind
+        ON artifacts (dataset, kind)
+    """)
     conn.commit()
-    conn.close()
+
+    # Databases created before the rollups existed need a one-off backfill
+    has_predictions = conn.execute("SELECT EXISTS (SELECT 1 FROM predictions)").fetchone()[0]
+    has_stats = conn.execute("SELECT EXISTS (SELECT 1 FROM prediction_stats_models)").fetchone()[0]
+    if has_predictions and not has_stats:
+        rebuild_prediction_stats()
+    # ...and so does the artifact index (imported here: artifact_index imports utils)
+    if not conn.execute("SELECT EXISTS (SELECT 1 FROM artifacts)").fetchone()[0]:
+        from artifact_index import rebuild
+        rebuild()
+    _initialized.add(DB_PATH)
     print("✅ Database initialized successfully")
 
+def prediction_row(dataset, model, features, probability, label, raw_output):
+    """Build the INSERT parameters for one prediction"""
+    return (
+        dataset,
+        model,
+        json.dumps(features),
+        float(probability),
+        label,
+        json.dumps(raw_output) if raw_output else None,
+        # Use ISO format timestamp
+        datetime.now().isoformat()
+    )
+
+def histogram_bucket(probability):
+    """Index of the probability histogram bucket a prediction falls into"""
+    return min(max(int(probability * HISTOGRAM_BUCKETS), 0), HISTOGRAM_BUCKETS - 1)
+
+def _update_prediction_stats(conn, rows):
+    """Fold prediction_row() tuples into the rollup tables (caller commits)"""
+    labels = defaultdict(int)
+    buckets = defaultdict(int)
+    models = defaultdict(lambda: [0, 0.0])
+    hours = defaultdict(int)
+    for _, model, _, probability, label, _, created_at in rows:
+        labels[label] += 1
+        buckets[histogram_bucket(probability)] += 1
+        models[model][0] += 1
+        models[model][1] += probability
+        hours[created_at[:13]] += 1
+
+    conn.executemany(UPSERT_LABEL_STATS_SQL, labels.items())
+    conn.executemany(UPSERT_HISTOGRAM_STATS_SQL, buckets.items())
+    conn.executemany(UPSERT_MODEL_STATS_SQL, [(m, c, total) for m, (c, total) in models.items()])
+    conn.executemany(UPSERT_HOURLY_STATS_SQL, hours.items())
+
 def save_prediction(dataset, model, features, probability, label, raw_output):
     """Save a prediction to the database"""
+    conn = None
     try:
+        started = time.perf_counter()
         conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Use ISO format timestamp
-        timestamp = datetime.now().isoformat()
-        
-        cursor.execute("""
-            INSERT INTO predictions (dataset, model, features, probability, label, raw_output, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            dataset,
-            model,
-            json.dumps(features),
-            float(probability),
-            label,
-            json.dumps(raw_output) if raw_output else None,
-            timestamp
-        ))
-        
+        row = prediction_row(dataset, model, features, probability, label, raw_output)
+        conn.execute(INSERT_PREDICTION_SQL, row)
+        _update_prediction_stats(conn, [row])
         conn.commit()
-        conn.close()
-        print(f"✅ Prediction saved: {model} | Label: {label} | Prob: {probability:.2f}")
+        DB_WRITE_SECONDS.observe(time.perf_counter() - started, ('single',))
     except Exception as e:
+        _rollback(conn)
         print(f"❌ Error saving prediction: {e}")
 
+def save_predictions(rows):
+    """Insert many prediction_row() tuples in a single transaction"""
+    started = time.perf_counter()
+    conn = get_connection()
+    try:
+        conn.executemany(INSERT_PREDICTION_SQL, rows)
+        _update_prediction_stats(conn, rows)
+        conn.commit()
+        DB_WRITE_SECONDS.observe(time.perf_counter() - started, ('batch',))
+    except Exception:
+        _rollback(conn)
+        raise
+
+def encode_cursor(created_at, row_id):
+    """Opaque keyset cursor pointing just past a prediction"""
+    return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return created_at, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def get_predictions_page(limit=50, cursor=None, model=None, dataset=None, label=None,
+                         min_probability=None, max_probability=None, include_raw=True):
+    """
+    Retrieve one page of predictions, newest first
+
+    Uses keyset pagination on (created_at, id) so every page is an index
+    range scan, however deep into the history it is.
+
+    Returns:
+        dict with "predictions" and "next_cursor" (None on the last page)
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    columns = "id, dataset, model, features, probability, label, created_at"
+    if include_raw:
+        columns += ", raw_output"
+
+    conditions, params = [], []
+    if cursor:
+        conditions.append("(created_at, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+    for column, value in (("model", model), ("dataset", dataset), ("label", label)):
+        if value:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if min_probability is not None:
+        conditions.append("probability >= ?")
+        params.append(float(min_probability))
+    if max_probability is not None:
+        conditions.append("probability <= ?")
+        params.append(float(max_probability))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    conn = get_connection()
+    # Fetch one extra row to learn whether another page exists
+    rows = conn.execute(f"""
+        SELECT {columns}
+        FROM predictions
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    """, (*params, limit + 1)).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Convert rows to dictionaries
+    predictions = []
+    for row in rows:
+        prediction = {
+            "id": row["id"],
+            "dataset": row["dataset"],
+            "model": row["model"],
+            "features": json.loads(row["features"]) if row["features"] else {},
+            "probability": row["probability"],
+            "label": row["label"],
+            "created_at": row["created_at"]
+        }
+        if include_raw:
+            prediction["raw_output"] = json.loads(row["raw_output"]) if row["raw_output"] else None
+        predictions.append(prediction)
+
+    next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if has_more else None
+    return {"predictions": predictions, "next_cursor": next_cursor}
+
 def get_predictions(limit=50):
     """Retrieve recent predictions from the database"""
+    try:
+        return get_predictions_page(limit)["predictions"]
+    except Exception as e:
+        print(f"❌ Error retrieving predictions: {e}")
+        return []
+
+def rebuild_prediction_stats():
+    """Recompute the rollup tables from the full predictions table"""
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for table in ('labels', 'histogram', 'models', 'hourly'):
+            conn.execute(f"DELETE FROM prediction_stats_{table}")
+        conn.execute("""
+            INSERT INTO prediction_stats_labels (label, count)
+            SELECT label, COUNT(*) FROM predictions GROUP BY label
+        """)
+        conn.execute(f"""
+            INSERT INTO prediction_stats_histogram (bucket, count)
+            SELECT MIN(MAX(CAST(probability * {HISTOGRAM_BUCKETS} AS INTEGER), 0), {HISTOGRAM_BUCKETS - 1}), COUNT(*)
+            FROM predictions GROUP BY 1
+        """)
+        conn.execute("""
+            INSERT INTO prediction_stats_models (model, count, probability_sum)
+            SELECT model, COUNT(*), SUM(probability) FROM predictions GROUP BY model
+        """)
+        conn.execute("""
+            INSERT INTO prediction_stats_hourly (hour, count)
+            SELECT substr(created_at, 1, 13), COUNT(*) FROM predictions GROUP BY 1
+        """)
+        conn.commit()
+        print("✅ Prediction stats rebuilt")
+    except Exception:
+        _rollback(conn)
+        raise
+
+def get_prediction_stats(hours=24):
+    """
+    Summarize prediction history from the rollup tables
+
+    Reads a handful of small tables (one row per label, bucket, model and
+    the requested hours), so the cost does not grow with the history.
+    `hourly` covers the last `hours` clock hours up to the current one,
+    oldest first, with a zero count for hours without predictions.
+    """
+    conn = get_connection()
+
+    labels = {
+        row["label"]: row["count"]
+        for row in conn.execute("SELECT label, count FROM prediction_stats_labels ORDER BY label")
+    }
+
+    counts = dict(conn.execute("SELECT bucket, count FROM prediction_stats_histogram").fetchall())
+    histogram = [
+        {
+            "min": round(bucket / HISTOGRAM_BUCKETS, 4),
+            "max": round((bucket + 1) / HISTOGRAM_BUCKETS, 4),
+            "count": counts.get(bucket, 0)
+        }
+        for bucket in range(HISTOGRAM_BUCKETS)
+    ]
+
+    models = {
+        row["model"]: {
+            "count": row["count"],
+            "mean_confidence": round(row["probability_sum"] / row["count"], 4) if row["count"] else None
+        }
+        for row in conn.execute("SELECT model, count, probability_sum FROM prediction_stats_models ORDER BY model")
+    }
+
+    # Hour keys are created_at[:13] of the local-time ISO timestamps, e.g. "2024-05-01T13"
+    now = datetime.now()
+    window = [(now - timedelta(hours=offset)).isoformat()[:13] for offset in range(hours - 1, -1, -1)]
+    hour_counts = dict(conn.execute(
+        "SELECT hour, count FROM prediction_stats_hourly WHERE hour >= ? AND hour <= ?", (window[0], window[-1])
+    ).fetchall())
+    hourly = [{"hour": hour, "count": hour_counts.get(hour, 0)} for hour in window]
+
+    return {
+        "total": sum(labels.values()),
+        "labels": labels,
+        "probability_histogram": histogram,
+        "models": models,
+        "hourly": hourly
+    }
+
+def save_cell_profile(notebook, profile):
+    """Store the per-cell profile of a notebook run"""
+    if not profile:
+        return
+    conn = None
+    try:
+        conn = get_connection()
+        timestamp = datetime.now().isoformat()
+        conn.executemany("""
+            INSERT INTO notebook_cell_profiles
+                (run_id, notebook, cell, label, seconds, peak_rss_mb, output_bytes, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
+                profile["run_id"], notebook, cell["cell"], cell["label"], cell["seconds"],
+                cell["peak_rss_mb"], cell["output_bytes"], cell["status"], timestamp
+            )
+            for cell in profile["cells"]
+        ])
+        conn.commit()
+    except Exception as e:
+        _rollback(conn)
+        print(f"❌ Error saving cell profile: {e}")
+
+def get_cell_profile_history(notebook, runs=20):
+    """Return per-cell measurements of the most recent runs of a notebook, grouped by cell"""
     try:
         conn = get_connection()
         cursor = conn.cursor()
-        
         cursor.execute("""
-            SELECT id, dataset, model, features, probability, label, raw_output, created_at
-            FROM predictions
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (limit,))
-        
+            SELECT run_id, cell, label, seconds, peak_rss_mb, output_bytes, status, created_at
+            FROM notebook_cell_profiles
+            WHERE notebook = ? AND run_id IN (
+                SELECT run_id FROM notebook_cell_profiles
+                WHERE notebook = ?
+                GROUP BY run_id
+                ORDER BY MAX(created_at) DESC
+                LIMIT ?
+            )
+            ORDER BY cell, created_at
+        """, (notebook, notebook, runs))
         rows = cursor.fetchall()
-        conn.close()
-        
-        # Convert rows to dictionaries
-        predictions = []
+
+        cells = {}
         for row in rows:
-            predictions.append({
-                "id": row["id"],
-                "dataset": row["dataset"],
-                "model": row["model"],
-                "features": json.loads(row["features"]) if row["features"] else {},
-                "probability": row["probability"],
-                "label": row["label"],
-                "raw_output": json.loads(row["raw_output"]) if row["raw_output"] else None,
+            cell = cells.setdefault(row["cell"], {"cell": row["cell"], "label": row["label"], "runs": []})
+            cell["label"] = row["label"]
+            cell["runs"].append({
+                "run_id": row["run_id"],
+                "seconds": row["seconds"],
+                "peak_rss_mb": row["peak_rss_mb"],
+                "output_bytes": row["output_bytes"],
+                "status": row["status"],
                 "created_at": row["created_at"]
             })
-        
-        return predictions
+
+        return list(cells.values())
     except Exception as e:
-        print(f"❌ Error retrieving predictions: {e}")
+        print(f"❌ Error retrieving cell profiles: {e}")
         return []
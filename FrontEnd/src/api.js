@@ -10,13 +10,30 @@ export async function listNotebooks() {
   return res.json();
 }
 
-export async function runNotebook(notebook, parameters = {}) {
+export async function runNotebook(notebook, parameters = {}, pollIntervalMs = 2000) {
+  // The backend queues the run and returns a job id; poll until it finishes
   const res = await fetch(`${API_BASE}/run-notebook`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({ notebook, parameters })
   });
   if (!res.ok) throw new Error(`Failed to run notebook: ${res.statusText}`);
+  const { job_id } = await res.json();
+
+  while (true) {
+    await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+    const job = await getJob(job_id);
+    if (job.status === "queued" || job.status === "running") continue;
+    if (!job.result || !job.result.success) {
+      throw new Error(`Failed to run notebook: ${job.result?.message || job.status}`);
+    }
+    return job.result;
+  }
+}
+
+export async function getJob(jobId) {
+  const res = await fetch(`${API_BASE}/jobs/${jobId}`);
+  if (!res.ok) throw new Error(`Failed to get job: ${res.statusText}`);
   return res.json();
 }
 
@@ -40,6 +57,12 @@ export async function getPredictions() {
   return res.json();
 }
 
+export async function getPredictionStats(hours = 24) {
+  const res = await fetch(`${API_BASE}/predictions/stats?hours=${hours}`);
+  if (!res.ok) throw new Error(`Failed to get prediction stats: ${res.statusText}`);
+  return res.json();
+}
+
 export async function getModelFeatures(modelName) {
   const res = await fetch(`${API_BASE}/model-features/${modelName}`);
   if (!res.ok) throw new Error(`Failed to get model features: ${res.statusText}`);